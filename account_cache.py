@@ -0,0 +1,136 @@
+# account_cache.py
+import json
+import os
+import threading
+from solders.pubkey import Pubkey
+from spl.token.constants import TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID
+
+# getMultipleAccounts accepts at most 100 keys per call
+MAX_ACCOUNTS_PER_CALL = 100
+
+# Programs a mint may belong to; anything else (an unknown or closed
+# account reused as a mint address) is never cached
+TOKEN_PROGRAMS = (TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID)
+
+# Substrings of RPC/simulation errors that mean an account we relied on is gone
+MISSING_ACCOUNT_ERRORS = ("accountnotfound", "could not find account", "account not found", "invalidaccountdata")
+
+
+def is_missing_account_error(error) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in MISSING_ACCOUNT_ERRORS)
+
+
+class AccountCache:
+    """
+    Remembers which token program owns each mint and which (owner, mint)
+    ATAs are confirmed on chain. Neither changes once the ATA exists, so
+    the swap path can skip both account lookups. Kept in memory and
+    mirrored to a JSON file so restarts start warm.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv(
+            "ACCOUNT_CACHE_PATH", os.path.join(os.getenv("BASE_DIR", "./tmp"), "account_cache.json"))
+        self._programs = {}
+        self._atas = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _ata_key(owner, mint):
+        return f"{owner}:{mint}"
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._programs = data.get("mint_programs", {})
+        self._atas = data.get("atas", {})
+        print(f"[AccountCache] Loaded {len(self._programs)} mints, {len(self._atas)} ATAs from {self.path}")
+
+    def save(self):
+        with self._lock:
+            data = {"mint_programs": dict(self._programs), "atas": dict(self._atas)}
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[AccountCache] Could not write {self.path}: {e}")
+
+    def get_program(self, mint):
+        program = self._programs.get(str(mint))
+        return Pubkey.from_string(program) if program else None
+
+    def set_program(self, mint, program, persist=True):
+        with self._lock:
+            self._programs[str(mint)] = str(program)
+        if persist:
+            self.save()
+
+    def get_ata(self, owner, mint):
+        ata = self._atas.get(self._ata_key(owner, mint))
+        return Pubkey.from_string(ata) if ata else None
+
+    def set_ata(self, owner, mint, ata, persist=True):
+        with self._lock:
+            self._atas[self._ata_key(owner, mint)] = str(ata)
+        if persist:
+            self.save()
+
+    def invalidate(self, owner, mint):
+        """
+        Forgets the ATA and program for a mint, e.g. after a send failed on
+        a missing account, so the next trade checks the chain again.
+        """
+        with self._lock:
+            self._atas.pop(self._ata_key(owner, mint), None)
+            self._programs.pop(str(mint), None)
+        self.save()
+        print(f"[AccountCache] Invalidated {mint} for {owner}")
+
+    async def _get_multiple(self, client, pubkeys):
+        accounts = []
+        for start in range(0, len(pubkeys), MAX_ACCOUNTS_PER_CALL):
+            chunk = pubkeys[start:start + MAX_ACCOUNTS_PER_CALL]
+            accounts.extend((await client.get_multiple_accounts(chunk)).value)
+        return accounts
+
+    async def prefetch(self, client, owner, mints, derive_ata):
+        """
+        Fills the cache for `mints` with batched getMultipleAccounts calls:
+        one pass for the mints' owning programs, one for the derived ATAs.
+        derive_ata(owner, mint, program) -> Pubkey. Returns the number of
+        confirmed ATAs.
+        """
+        mints = [m for m in dict.fromkeys(mints) if self.get_ata(owner, m) is None]
+        if not mints:
+            return 0
+
+        missing = [m for m in mints if self.get_program(m) is None]
+        for mint, account in zip(missing, await self._get_multiple(client, missing)):
+            if account is not None and account.owner in TOKEN_PROGRAMS:
+                self.set_program(mint, account.owner, persist=False)
+            elif account is not None:
+                print(f"[AccountCache] {mint} is owned by {account.owner}, not a token program; not caching")
+
+        candidates = [(m, self.get_program(m)) for m in mints if self.get_program(m) is not None]
+        atas = [derive_ata(owner, mint, program) for mint, program in candidates]
+        confirmed = 0
+        for (mint, program), ata, account in zip(candidates, atas, await self._get_multiple(client, atas)):
+            if account is not None and account.owner == program:
+                self.set_ata(owner, mint, ata, persist=False)
+                confirmed += 1
+
+        self.save()
+        print(f"[AccountCache] Prefetched {len(mints)} mints, {confirmed} existing ATAs")
+        return confirmed
+
+
+# Process-wide cache used by JupiterSwapper
+account_cache = AccountCache()
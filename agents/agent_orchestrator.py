@@ -1,5 +1,7 @@
 # agents/agent_orchestrator.py
+import asyncio
 import csv
+import time
 from datetime import datetime
 import os
 from collections import defaultdict
@@ -12,13 +14,35 @@ from db import get_connection
 
 
 class AgentOrchestrator:
-    def __init__(self, agents, db_path="trading.db"):
+    def __init__(self, agents, db_path="trading.db", agent_timeout=None, quorum=None, quorum_confidence=None, offline=False):
         self.agents = agents
         self.db_path = db_path
+        # offline (backtests): no vote logging and no performance lookups
+        self.offline = offline
+        # Agents run concurrently; each gets its own timeout (an agent's
+        # `timeout` attribute wins over the default) and late or failed
+        # agents abstain.
+        self.agent_timeout = agent_timeout or float(os.getenv("AGENT_TIMEOUT_SECONDS", 10))
+        # quorum > 0 resolves as soon as that many agents agree on BUY/SELL
+        # with at least quorum_confidence, cancelling the stragglers.
+        self.quorum = quorum if quorum is not None else int(os.getenv("AGENT_QUORUM", 0))
+        self.quorum_confidence = (
+            quorum_confidence if quorum_confidence is not None
+            else float(os.getenv("AGENT_QUORUM_CONFIDENCE", 0.7))
+        )
+        self.agent_stats = defaultdict(lambda: {
+            "calls": 0, "timeouts": 0, "errors": 0, "cancelled": 0,
+            "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0,
+        })
         # self.logger = LogRouter(use_drive=True)
-        self._ensure_vote_table()
+        if not offline:
+            self._ensure_vote_table()
         
         self.monitor = PerformanceMonitor()
+        # Recent-trade stats are a Postgres query: run off the event loop and
+        # shared by every token evaluated within PERFORMANCE_TTL_SECONDS
+        self.performance_ttl = float(os.getenv("PERFORMANCE_TTL_SECONDS", 60))
+        self._performance = None  # (loop, started_at, future)
     
     # def _ensure_vote_log(self):
     #     os.makedirs(os.path.dirname(self.vote_log), exist_ok=True)
@@ -30,43 +54,133 @@ class AgentOrchestrator:
     
     def _ensure_vote_table(self):
         # conn = sqlite3.connect(self.db_path)
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS agent_votes (
-                timestamp TEXT NOT NULL,
-                agent TEXT NOT NULL,
-                action TEXT NOT NULL,
-                amount FLOAT,
-                confidence FLOAT,
-                symbol TEXT
-            )
-        """)
-        conn.commit()
-        conn.close()
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS agent_votes (
+                    timestamp TEXT NOT NULL,
+                    agent TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    amount FLOAT,
+                    confidence FLOAT,
+                    symbol TEXT
+                )
+            """)
+            conn.commit()
+
+
 
+    def _record_latency(self, agent_name, elapsed_ms, outcome=None):
+        stats = self.agent_stats[agent_name]
+        stats["calls"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        stats["last_ms"] = elapsed_ms
+        if outcome:
+            stats[outcome] += 1
+
+    def latency_stats(self) -> dict:
+        """
+        Per-agent call counts and latency, e.g. for spotting a slow model.
+        """
+        return {
+            name: {**stats, "avg_ms": round(stats["total_ms"] / stats["calls"], 2) if stats["calls"] else 0.0}
+            for name, stats in self.agent_stats.items()
+        }
 
+    async def _ask_agent(self, agent, indicators):
+        agent_name = agent.__class__.__name__
+        timeout = getattr(agent, "timeout", None) or self.agent_timeout
+        started = time.perf_counter()
+        try:
+            decision = await asyncio.wait_for(agent.get_decision(indicators), timeout)
+        except asyncio.TimeoutError:
+            self._record_latency(agent_name, (time.perf_counter() - started) * 1000, "timeouts")
+            print(f"[AgentOrchestrator] {agent_name} timed out after {timeout:.1f}s; counting as abstain")
+            return None
+        except asyncio.CancelledError:
+            self._record_latency(agent_name, (time.perf_counter() - started) * 1000, "cancelled")
+            raise
+        except Exception as e:
+            self._record_latency(agent_name, (time.perf_counter() - started) * 1000, "errors")
+            print(f"[AgentOrchestrator] Agent error from {agent_name}: {e}")
+            return None
+        self._record_latency(agent_name, (time.perf_counter() - started) * 1000)
+        return decision
+
+    def _quorum_reached(self, votes) -> bool:
+        if not self.quorum:
+            return False
+        agreeing = defaultdict(int)
+        for _, decision in votes:
+            if decision["confidence"] >= self.quorum_confidence:
+                agreeing[decision["action"]] += 1
+        return any(count >= self.quorum for count in agreeing.values())
+
+    async def _collect_votes(self, indicators):
+        """
+        Fans out to every agent at once and returns [(agent_name, decision)]
+        for BUY/SELL votes, in agent order.
+        """
+        tasks = {
+            asyncio.ensure_future(self._ask_agent(agent, indicators)): (i, agent)
+            for i, agent in enumerate(self.agents)
+        }
+        pending = set(tasks)
+        collected = []
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                i, agent = tasks[task]
+                agent_name = agent.__class__.__name__
+                decision = task.result()
+                if decision is None:
+                    continue
+                if not self.offline:
+                    print(f"[AgentOrchestrator] Vote from {agent_name}: {decision}")
+                try:
+                    is_vote = decision["action"] in ("BUY", "SELL") and decision["confidence"] > 0
+                except (KeyError, TypeError) as e:
+                    print(f"[AgentOrchestrator] Agent error from {agent_name}: malformed decision {e}")
+                    continue
+                if is_vote:
+                    collected.append((i, agent_name, decision))
+                    if not self.offline:
+                        self._log_vote(agent_name, decision, indicators.get("symbol"))
+                elif not self.offline:
+                    print(f"[AgentOrchestrator] Ignored vote from {agent_name}: {decision}")
+
+            if pending and self._quorum_reached([(name, d) for _, name, d in collected]):
+                print(f"[AgentOrchestrator] Quorum of {self.quorum} reached; cancelling {len(pending)} pending agent(s)")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                break
+
+        collected.sort(key=lambda vote: vote[0])
+        return [(name, decision) for _, name, decision in collected]
+
+    async def recent_performance(self):
+        """
+        PerformanceMonitor.evaluate() in the default executor. Concurrent
+        callers share one lookup, and its result is reused for
+        performance_ttl seconds.
+        """
+        if self.offline:
+            return None
+        loop = asyncio.get_running_loop()
+        cached = self._performance
+        if cached is None or cached[0] is not loop or time.monotonic() - cached[1] > self.performance_ttl:
+            cached = (loop, time.monotonic(), loop.run_in_executor(None, self.monitor.evaluate))
+            self._performance = cached
+        # Shielded so one cancelled caller doesn't cancel it for the others
+        return await asyncio.shield(cached[2])
 
     async def resolve_decision(self, indicators) -> dict:
         # self._ensure_vote_log()
         # print(f"[AgentOrchestrator] Indicators received: {indicators}")
-        votes = []
-
-        for agent in self.agents:
-            try:
-                decision = await agent.get_decision(indicators)
-                print(f"[AgentOrchestrator] Vote from {agent.__class__.__name__}: {decision}")
-                if decision["action"] in ("BUY", "SELL") and decision["confidence"] > 0:
-                    agent_name = agent.__class__.__name__
-                    votes.append((agent_name, decision))
-                # print(f"[AgentOrchestrator] Vote from {agent.__class__.__name__}: {decision}")
-                
-                # votes.append((agent.__class__.__name__, decision))
-                    self._log_vote(agent.__class__.__name__, decision, indicators.get("symbol"))
-                else:
-                    print(f"[AgentOrchestrator] Ignored vote from {agent.__class__.__name__}: {decision}")
-            except Exception as e:
-                print(f"[AgentOrchestrator] Agent error from {agent.__class__.__name__}: {e}")
+        votes = await self._collect_votes(indicators)
 
         valid_votes = [v for _, v in votes if v.get("action") in ("BUY", "SELL") and v.get("confidence", 0) > 0]
         if not valid_votes:
@@ -78,7 +192,7 @@ class AgentOrchestrator:
             return {"action": "HOLD", "amount": 0.0, "confidence": 0.0}
 
         # Evaluate past performance and adapt threshold
-        performance = self.monitor.evaluate()
+        performance = await self.recent_performance()
         if performance:
             # print(f"[PerformanceMonitor] Recent stats: {performance}")
             for agent in self.agents:
@@ -143,32 +257,13 @@ class AgentOrchestrator:
     def _log_vote(self, agent_name, decision, symbol):
         now = datetime.utcnow().isoformat()
         try:
-            # with sqlite3.connect("trading.db") as conn:
-            with get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO agent_votes (timestamp, agent, action, amount, confidence, symbol)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                """, (
-                    now,
-                    agent_name,
-                    decision.get("action", "HOLD"),
-                    decision.get("amount", 0.0),
-                    decision.get("confidence", 0.0),
-                    symbol
-                ))
-                conn.commit()
-        # log_agent_votes
-        # with open(self.vote_log, mode='a', newline='') as f:
-        #     writer = csv.writer(f)
-        #     writer.writerow([
-        #         now,
-        #         agent_name,
-        #         decision.get("action", "HOLD"),
-        #         decision.get("amount", 0.0),
-        #         decision.get("confidence", 0.0)
-        #     ])
-        #     try:
-        #         self.logger.log_local_and_remote(self.vote_log)
+            log_agent_votes(
+                timestamp=now,
+                agent=agent_name,
+                action=decision.get("action", "HOLD"),
+                amount=decision.get("amount", 0.0),
+                confidence=decision.get("confidence", 0.0),
+                symbol=symbol
+            )
         except Exception as e:
-            print(f"[AgentOrchestrator] Failed to log vote to DB: {e}")
\ No newline at end of file
+            print(f"[AgentOrchestrator] Failed to log vote to DB: {e}")
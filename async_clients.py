@@ -0,0 +1,60 @@
+# async_clients.py
+import asyncio
+import os
+import httpx
+from solana.rpc.async_api import AsyncClient
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# One of each per event loop: connections are kept alive between swaps
+_http_clients = {}
+_rpc_clients = {}
+
+
+def _loop_key():
+    return id(asyncio.get_running_loop())
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Shared keep-alive HTTP client (HTTP/2 when the h2 package is installed).
+    Callers pass per-request timeouts.
+    """
+    key = _loop_key()
+    client = _http_clients.get(key)
+    if client is None or client.is_closed:
+        client = _http_clients[key] = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=float(os.getenv("HTTP_DEFAULT_TIMEOUT", 10)),
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", 20)),
+                max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", 10)),
+                keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 60)),
+            ),
+        )
+    return client
+
+
+def get_rpc_client() -> AsyncClient:
+    key = _loop_key()
+    client = _rpc_clients.get(key)
+    if client is None:
+        client = _rpc_clients[key] = AsyncClient(
+            os.getenv("SOLANA_RPC_URL"),
+            timeout=float(os.getenv("SOLANA_RPC_TIMEOUT", 10)),
+        )
+    return client
+
+
+async def close_async_clients():
+    key = _loop_key()
+    http = _http_clients.pop(key, None)
+    if http is not None:
+        await http.aclose()
+    rpc = _rpc_clients.pop(key, None)
+    if rpc is not None:
+        await rpc.close()
@@ -1,12 +1,14 @@
 # backfill_price_data.py
-from pycoingecko import CoinGeckoAPI
-import sqlite3
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from cg_symbol_map import COINGECKO_IDS
-from db import get_connection
+from price_ingest import bulk_upsert_price_history
+from db import initialize_tables
+from market_data_client import market_data, BACKFILL
+from price_store import price_store
 
 
-cg = CoinGeckoAPI()
 DB_PATH = "trading.db"
 
 
@@ -17,51 +19,48 @@ symbol_to_id = COINGECKO_IDS
 # }
 
 
+def market_chart_rows(symbol: str, data: dict):
+    for price_point, vol_point in zip(data["prices"], data["total_volumes"]):
+        timestamp = datetime.utcfromtimestamp(price_point[0] / 1000).isoformat()
+        yield timestamp, symbol.upper(), price_point[1], vol_point[1]
+
+
 def backfill_prices(symbol: str, days: int = 3):
     token_id = symbol_to_id.get(symbol.upper())
     if not token_id:
         print(f"[Backfill] Unknown token ID for {symbol}")
-        return
-
+        return 0
 
     try:
-        data = cg.get_coin_market_chart_by_id(id=token_id, vs_currency="usd", days=days)
-        prices = data["prices"]
-        volumes = data["total_volumes"]
-
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        # Start a transaction for efficiency
-        conn.run("BEGIN")
-        for price_point, vol_point in zip(prices, volumes):
-            timestamp = datetime.utcfromtimestamp(price_point[0] / 1000).isoformat()
-            price = price_point[1]
-            vol = vol_point[1]
-
-            # with sqlite3.connect(DB_PATH) as conn:
-            # conn = get_connection()
-            # cursor = conn.cursor()
-            cursor.execute(
-                        """
-                        INSERT INTO price_history (timestamp, symbol, price, volume)
-                        VALUES (%s, %s, %s, %s)
-                        """,
-                        (timestamp, symbol.upper(), price, vol)
-            )
-
-        conn.commit()
-        print(f"[Backfill] Inserted {len(prices)} rows for {symbol}")
+        # Backfill lane: queued live quotes are served first
+        data = market_data.get_coin_market_chart_by_id(id=token_id, vs_currency="usd", days=days, priority=BACKFILL)
+        written = bulk_upsert_price_history(market_chart_rows(symbol, data))
+        print(f"[Backfill] Loaded {len(data['prices'])} points for {symbol} ({written} upserted)")
+        if price_store.rows(symbol.upper()):
+            # The new points sit behind the local copy's last timestamp
+            price_store.sync(symbol, verify=True)
+        return written
     except Exception as e:
         print(f"[Backfill] Error for {symbol}: {e}")
+        return 0
 
 
-
-if __name__ == "__main__":
-    for sym in symbol_to_id:
-        backfill_prices(sym, days=3)
-
-
-
+def backfill_many(symbols, days: int = 3, workers: int = None):
+    """
+    Backfills several symbols concurrently. Workers overlap HTTP and COPY
+    time, while the shared market data client keeps the combined CoinGecko
+    call rate under the configured limit.
+    """
+    workers = workers or int(os.getenv("BACKFILL_WORKERS", 4))
+    total = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(backfill_prices, sym, days): sym for sym in symbols}
+        for future in as_completed(futures):
+            total += future.result()
+    print(f"[Backfill] Done: {total} rows upserted across {len(symbols)} symbols")
+    return total
 
 
+if __name__ == "__main__":
+    initialize_tables()
+    backfill_many(list(symbol_to_id), days=int(os.getenv("BACKFILL_DAYS", 3)))
@@ -1,18 +1,17 @@
-from db_logger import log_price_history
-from pycoingecko import CoinGeckoAPI
-from datetime import datetime
-import time
+from backfill_price_history import market_chart_rows
+from price_ingest import bulk_upsert_price_history
+from db import initialize_tables
+from market_data_client import market_data, BACKFILL
+from price_store import price_store
 
 
-cg = CoinGeckoAPI()
-
 def backfill_prices(symbol="SOL", cg_id="solana", vs_currency="usd", days=3):
-    data = cg.get_coin_market_chart_by_id(id=cg_id, vs_currency=vs_currency, days=days)
-    for price_point, vol_point in zip(data["prices"], data["total_volumes"]):
-        ts = datetime.utcfromtimestamp(price_point[0] / 1000).isoformat()
-        price = price_point[1]
-        vol = vol_point[1]
-        log_price_history(timestamp=ts, symbol=symbol, price=price, volume=vol)
-    print(f" Backfilled {symbol} with {len(data['prices'])} entries")
+    data = market_data.get_coin_market_chart_by_id(id=cg_id, vs_currency=vs_currency, days=days, priority=BACKFILL)
+    written = bulk_upsert_price_history(market_chart_rows(symbol, data))
+    print(f" Backfilled {symbol} with {len(data['prices'])} entries ({written} upserted)")
+    if price_store.rows(symbol):
+        price_store.sync(symbol, verify=True)
 
-backfill_prices()
\ No newline at end of file
+if __name__ == "__main__":
+    initialize_tables()
+    backfill_prices()
@@ -5,55 +5,66 @@ from agents.rule_based_agent import RuleBasedAgent
 from agents.threshold_agent import ThresholdAgent
 from agents.agent_orchestrator import AgentOrchestrator
 from datetime import datetime
+import argparse
 import sqlite3
+import numpy as np
 from db import get_connection
+from price_store import price_store
+from indicator_batch import INDICATOR_KEYS, indicator_series
+from vector_backtest import ACTION_NAMES, run_vectorized
 
 class Backtester:
-    def __init__(self, db_path, symbol="SOL"):
+    def __init__(self, db_path, symbol="SOL", df=None):
         self.symbol = symbol
         self.indicator_calc = IndicatorCalculator()
+        # Offline: simulated votes are not written to agent_votes
         self.agent_ensemble = AgentOrchestrator([
             RuleBasedAgent(),
             ThresholdAgent()
-        ])
+        ], offline=True)
         self.trade_log = []
+        self.result = None
         self.db_path = db_path
-        self.df = self._load_price_data()
+        # df: optional (timestamp, close) frame instead of loading price_history
+        self.df = df if df is not None else self._load_price_data()
 
     def _load_price_data(self):
+        # Local columnar copy, topped up from price_history; fall back to
+        # reading the table directly if the store can't be used
+        try:
+            price_store.sync(self.symbol)
+            return price_store.frame(self.symbol)
+        except Exception as e:
+            print(f"[Backtester] Price store unavailable, querying price_history: {e}")
+            return self._query_price_data()
+
+    def _query_price_data(self):
         # conn = sqlite3.connect(self.db_path)
-        conn = get_connection()
         query = f"""
             SELECT timestamp, price AS close
             FROM price_history
-            WHERE symbol = ?
+            WHERE symbol = %s
             ORDER BY timestamp ASC
         """
 
-        df = pd.read_sql_query(query, conn, params=(self.symbol.upper(),))
-        conn.close()
-        return df
+        with get_connection() as conn:
+            return pd.read_sql_query(query, conn, params=(self.symbol.upper(),))
 
     def compute_all_indicators(self):
-        prices = self.df["close"].tolist()
-        indicators = self.indicator_calc.compute_indicators(prices)
-        self.df = self.df.tail(len(prices))
-        for key in indicators:
-            self.df[key] = indicators[key]
+        # The indicators as they stood at every bar, not just the last one
+        columns = indicator_series(self.df["close"].to_numpy(dtype=np.float64))
+        for key in INDICATOR_KEYS:
+            self.df[key] = columns[key]
+        self.df["ready"] = columns["ready"]
 
 
     async def simulate_trades(self):
         for i in range(50, len(self.df)):
             row = self.df.iloc[i]
-            indicators = {
-                "price": row["close"],
-                "rsi": row.get("rsi", 0),
-                "macd": row.get("MACD_12_26_9", 0),
-                "macd_hist": row.get("MACDh_12_26_9", 0),
-                "sma_20": row.get("sma_20", 0),
-                "sma_50": row.get("sma_50", 0),
-                "symbol": "SOL"
-            }
+            if not row["ready"]:
+                continue
+            indicators = {key: float(row[key]) for key in INDICATOR_KEYS}
+            indicators["symbol"] = self.symbol
 
             decision = await self.agent_ensemble.resolve_decision(indicators)
 
@@ -62,25 +73,62 @@ class Backtester:
                 "timestamp": row["timestamp"],
                 "price": row["close"],
                 "action": decision["action"],
+                "amount": decision["amount"],
                 "confidence": decision["confidence"]
             })
 
+    def simulate_vectorized(self, min_confidence=None, fee_bps=0.0):
+        """
+        Same decisions as simulate_trades() computed over whole columns,
+        plus fills, position and equity per bar. Nothing touches the DB.
+        """
+        self.result = run_vectorized(
+            self.df["close"].to_numpy(dtype=np.float64),
+            self.agent_ensemble.agents,
+            min_confidence=min_confidence,
+            fee_bps=fee_bps,
+            timestamps=self.df["timestamp"].to_numpy(),
+        )
+        return self.result
+
     def summary(self):
-        if not self.trade_log:
+        if self.result is not None:
+            r = self.result
+            active = r["active"]
+            df = pd.DataFrame({
+                "timestamp": r["timestamp"][active],
+                "price": self.df["close"].to_numpy()[active],
+                "action": [ACTION_NAMES[a] for a in r["action"][active]],
+                "amount": r["amount"][active],
+                "confidence": r["confidence"][active],
+                "fill": r["fills"][active],
+                "position": r["position"][active],
+                "equity": r["equity"][active],
+            })
+            print(f"[Backtester] {r['stats']}")
+        elif self.trade_log:
+            df = pd.DataFrame(self.trade_log)
+        else:
             # print("No trades were made.")
             return
 
-        df = pd.DataFrame(self.trade_log)
         print("\n📊 Trades Summary:")
         print(df)
         df.to_csv("logs/backtest_trades.csv", index=False)
 
 
-async def run_backtest():
-    tester = Backtester("trading.db", symbol="SOL")
-    tester.compute_all_indicators()
-    await tester.simulate_trades()
+async def run_backtest(symbol="SOL", vectorized=False):
+    tester = Backtester("trading.db", symbol=symbol)
+    if vectorized:
+        tester.simulate_vectorized()
+    else:
+        tester.compute_all_indicators()
+        await tester.simulate_trades()
     tester.summary()
 
 if __name__ == "__main__":
-    asyncio.run(run_backtest())
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbol", default="SOL")
+    parser.add_argument("--vectorized", action="store_true", help="array backtest with fills and equity")
+    args = parser.parse_args()
+    asyncio.run(run_backtest(args.symbol, args.vectorized))
\ No newline at end of file
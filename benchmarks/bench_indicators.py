@@ -0,0 +1,87 @@
+# benchmarks/bench_indicators.py
+#
+# Per-tick latency of the streaming indicator engine against recomputing
+# the last 50 prices with pandas_ta, which is what each cycle used to do,
+# plus one batch pass over many symbols against a per-symbol loop.
+#
+#   python -m benchmarks.bench_indicators --ticks 100000 --symbols 200
+import argparse
+import statistics
+import time
+import numpy as np
+from indicator_engine import IndicatorState
+from indicator_batch import build_price_matrix, batch_indicators
+
+
+def percentiles(samples_us):
+    samples_us = sorted(samples_us)
+    return {
+        "p50_us": round(statistics.median(samples_us), 2),
+        "p99_us": round(samples_us[int(len(samples_us) * 0.99) - 1], 2),
+        "mean_us": round(statistics.fmean(samples_us), 2),
+    }
+
+
+def bench_streaming(prices):
+    state = IndicatorState()
+    samples = []
+    for price in prices:
+        started = time.perf_counter_ns()
+        state.update(price)
+        state.snapshot()
+        samples.append((time.perf_counter_ns() - started) / 1000)
+    return percentiles(samples[50:])
+
+
+def bench_pandas_ta(prices, ticks):
+    from external_indicator_calculator import IndicatorCalculator
+    calc = IndicatorCalculator(engine=None)
+    samples = []
+    for i in range(50, min(len(prices), 50 + ticks)):
+        window = prices[i - 50:i]
+        started = time.perf_counter_ns()
+        calc.compute_indicators(window)
+        samples.append((time.perf_counter_ns() - started) / 1000)
+    return percentiles(samples)
+
+
+def bench_batch(rng, n_symbols, length=100):
+    histories = {
+        f"S{i}": (100 * np.exp(np.cumsum(rng.normal(0, 0.01, length)))).tolist()
+        for i in range(n_symbols)
+    }
+    started = time.perf_counter()
+    _, matrix, _ = build_price_matrix(histories)
+    batch_indicators(matrix)
+    batch_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    for prices in histories.values():
+        state = IndicatorState()
+        for price in prices:
+            state.update(price)
+        state.snapshot()
+    loop_ms = (time.perf_counter() - started) * 1000
+    return {"symbols": n_symbols, "batch_ms": round(batch_ms, 2), "per_symbol_loop_ms": round(loop_ms, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks", type=int, default=100_000)
+    parser.add_argument("--pandas-ticks", type=int, default=500)
+    parser.add_argument("--symbols", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    prices = (100 * np.exp(np.cumsum(rng.normal(0, 0.01, args.ticks)))).tolist()
+
+    print(f"[Bench] streaming update+snapshot: {bench_streaming(prices)}")
+    print(f"[Bench] batch warm-up: {bench_batch(rng, args.symbols)}")
+    try:
+        print(f"[Bench] pandas_ta last-50 recompute: {bench_pandas_ta(prices, args.pandas_ticks)}")
+    except ImportError:
+        print("[Bench] pandas_ta not installed; skipping the recompute baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_price_history.py
+#
+# Compares the per-cycle "last 50 prices for a symbol" query on the old
+# heap layout against the migrated partitioned (symbol, timestamp) layout.
+# Everything is created in a scratch schema and dropped afterwards.
+#
+#   python -m benchmarks.bench_price_history --rows 10000000 --symbols 100
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from db import get_connection
+from migrations import _month_start, _next_month
+
+SCHEMA = "bench_price_history"
+HOT_QUERY = """
+    SELECT price FROM {table}
+    WHERE symbol = %s
+    ORDER BY timestamp DESC
+    LIMIT 50
+"""
+
+
+def load(cursor, rows, symbols, step_seconds):
+    per_symbol = rows // symbols
+    start = datetime.now(timezone.utc) - timedelta(seconds=per_symbol * step_seconds)
+
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(f"""
+        CREATE TABLE {SCHEMA}.heap (
+            timestamp TIMESTAMPTZ, symbol TEXT, price FLOAT, volume FLOAT
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TABLE {SCHEMA}.partitioned (
+            timestamp TIMESTAMPTZ NOT NULL,
+            symbol TEXT NOT NULL,
+            price FLOAT,
+            volume FLOAT,
+            PRIMARY KEY (symbol, timestamp) INCLUDE (price, volume)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    month = _month_start(start)
+    while month <= datetime.now(timezone.utc):
+        end = _next_month(month)
+        cursor.execute(f"""
+            CREATE TABLE {SCHEMA}.partitioned_{month:%Y_%m}
+            PARTITION OF {SCHEMA}.partitioned
+            FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')
+        """)
+        month = end
+
+    # Interleave symbols in time order, like PriceMultiLogger writes them
+    cursor.execute(f"""
+        INSERT INTO {SCHEMA}.heap
+        SELECT %s::timestamptz + (i * %s) * interval '1 second',
+               'SYM' || s,
+               100 + random(),
+               random() * 1e6
+        FROM generate_series(0, %s - 1) AS i, generate_series(1, %s) AS s
+        ORDER BY i, s
+    """, (start.isoformat(), step_seconds, per_symbol, symbols))
+    cursor.execute(f"INSERT INTO {SCHEMA}.partitioned SELECT * FROM {SCHEMA}.heap")
+    cursor.execute(f"VACUUM ANALYZE {SCHEMA}.heap")
+    cursor.execute(f"VACUUM ANALYZE {SCHEMA}.partitioned")
+    return per_symbol * symbols
+
+
+def time_queries(cursor, table, symbols, iterations):
+    samples = []
+    for _ in range(iterations):
+        symbol = f"SYM{random.randint(1, symbols)}"
+        started = time.perf_counter()
+        cursor.execute(HOT_QUERY.format(table=f"{SCHEMA}.{table}"), (symbol,))
+        cursor.fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--step-seconds", type=int, default=300)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--heap-iterations", type=int, default=10,
+                        help="the heap query is a full scan, so fewer samples are enough")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema")
+    args = parser.parse_args()
+
+    conn = get_connection()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        started = time.perf_counter()
+        loaded = load(cursor, args.rows, args.symbols, args.step_seconds)
+        print(f"[Bench] Loaded {loaded:,} rows in {time.perf_counter() - started:.1f}s")
+
+        heap = time_queries(cursor, "heap", args.symbols, args.heap_iterations)
+        partitioned = time_queries(cursor, "partitioned", args.symbols, args.iterations)
+        print(f"[Bench] heap (no index):            {heap}")
+        print(f"[Bench] partitioned + covering key: {partitioned}")
+        print(f"[Bench] p50 speedup: {heap['p50_ms'] / max(partitioned['p50_ms'], 1e-6):.0f}x")
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.autocommit = False
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# benchmarks/bench_swap.py
+#
+# Drives simulated BUYs through the real JupiterSwapper (quote service,
+# ATA check, swap request, signing, send) against the local mock in
+# benchmarks/mock_solana.py and reports latency percentiles and
+# throughput. With --confirm each signature is also tracked to
+# "confirmed" through ConfirmationTracker.
+#
+#   python -m benchmarks.bench_swap --swaps 5000 --concurrency 64 --latency-ms 30
+#   python -m benchmarks.bench_swap --swaps 2000 --error-rate 0.02 --timeout-rate 0.01 --client-timeout 2
+import argparse
+import asyncio
+import math
+import os
+import statistics
+import tempfile
+import time
+from solana.rpc.async_api import AsyncClient
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from account_cache import AccountCache
+from async_clients import close_async_clients
+from blockhash_service import BlockhashService
+from confirmation_tracker import ConfirmationTracker
+from jupiter_swapper import JupiterSwapper
+from quote_service import QuoteService
+from tx_builder import AtaTransactionBuilder
+from benchmarks.mock_solana import add_server_arguments, server_from_args
+
+
+def percentiles(samples_ms):
+    if not samples_ms:
+        return {}
+    samples_ms = sorted(samples_ms)
+
+    def pick(q):
+        # Nearest rank: the smallest sample with at least q of them at or below it
+        return round(samples_ms[max(math.ceil(len(samples_ms) * q) - 1, 0)], 2)
+
+    return {
+        "p50_ms": round(statistics.median(samples_ms), 2),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(samples_ms[-1], 2),
+    }
+
+
+def make_swapper(base_url, rpc, quote_ttl=0.0, client_timeout=5.0, cache_dir=None):
+    """
+    A JupiterSwapper whose endpoints, RPC client, caches and services all
+    point at `base_url`, leaving the process-wide singletons alone.
+    """
+    swapper = JupiterSwapper(bytes(Keypair()))
+    swapper.client = rpc
+    swapper.swap_url = f"{base_url}/swap/v1/swap"
+    swapper.swap_timeout = client_timeout
+    swapper.quotes = QuoteService(quote_url=f"{base_url}/swap/v1/quote", timeout=client_timeout, ttl=quote_ttl)
+    swapper.account_cache = AccountCache(path=os.path.join(cache_dir or tempfile.mkdtemp(), "accounts.json"))
+    swapper.blockhash_service = BlockhashService(client=rpc)
+    swapper.confirmations = ConfirmationTracker(client=rpc, poll_interval=0.1)
+    swapper.tx_builder = AtaTransactionBuilder(swapper.wallet, swapper.blockhash_service, swapper.account_cache)
+    return swapper
+
+
+async def run_swaps(base_url, swaps, concurrency=32, mints=50, amount=0.01, quote_ttl=0.0,
+                    client_timeout=5.0, confirm=False, cache_dir=None):
+    rpc = AsyncClient(base_url, timeout=client_timeout)
+    swapper = make_swapper(base_url, rpc, quote_ttl, client_timeout, cache_dir)
+    tokens = [{"symbol": f"MOCK{i}", "address": str(Pubkey.new_unique())} for i in range(mints)]
+    limit = asyncio.Semaphore(concurrency)
+    swap_ms, confirm_ms, confirmations = [], [], []
+    failed = 0
+
+    async def one(i):
+        nonlocal failed
+        async with limit:
+            started = time.perf_counter()
+            sig = await swapper.execute_swap(tokens[i % len(tokens)], {"action": "BUY", "amount": amount})
+            elapsed = (time.perf_counter() - started) * 1000
+        if not sig:
+            failed += 1
+            return
+        swap_ms.append(elapsed)
+        if confirm:
+            status = await swapper.confirmations.track(sig)
+            if status == "confirmed":
+                confirm_ms.append((time.perf_counter() - started) * 1000)
+            confirmations.append(status)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(swaps)))
+    wall = time.perf_counter() - started
+
+    await swapper.confirmations.stop()
+    await rpc.close()
+    await close_async_clients()
+
+    result = {
+        "swaps": swaps,
+        "ok": len(swap_ms),
+        "failed": failed,
+        "wall_s": round(wall, 2),
+        "swaps_per_s": round(len(swap_ms) / wall, 1) if wall else 0.0,
+        "swap": percentiles(swap_ms),
+        "quote_cache": dict(swapper.quotes.stats),
+    }
+    if confirm:
+        result["confirmed"] = confirmations.count("confirmed")
+        result["submit_to_confirmed"] = percentiles(confirm_ms)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--swaps", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mints", type=int, default=50, help="distinct tokens; first swap of each is cold")
+    parser.add_argument("--amount", type=float, default=0.01, help="SOL per swap")
+    parser.add_argument("--quote-ttl", type=float, default=0.0, help="0 sends every quote to the mock")
+    parser.add_argument("--client-timeout", type=float, default=5.0)
+    parser.add_argument("--confirm", action="store_true", help="also track each signature to confirmed")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args)
+    base_url = server.start()
+    try:
+        result = asyncio.run(run_swaps(
+            base_url, args.swaps,
+            concurrency=args.concurrency,
+            mints=args.mints,
+            amount=args.amount,
+            quote_ttl=args.quote_ttl,
+            client_timeout=args.client_timeout,
+            confirm=args.confirm,
+        ))
+    finally:
+        server.stop()
+
+    print(f"[Bench] swaps: {result}")
+    print(f"[Bench] mock requests: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
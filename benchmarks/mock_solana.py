@@ -0,0 +1,264 @@
+# benchmarks/mock_solana.py
+#
+# Local stand-in for the Jupiter swap API and a Solana JSON-RPC node, so
+# the swap path can be exercised without mainnet or a funded key.
+#
+#   GET  /swap/v1/quote      Jupiter quote
+#   POST /swap/v1/swap       Jupiter swap (unsigned v0 transaction for the user)
+#   POST /                   JSON-RPC: getAccountInfo, getMultipleAccounts,
+#                            getLatestBlockhash, sendTransaction,
+#                            getSignatureStatuses
+#
+# Every endpoint sleeps for a configurable latency (plus jitter), and can be
+# told to fail (HTTP 500 / JSON-RPC error) or hang past the client's timeout
+# for a fraction of requests. Sent transactions report "processed" until
+# `confirm_ms` after they were received, then "confirmed".
+#
+#   python -m benchmarks.mock_solana --port 8899 --latency-ms 40 --latency quote=120
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from solders.hash import Hash
+from solders.message import MessageV0
+from solders.null_signer import NullSigner
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+from spl.token.constants import TOKEN_PROGRAM_ID
+
+RPC_METHODS = ("getAccountInfo", "getMultipleAccounts", "getLatestBlockhash", "sendTransaction", "getSignatureStatuses")
+ENDPOINTS = ("quote", "swap") + RPC_METHODS
+
+
+class MockSolanaServer:
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=20.0, jitter_ms=5.0, latency=None,
+                 error_rate=0.0, timeout_rate=0.0, hang_seconds=30.0, confirm_ms=400.0,
+                 price_impact=0.001, seed=None):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.latency = dict(latency or {})  # per-endpoint overrides, in ms
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.confirm_ms = confirm_ms
+        self.price_impact = price_impact
+
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._sent = {}
+        self._sent_lock = threading.Lock()
+        self.blockhash = Hash.new_unique()
+        self.slot = 1
+        self.stats = {name: 0 for name in ENDPOINTS}
+        self.stats.update(errors=0, timeouts=0)
+
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        print(f"[MockSolana] Listening on {self.url}")
+        return self.url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _roll(self):
+        with self._rng_lock:
+            return self._rng.random(), self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+
+    def inject(self, endpoint):
+        """
+        Sleeps for the endpoint's latency and returns "error", "timeout" or
+        None. A timeout sleeps `hang_seconds` before answering normally.
+        """
+        self.stats[endpoint] += 1
+        roll, jitter = self._roll()
+        delay_ms = max(self.latency.get(endpoint, self.latency_ms) + jitter, 0.0)
+        time.sleep(delay_ms / 1000)
+        if roll < self.timeout_rate:
+            self.stats["timeouts"] += 1
+            time.sleep(self.hang_seconds)
+            return "timeout"
+        if roll < self.timeout_rate + self.error_rate:
+            self.stats["errors"] += 1
+            return "error"
+        return None
+
+    # --- Jupiter ---------------------------------------------------------
+
+    def quote(self, params):
+        amount = int(params["amount"])
+        return {
+            "inputMint": params["inputMint"],
+            "inAmount": str(amount),
+            "outputMint": params["outputMint"],
+            "outAmount": str(amount * 150),
+            "otherAmountThreshold": str(amount * 149),
+            "swapMode": params.get("swapMode", "ExactIn"),
+            "slippageBps": int(params.get("slippageBps", 50)),
+            "platformFee": None,
+            "priceImpactPct": str(self.price_impact),
+            "routePlan": [{"swapInfo": {"label": "Mock", "inAmount": str(amount), "outAmount": str(amount * 150)},
+                           "percent": 100}],
+        }
+
+    def swap(self, body):
+        user = Pubkey.from_string(body["userPublicKey"])
+        message = MessageV0.try_compile(user, [], [], self.blockhash)
+        tx = VersionedTransaction(message, [NullSigner(user)])
+        return {"swapTransaction": base64.b64encode(bytes(tx)).decode(), "lastValidBlockHeight": self.slot + 150}
+
+    # --- JSON-RPC --------------------------------------------------------
+
+    def _context(self):
+        return {"slot": self.slot}
+
+    def _account(self):
+        return {"data": ["", "base64"], "executable": False, "lamports": 2039280,
+                "owner": str(TOKEN_PROGRAM_ID), "rentEpoch": 0, "space": 165}
+
+    def rpc(self, method, params):
+        if method == "getAccountInfo":
+            return {"context": self._context(), "value": self._account()}
+        if method == "getMultipleAccounts":
+            return {"context": self._context(), "value": [self._account() for _ in params[0]]}
+        if method == "getLatestBlockhash":
+            self.slot += 1
+            return {"context": self._context(),
+                    "value": {"blockhash": str(self.blockhash), "lastValidBlockHeight": self.slot + 150}}
+        if method == "sendTransaction":
+            tx = VersionedTransaction.from_bytes(base64.b64decode(params[0]))
+            signature = str(tx.signatures[0])
+            with self._sent_lock:
+                self._sent[signature] = time.monotonic()
+            return signature
+        if method == "getSignatureStatuses":
+            now = time.monotonic()
+            statuses = []
+            with self._sent_lock:
+                for signature in params[0]:
+                    sent_at = self._sent.get(signature)
+                    if sent_at is None:
+                        statuses.append(None)
+                        continue
+                    level = "confirmed" if (now - sent_at) * 1000 >= self.confirm_ms else "processed"
+                    statuses.append({"slot": self.slot, "confirmations": 1, "err": None,
+                                     "status": {"Ok": None}, "confirmationStatus": level})
+            return {"context": self._context(), "value": statuses}
+        raise KeyError(method)
+
+
+def _make_handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoints
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if not url.path.endswith("/quote"):
+                return self._reply(404, {"error": "not found"})
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            if mock.inject("quote") == "error":
+                return self._reply(500, {"error": "injected quote failure"})
+            self._reply(200, mock.quote(params))
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if urlparse(self.path).path.endswith("/swap"):
+                if mock.inject("swap") == "error":
+                    return self._reply(500, {"error": "injected swap failure"})
+                return self._reply(200, mock.swap(body))
+
+            method, request_id = body.get("method"), body.get("id")
+            if method not in RPC_METHODS:
+                return self._reply(200, {"jsonrpc": "2.0", "id": request_id,
+                                         "error": {"code": -32601, "message": "Method not found"}})
+            if mock.inject(method) == "error":
+                return self._reply(200, {"jsonrpc": "2.0", "id": request_id,
+                                         "error": {"code": -32603, "message": "Internal error (injected)"}})
+            self._reply(200, {"jsonrpc": "2.0", "id": request_id, "result": mock.rpc(method, body.get("params", []))})
+
+    return Handler
+
+
+def parse_latency(values):
+    overrides = {}
+    for value in values or []:
+        endpoint, _, ms = value.partition("=")
+        if endpoint not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint {endpoint!r}; expected one of {', '.join(ENDPOINTS)}")
+        overrides[endpoint] = float(ms)
+    return overrides
+
+
+def add_server_arguments(parser):
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--latency", action="append", metavar="ENDPOINT=MS",
+                        help=f"per-endpoint latency; endpoints: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    parser.add_argument("--confirm-ms", type=float, default=400.0)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def server_from_args(args, port=0):
+    return MockSolanaServer(
+        port=port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        latency=parse_latency(args.latency),
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        confirm_ms=args.confirm_ms,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8899)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args, port=args.port)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# blockhash_service.py
+import asyncio
+import os
+import time
+from async_clients import get_rpc_client
+
+
+class BlockhashService:
+    """
+    Keeps a recent blockhash on hand so transactions can be built without
+    a get_latest_blockhash round trip. A background task refreshes it every
+    `refresh_interval` seconds; get() only goes to the RPC itself when the
+    cached one is older than `max_age` (blockhashes stay valid for ~150
+    slots, roughly 60-90s).
+    """
+
+    def __init__(self, client=None, refresh_interval=None, max_age=None, commitment="confirmed"):
+        self._client = client
+        self.refresh_interval = refresh_interval or float(os.getenv("BLOCKHASH_REFRESH_SECONDS", 15))
+        self.max_age = max_age or float(os.getenv("BLOCKHASH_MAX_AGE", 45))
+        self.commitment = commitment
+
+        self.blockhash = None
+        self.last_valid_block_height = None
+        self.fetched_at = 0.0
+
+        self._lock = None
+        self._task = None
+        self.stats = {"refreshes": 0, "errors": 0, "hits": 0, "misses": 0}
+
+    @property
+    def client(self):
+        return self._client or get_rpc_client()
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at if self.blockhash else float("inf")
+
+    def is_fresh(self, fetched_at=None) -> bool:
+        fetched_at = self.fetched_at if fetched_at is None else fetched_at
+        return time.monotonic() - fetched_at < self.max_age
+
+    async def refresh(self):
+        resp = await self.client.get_latest_blockhash(self.commitment)
+        self.blockhash = resp.value.blockhash
+        self.last_valid_block_height = resp.value.last_valid_block_height
+        self.fetched_at = time.monotonic()
+        self.stats["refreshes"] += 1
+        return self.blockhash
+
+    async def get(self):
+        """
+        Returns (blockhash, fetched_at); fetched_at is time.monotonic() and
+        can be passed back to is_fresh() to check a built transaction.
+        """
+        if self.blockhash is not None and self.is_fresh():
+            self.stats["hits"] += 1
+            return self.blockhash, self.fetched_at
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another caller may have refreshed while we waited
+            if self.blockhash is None or not self.is_fresh():
+                self.stats["misses"] += 1
+                await self.refresh()
+        return self.blockhash, self.fetched_at
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[BlockhashService] Refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Shared by JupiterSwapper and the ATA transaction builder
+blockhash_service = BlockhashService()
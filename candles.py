@@ -0,0 +1,359 @@
+# candles.py
+#
+# Fixed-interval OHLCV candles over the irregular price_history ticks.
+# CandleStore builds them incrementally from every logged price (as a
+# price_buffers listener), keeps the newest ones per symbol in memory and
+# queues closed candles for price_candles. bulk_candles() does the same
+# aggregation over whole arrays for backfills and warm-up.
+#
+# Gaps of up to `max_gap` empty buckets are filled with flat candles
+# (open = high = low = close = previous close, ticks = 0) so a 50-candle
+# SMA always spans 50 intervals; longer gaps are left as gaps.
+#
+# volume is the last volume seen in the bucket: price_history carries
+# CoinGecko's rolling 24h volume, not per-tick volume.
+#
+#   python candles.py --symbol SOL --interval 1m 5m 1h
+import argparse
+import os
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from db import get_connection
+from db_writer import get_writer, flush_writes
+from price_buffer import to_epoch
+
+INTERVALS = {"1m": 60, "5m": 300, "1h": 3600}
+FIELDS = ("bucket", "open", "high", "low", "close", "volume", "ticks")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _bucket_time(seconds):
+    return _EPOCH + timedelta(seconds=int(seconds))
+
+
+def bulk_candles(timestamps, prices, volumes, interval, max_gap=60):
+    """
+    Candles for one symbol from time-ordered ticks. timestamps are epoch
+    seconds (float or int); interval is in seconds. Returns {field: array}
+    for FIELDS, bucket in epoch seconds.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    volumes = np.zeros(len(prices)) if volumes is None else np.nan_to_num(np.asarray(volumes, dtype=np.float64))
+    valid = ~np.isnan(prices)
+    timestamps, prices, volumes = timestamps[valid], prices[valid], volumes[valid]
+    if not len(prices):
+        return {field: np.empty(0, dtype=np.int64 if field in ("bucket", "ticks") else np.float64) for field in FIELDS}
+
+    buckets = (timestamps // interval).astype(np.int64) * interval
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - interval))
+    ends = np.append(starts[1:], len(prices))
+    real = {
+        "bucket": buckets[starts],
+        "open": prices[starts],
+        "high": np.maximum.reduceat(prices, starts),
+        "low": np.minimum.reduceat(prices, starts),
+        "close": prices[ends - 1],
+        "volume": volumes[ends - 1],
+        "ticks": ends - starts,
+    }
+
+    # Each real candle is followed by the flat candles filling the gap to
+    # the next one, if that gap is short enough
+    steps = np.diff(real["bucket"], append=real["bucket"][-1] + interval) // interval
+    repeat = np.where(steps - 1 <= max_gap, steps, 1)
+    source = np.repeat(np.arange(len(starts)), repeat)
+    offset = np.arange(len(source)) - np.repeat(np.cumsum(repeat) - repeat, repeat)
+    filled = offset > 0
+
+    close = real["close"][source]
+    return {
+        "bucket": real["bucket"][source] + offset * interval,
+        "open": np.where(filled, close, real["open"][source]),
+        "high": np.where(filled, close, real["high"][source]),
+        "low": np.where(filled, close, real["low"][source]),
+        "close": close,
+        "volume": real["volume"][source],
+        "ticks": np.where(filled, 0, real["ticks"][source]),
+    }
+
+
+def candle_rows(symbol, resolution, candles):
+    """
+    bulk_candles() output as price_candles rows.
+    """
+    return [
+        (symbol, resolution, _bucket_time(bucket), float(o), float(h), float(l), float(c), float(v), int(n))
+        for bucket, o, h, l, c, v, n in zip(*(candles[field] for field in FIELDS))
+    ]
+
+
+def upsert_candles(rows, chunk_rows=2000):
+    """
+    Writes price_candles rows, replacing any stored candle with the same
+    key. Used by backfills, which recompute whole candles.
+    """
+    if not rows:
+        return 0
+    placeholder = "(" + ", ".join(["%s"] * 9) + ")"
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        for start in range(0, len(rows), chunk_rows):
+            chunk = rows[start:start + chunk_rows]
+            cursor.execute(
+                "INSERT INTO price_candles (symbol, resolution, bucket, open, high, low, close, volume, ticks) VALUES "
+                + ", ".join([placeholder] * len(chunk))
+                + """
+                ON CONFLICT (symbol, resolution, bucket) DO UPDATE SET
+                    open = EXCLUDED.open, high = EXCLUDED.high, low = EXCLUDED.low,
+                    close = EXCLUDED.close, volume = EXCLUDED.volume, ticks = EXCLUDED.ticks
+                """,
+                [value for row in chunk for value in row]
+            )
+        conn.commit()
+    return len(rows)
+
+
+class CandleStore:
+    """
+    Per (symbol, resolution): the candle being built and a bounded deque of
+    the newest closed ones. A candle closes when a tick for a later bucket
+    arrives or close_due() runs past its end; ticks for an already closed
+    bucket are counted as late and dropped.
+    """
+
+    def __init__(self, resolutions=None, capacity=None, max_gap=None, persist=True):
+        resolutions = resolutions or os.getenv("CANDLE_INTERVALS", "1m,5m,1h").split(",")
+        self.resolutions = {r.strip(): INTERVALS[r.strip()] for r in resolutions if r.strip()}
+        self.capacity = capacity or int(os.getenv("CANDLE_CAPACITY", 500))
+        self.max_gap = max_gap if max_gap is not None else int(os.getenv("CANDLE_MAX_GAP", 60))
+        self.persist = persist
+        self._open = {}  # (symbol, resolution) -> [bucket, open, high, low, close, volume, ticks]
+        self._last_bucket = {}  # (symbol, resolution) -> bucket of the newest closed candle
+        self._closed = {}
+        self._warm = set()  # (symbol, resolution) loaded from the DB
+        self._listeners = []
+        self._lock = threading.Lock()
+        self.late_ticks = 0
+
+    def add_listener(self, callback):
+        """
+        callback(symbol, resolution, candle) runs for every closed candle,
+        gap fills included, oldest first.
+        """
+        self._listeners.append(callback)
+
+    def attach(self, buffers):
+        """
+        Subscribes to a PriceBufferStore so every logged price feeds the candles.
+        """
+        buffers.add_listener(lambda symbol, timestamp, price, volume: self.on_tick(symbol, timestamp, price, volume))
+
+    def _history(self, key):
+        history = self._closed.get(key)
+        if history is None:
+            history = self._closed[key] = deque(maxlen=self.capacity)
+        return history
+
+    def on_tick(self, symbol, timestamp, price, volume=0.0):
+        if price is None:
+            return []
+        symbol = symbol.upper()
+        seconds = to_epoch(timestamp)
+        price = float(price)
+        volume = float(volume or 0.0)
+        closed = []
+        with self._lock:
+            for resolution, interval in self.resolutions.items():
+                key = (symbol, resolution)
+                bucket = int(seconds // interval) * interval
+                current = self._open.get(key)
+                if (current is not None and bucket < current[0]) or bucket <= self._last_bucket.get(key, -1):
+                    self.late_ticks += 1
+                    continue
+                if current is not None and bucket > current[0]:
+                    self._close_locked(key, current, closed)
+                    current = None
+                if current is None:
+                    self._open[key] = [bucket, price, price, price, price, volume, 1]
+                else:
+                    current[2] = max(current[2], price)
+                    current[3] = min(current[3], price)
+                    current[4] = price
+                    current[5] = volume
+                    current[6] += 1
+        self._publish(closed)
+        return closed
+
+    def close_due(self, now=None):
+        """
+        Closes every open candle whose interval has ended by `now` (epoch
+        seconds or datetime; default: current time).
+        """
+        seconds = to_epoch(now) if now is not None else datetime.now(timezone.utc).timestamp()
+        closed = []
+        with self._lock:
+            for key, current in list(self._open.items()):
+                if current[0] + self.resolutions[key[1]] <= seconds:
+                    del self._open[key]
+                    self._close_locked(key, current, closed)
+        self._publish(closed)
+        return closed
+
+    def _close_locked(self, key, candle, closed):
+        interval = self.resolutions[key[1]]
+        history = self._history(key)
+        last = self._last_bucket.get(key)
+        if last is not None and history and 1 < (candle[0] - last) // interval <= self.max_gap + 1:
+            previous_close, previous_volume = history[-1][4], history[-1][5]
+            for bucket in range(last + interval, candle[0], interval):
+                fill = (bucket, previous_close, previous_close, previous_close, previous_close, previous_volume, 0)
+                history.append(fill)
+                closed.append((key, fill))
+        candle = tuple(candle)
+        history.append(candle)
+        closed.append((key, candle))
+        self._last_bucket[key] = candle[0]
+
+    def _publish(self, closed):
+        for (symbol, resolution), candle in closed:
+            if self.persist:
+                get_writer().submit("price_candles", (symbol, resolution, _bucket_time(candle[0])) + candle[1:])
+            for callback in self._listeners:
+                try:
+                    callback(symbol, resolution, candle)
+                except Exception as e:
+                    print(f"[CandleStore] Listener error for {symbol} {resolution}: {e}")
+
+    def seed(self, symbol, resolution, candles):
+        """
+        Replaces the in-memory history with (bucket, o, h, l, c, v, ticks)
+        tuples, oldest first, bucket in epoch seconds.
+        """
+        key = (symbol.upper(), resolution)
+        with self._lock:
+            history = self._history(key)
+            history.clear()
+            history.extend(tuple(c) for c in candles)
+            if history:
+                self._last_bucket[key] = history[-1][0]
+            self._warm.add(key)
+
+    def is_warm(self, symbol, resolution) -> bool:
+        return (symbol.upper(), resolution) in self._warm
+
+    def candles(self, symbol, resolution, n=None) -> list:
+        with self._lock:
+            history = list(self._closed.get((symbol.upper(), resolution), ()))
+        return history[-n:] if n else history
+
+    def closes(self, symbol, resolution, n=None) -> list:
+        return [candle[4] for candle in self.candles(symbol, resolution, n)]
+
+    def warm(self, symbols, resolution=None, lookback=None):
+        """
+        Loads the newest `lookback` stored candles per symbol for each
+        resolution (or just `resolution`). Symbols without any are built
+        in bulk from the matching span of price_history and persisted.
+        """
+        symbols = [s.upper() for s in symbols]
+        lookback = lookback or self.capacity
+        resolutions = [resolution] if resolution else list(self.resolutions)
+        if not symbols:
+            return 0
+        flush_writes()
+        loaded = 0
+        for res in resolutions:
+            with get_connection() as conn:
+                cursor = conn.cursor()
+                # Same LATERAL pattern as PriceBufferStore.warm: one index probe per symbol
+                cursor.execute("""
+                    SELECT s.symbol, c.bucket, c.open, c.high, c.low, c.close, c.volume, c.ticks
+                    FROM unnest(%s::text[]) AS s(symbol)
+                    CROSS JOIN LATERAL (
+                        SELECT bucket, open, high, low, close, volume, ticks
+                        FROM price_candles
+                        WHERE symbol = s.symbol AND resolution = %s
+                        ORDER BY bucket DESC
+                        LIMIT %s
+                    ) c
+                    ORDER BY s.symbol, c.bucket
+                """, (symbols, res, lookback))
+                rows = cursor.fetchall()
+
+            by_symbol = {s: [] for s in symbols}
+            for symbol, bucket, *values in rows:
+                by_symbol[symbol].append((int(to_epoch(bucket)),) + tuple(values))
+            for symbol, candles in by_symbol.items():
+                if not candles:
+                    candles = self.backfill(symbol, res, lookback)
+                self.seed(symbol, res, candles)
+                loaded += len(candles)
+        print(f"[CandleStore] Warmed {loaded} candles for {len(symbols)} symbols ({', '.join(resolutions)})")
+        return loaded
+
+    def backfill(self, symbol, resolution, lookback=None, since=None):
+        """
+        Builds `resolution` candles for `symbol` from price_history since
+        `since` (default: enough for `lookback` candles), upserts them and
+        returns them as tuples.
+        """
+        interval = self.resolutions.get(resolution) or INTERVALS[resolution]
+        if since is None:
+            since = datetime.now(timezone.utc) - timedelta(seconds=interval * (lookback or self.capacity))
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT timestamp, price, volume
+                FROM price_history
+                WHERE symbol = %s AND timestamp >= %s
+                ORDER BY timestamp
+            """, (symbol.upper(), since))
+            rows = cursor.fetchall()
+        if not rows:
+            return []
+        timestamps = [to_epoch(ts) for ts, _, _ in rows]
+        prices = [np.nan if price is None else price for _, price, _ in rows]
+        volumes = [0.0 if volume is None else volume for _, _, volume in rows]
+        candles = bulk_candles(timestamps, prices, volumes, interval, self.max_gap)
+        upsert_candles(candle_rows(symbol.upper(), resolution, candles))
+        return list(zip(*(candles[field].tolist() for field in FIELDS)))
+
+
+def backfill_from_store(symbol, resolutions=("1m", "5m", "1h"), store=None, max_gap=60):
+    """
+    Rebuilds every candle for `symbol` from the local price store (synced
+    from price_history first) and upserts them. Returns rows written.
+    """
+    from price_store import price_store
+    store = store or price_store
+    store.sync(symbol)
+    columns = store.open(symbol)
+    seconds = np.asarray(columns["timestamp"]) / 1e9
+    written = 0
+    for resolution in resolutions:
+        candles = bulk_candles(seconds, columns["price"], columns["volume"], INTERVALS[resolution], max_gap)
+        written += upsert_candles(candle_rows(symbol.upper(), resolution, candles))
+    return written
+
+
+# Process-wide store: fed from price_buffers, read by indicators
+candle_store = CandleStore()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbol", action="append", required=True)
+    parser.add_argument("--interval", nargs="+", choices=list(INTERVALS), default=list(INTERVALS))
+    parser.add_argument("--max-gap", type=int, default=int(os.getenv("CANDLE_MAX_GAP", 60)))
+    args = parser.parse_args()
+    for symbol in args.symbol:
+        written = backfill_from_store(symbol, args.interval, max_gap=args.max_gap)
+        print(f"[CandleStore] {symbol.upper()}: wrote {written} candles ({', '.join(args.interval)})")
+
+
+if __name__ == "__main__":
+    main()
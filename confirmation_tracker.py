@@ -0,0 +1,141 @@
+# confirmation_tracker.py
+import asyncio
+import inspect
+import os
+import time
+from solders.signature import Signature
+from solders.transaction_status import TransactionConfirmationStatus
+from async_clients import get_rpc_client
+
+# getSignatureStatuses accepts at most 256 signatures per call
+MAX_SIGNATURES_PER_CALL = 256
+
+# TransactionConfirmationStatus isn't hashable, so rank it by position
+_LEVELS = [
+    TransactionConfirmationStatus.Processed,
+    TransactionConfirmationStatus.Confirmed,
+    TransactionConfirmationStatus.Finalized,
+]
+_COMMITMENTS = {"processed": 0, "confirmed": 1, "finalized": 2}
+
+
+def _level(confirmation_status) -> int:
+    for level, status in enumerate(_LEVELS):
+        if confirmation_status == status:
+            return level
+    return -1
+
+
+class _Pending:
+    def __init__(self, signature, future, deadline):
+        self.signature = signature
+        self.future = future
+        self.deadline = deadline
+        self.callbacks = []
+
+
+class ConfirmationTracker:
+    """
+    Tracks sent transactions without making the sender wait. track()
+    returns a future right away; one background task polls
+    getSignatureStatuses for every pending signature in a single batched
+    call per interval and resolves each future (and any callbacks) with
+    "confirmed", "failed" or "expired".
+    """
+
+    def __init__(self, client=None, poll_interval=None, timeout=None, commitment="confirmed"):
+        self._client = client
+        self.poll_interval = poll_interval or float(os.getenv("CONFIRM_POLL_SECONDS", 2))
+        self.timeout = timeout or float(os.getenv("CONFIRM_TIMEOUT_SECONDS", 90))
+        self.required_level = _COMMITMENTS[commitment]
+        self._pending = {}
+        self._task = None
+        self.stats = {"tracked": 0, "confirmed": 0, "failed": 0, "expired": 0, "polls": 0}
+
+    @property
+    def client(self):
+        return self._client or get_rpc_client()
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def track(self, signature, callback=None) -> asyncio.Future:
+        """
+        callback(signature_str, status) may be a plain function or a coroutine
+        function. Tracking the same signature twice shares one future.
+        """
+        key = str(signature)
+        entry = self._pending.get(key)
+        if entry is None:
+            if not isinstance(signature, Signature):
+                signature = Signature.from_string(key)
+            loop = asyncio.get_running_loop()
+            entry = self._pending[key] = _Pending(signature, loop.create_future(), time.monotonic() + self.timeout)
+            self.stats["tracked"] += 1
+        if callback is not None:
+            entry.callbacks.append(callback)
+        self._ensure_running()
+        return entry.future
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _resolve(self, key, status):
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return
+        self.stats[status] += 1
+        if not entry.future.done():
+            entry.future.set_result(status)
+        for callback in entry.callbacks:
+            try:
+                result = callback(key, status)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"[ConfirmationTracker] Callback error for {key}: {e}")
+
+    async def poll_once(self):
+        keys = list(self._pending)
+        self.stats["polls"] += 1
+        for start in range(0, len(keys), MAX_SIGNATURES_PER_CALL):
+            chunk = keys[start:start + MAX_SIGNATURES_PER_CALL]
+            resp = await self.client.get_signature_statuses([self._pending[k].signature for k in chunk])
+            for key, status in zip(chunk, resp.value):
+                if status is None:
+                    continue
+                if status.err is not None:
+                    await self._resolve(key, "failed")
+                elif _level(status.confirmation_status) >= self.required_level:
+                    await self._resolve(key, "confirmed")
+
+    async def _expire(self):
+        now = time.monotonic()
+        for key in [k for k, entry in self._pending.items() if entry.deadline <= now]:
+            await self._resolve(key, "expired")
+
+    async def _run(self):
+        while self._pending:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ConfirmationTracker] Status poll failed: {e}")
+            await self._expire()
+            if self._pending:
+                await asyncio.sleep(self.poll_interval)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Shared by JupiterSwapper and MultiTokenTrader
+confirmation_tracker = ConfirmationTracker()
@@ -1,11 +1,14 @@
 import os
+import time
+import threading
+from contextlib import contextmanager
 import pg8000
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
-def get_connection():
+def _connect():
     return pg8000.connect(
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
@@ -14,47 +17,236 @@ def get_connection():
         database=os.getenv("DB_NAME")
     )
 
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledConnection:
+    """
+    Thin proxy around a pg8000 connection checked out from a ConnectionPool.
+    close() and leaving a `with` block hand the connection back to the pool
+    instead of tearing down the socket, so existing call sites keep working.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self.created_at = created_at
+        self.last_used = time.monotonic()
+        self._released = True
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    @property
+    def autocommit(self):
+        return self._raw.autocommit
+
+    @autocommit.setter
+    def autocommit(self, value):
+        self._raw.autocommit = value
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if not self._released:
+            self._pool.release(self)
+
+
+class ConnectionPool:
+    def __init__(self, connect=_connect, max_size=None, checkout_timeout=None,
+                 max_lifetime=None, health_check_after=None):
+        self._connect = connect
+        self.max_size = max_size or int(os.getenv("DB_POOL_MAX_SIZE", 5))
+        self.checkout_timeout = checkout_timeout if checkout_timeout is not None else float(os.getenv("DB_POOL_TIMEOUT", 30))
+        # Connections older than this are closed and replaced on release/checkout
+        self.max_lifetime = max_lifetime if max_lifetime is not None else float(os.getenv("DB_POOL_MAX_LIFETIME", 1800))
+        # Idle connections older than this get a SELECT 1 before being handed out
+        self.health_check_after = health_check_after if health_check_after is not None else float(os.getenv("DB_POOL_HEALTHCHECK_IDLE", 60))
+
+        self._idle = []
+        self._size = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+        self._stats = {
+            "created": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "timeouts": 0,
+            "recycled": 0,
+            "failed_health_checks": 0,
+        }
+
+    def _is_expired(self, conn):
+        return time.monotonic() - conn.created_at > self.max_lifetime
+
+    def _is_healthy(self, conn):
+        if time.monotonic() - conn.last_used < self.health_check_after:
+            return True
+        try:
+            cursor = conn._raw.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            conn._raw.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn._raw.close()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        wait_start = time.monotonic()
+
+        while True:
+            candidate = None
+            with self._cond:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        self._stats["waits"] += 1
+                        self._stats["wait_time"] += time.monotonic() - wait_start
+                        raise PoolTimeout(f"No database connection available after {timeout}s")
+                    waited = True
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    candidate = self._idle.pop()
+                else:
+                    # Reserve the slot, then connect without holding the lock
+                    self._size += 1
+
+            if candidate is None:
+                break
+
+            # Validate idle connections outside the lock so a slow ping
+            # doesn't stall every other thread waiting on the pool
+            if self._is_expired(candidate):
+                reason = "recycled"
+            elif self._is_healthy(candidate):
+                with self._cond:
+                    return self._checkout(candidate, waited, wait_start)
+            else:
+                reason = "failed_health_checks"
+
+            self._discard(candidate)
+            with self._cond:
+                self._stats[reason] += 1
+                self._size -= 1
+
+        try:
+            conn = PooledConnection(self, self._connect(), time.monotonic())
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._stats["created"] += 1
+            return self._checkout(conn, waited, wait_start)
+
+    def _checkout(self, conn, waited, wait_start):
+        conn._released = False
+        self._in_use += 1
+        self._stats["checkouts"] += 1
+        if waited:
+            self._stats["waits"] += 1
+            self._stats["wait_time"] += time.monotonic() - wait_start
+        return conn
+
+    def release(self, conn):
+        # Drop any transaction the caller left open so the next user starts clean
+        reusable = True
+        try:
+            conn._raw.rollback()
+        except Exception:
+            reusable = False
+
+        with self._cond:
+            conn._released = True
+            conn.last_used = time.monotonic()
+            self._in_use -= 1
+            if reusable and not self._is_expired(conn):
+                self._idle.append(conn)
+            else:
+                if reusable:
+                    self._stats["recycled"] += 1
+                self._size -= 1
+                self._discard(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "max_size": self.max_size,
+            })
+        stats["wait_time"] = round(stats["wait_time"], 4)
+        return stats
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn in idle:
+            self._discard(conn)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def get_connection():
+    return get_pool().acquire()
+
+
+def connection(timeout=None):
+    return get_pool().connection(timeout)
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
 def initialize_tables():
-    with get_connection() as conn:
-        cursor = conn.cursor()
-
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS trades (
-            timestamp TIMESTAMPTZ,
-            action TEXT,
-            amount FLOAT,
-            price FLOAT,
-            confidence FLOAT,
-            symbol TEXT,
-            tx_sig TEXT,
-            pnl FLOAT,
-            Return_pct FLOAT,
-            sentiment FLOAT
-        );
-        """)
-
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS agent_votes (
-            timestamp TIMESTAMPTZ,
-            agent TEXT,
-            action TEXT,
-            amount FLOAT,
-            confidence FLOAT,
-            symbol TEXT
-        );
-        """)
-
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS price_history (
-            timestamp TIMESTAMPTZ,
-            symbol TEXT,
-            price FLOAT,
-            volume FLOAT
-        );
-        """)
-
-        conn.commit()
+    # Schema lives in migrations.py; imported here to avoid a circular import
+    from migrations import run_migrations
+    run_migrations()
 
 def get_db_connection():
     return psycopg2.connect(os.getenv("DATABASE_URL"))
-
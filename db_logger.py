@@ -1,17 +1,37 @@
 import sqlite3
 from datetime import datetime
 from db import get_connection
+from db_writer import get_writer, flush_writes
+from price_buffer import price_buffers
 
 DB_PATH = "trading.db"
 
 def fetch_all_trades():
+    # Trades may still be sitting in the write-behind queue
+    flush_writes()
     # conn = sqlite3.connect(DB_PATH)
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("SELECT * FROM trades ORDER BY timestamp ASC")
-    rows = c.fetchall()
-    # conn.close()
-    return rows
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute("SELECT * FROM trades ORDER BY timestamp ASC")
+        return c.fetchall()
+
+
+def fetch_ledger_rows():
+    """
+    Just the columns PositionLedger needs, oldest first, for swaps that
+    were sent and haven't failed or expired.
+    """
+    flush_writes()
+    with get_connection() as conn:
+        c = conn.cursor()
+        c.execute("""
+            SELECT timestamp, action, amount, price, symbol
+            FROM trades
+            WHERE tx_sig IS NOT NULL AND tx_sig <> '-'
+              AND (tx_status IS NULL OR tx_status NOT IN ('failed', 'expired'))
+            ORDER BY timestamp ASC, id ASC
+        """)
+        return c.fetchall()
 
 
 # def init_db():
@@ -54,13 +74,13 @@ def fetch_all_trades():
 #     conn.close()
 
 
+def _blank_to_none(value):
+    # RiskManager passes "" for pnl/return_pct on BUYs; FLOAT columns reject it
+    return None if value == "" else value
+
+
 def log_trade(**kwargs):
-    # conn = sqlite3.connect(DB_PATH)
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("""
-        INSERT INTO trades VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """, (
+    get_writer().submit("trades", (
         kwargs.get("timestamp"),
         kwargs.get("action"),
         kwargs.get("amount"),
@@ -68,20 +88,18 @@ def log_trade(**kwargs):
         kwargs.get("confidence"),
         kwargs.get("symbol"),
         kwargs.get("tx_sig"),
-        kwargs.get("pnl"),
-        kwargs.get("return_pct"),
-        kwargs.get("sentiment")
+        _blank_to_none(kwargs.get("pnl")),
+        _blank_to_none(kwargs.get("return_pct")),
+        kwargs.get("sentiment"),
+        kwargs.get("tx_status")
     ))
-    conn.commit()
-    conn.close()
+
+def update_trade_status(tx_sig, status):
+    # Queued behind the trade's own INSERT, so it always finds the row
+    get_writer().submit("trade_status", (status, str(tx_sig)))
 
 def log_agent_votes(**kwargs):
-    # conn = sqlite3.connect(DB_PATH)
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("""
-        INSERT INTO agent_votes VALUES (%s, %s, %s, %s, %s)
-    """, (
+    get_writer().submit("agent_votes", (
         kwargs.get("timestamp"),
         kwargs.get("agent"),
         kwargs.get("action"),
@@ -89,22 +107,26 @@ def log_agent_votes(**kwargs):
         kwargs.get("confidence"),
         kwargs.get("symbol")
     ))
-    conn.commit()
-    conn.close()
 
 def log_price_history(**kwargs):
-    # conn = sqlite3.connect(DB_PATH)
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("""
-        INSERT INTO price_history VALUES (%s, %s, %s, %s)
-    """, (
+    # Keep the in-memory history current so readers don't need the DB
+    price_buffers.append(
+        kwargs.get("symbol"),
+        kwargs.get("timestamp"),
+        kwargs.get("price"),
+        kwargs.get("volume")
+    )
+    get_writer().submit("price_history", (
         kwargs.get("timestamp"),
         kwargs.get("symbol"),
         kwargs.get("price"),
         kwargs.get("volume")
-        
     ))
-    conn.commit()
-    conn.close()
-  
\ No newline at end of file
+
+def log_price_history_many(points):
+    """
+    points: iterable of (timestamp, symbol, price, volume). Queued together,
+    so the writer flushes them as one multi-row insert.
+    """
+    for timestamp, symbol, price, volume in points:
+        log_price_history(timestamp=timestamp, symbol=symbol, price=price, volume=volume)
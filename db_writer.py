@@ -0,0 +1,249 @@
+# db_writer.py
+import os
+import time
+import queue
+import atexit
+import threading
+from db import get_connection
+
+
+TABLE_COLUMNS = {
+    "trades": ("timestamp", "action", "amount", "price", "confidence", "symbol", "tx_sig", "pnl", "return_pct", "sentiment", "tx_status"),
+    "agent_votes": ("timestamp", "agent", "action", "amount", "confidence", "symbol"),
+    "price_history": ("timestamp", "symbol", "price", "volume"),
+    "price_candles": ("symbol", "resolution", "bucket", "open", "high", "low", "close", "volume", "ticks"),
+}
+
+# Appended to the INSERT for tables with a natural key, so replayed or
+# duplicate rows are skipped instead of failing the whole batch
+ON_CONFLICT = {
+    "price_history": "ON CONFLICT DO NOTHING",
+    # A candle re-closed after a restart merges with the stored one. Gap
+    # fills (ticks = 0) never touch a stored candle, and a real candle
+    # replaces a stored fill outright
+    "price_candles": """ON CONFLICT (symbol, resolution, bucket) DO UPDATE SET
+        open = CASE WHEN price_candles.ticks = 0 THEN EXCLUDED.open ELSE price_candles.open END,
+        high = CASE WHEN price_candles.ticks = 0 THEN EXCLUDED.high ELSE GREATEST(price_candles.high, EXCLUDED.high) END,
+        low = CASE WHEN price_candles.ticks = 0 THEN EXCLUDED.low ELSE LEAST(price_candles.low, EXCLUDED.low) END,
+        close = EXCLUDED.close,
+        volume = EXCLUDED.volume,
+        ticks = price_candles.ticks + EXCLUDED.ticks
+        WHERE EXCLUDED.ticks > 0""",
+}
+
+# Keyed UPDATEs that go through the same queue, so they are applied after
+# any INSERT submitted before them (e.g. a trade row, then its status)
+UPDATES = {
+    # A swap that failed or expired drops out of the daily rollup, so its
+    # day is queued for refresh_daily_rollup to re-aggregate
+    "trade_status": """
+        WITH updated AS (
+            UPDATE trades SET tx_status = %s WHERE tx_sig = %s
+            RETURNING timestamp, tx_status
+        )
+        INSERT INTO rollup_dirty_days (day)
+        SELECT DISTINCT (timestamp AT TIME ZONE 'UTC')::date
+        FROM updated
+        WHERE tx_status IN ('failed', 'expired')
+        ON CONFLICT DO NOTHING
+    """,
+}
+
+# pg8000 sends parameters in a single Bind message, which caps them at 32767
+MAX_PARAMS_PER_STATEMENT = 32000
+
+
+class _FlushRequest:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class WriteBehindWriter:
+    """
+    Background thread that drains a bounded queue of INSERT records and
+    writes them as multi-row statements, one commit per batch.
+
+    A batch is flushed once `batch_size` records are waiting or
+    `flush_interval` seconds have passed since the first one arrived.
+    submit() blocks when the queue is full, which pushes back on producers
+    instead of growing memory without bound.
+    """
+
+    def __init__(self, connection_factory=get_connection, batch_size=None, flush_interval=None,
+                 max_queue=None, max_retries=3):
+        self.connection_factory = connection_factory
+        self.batch_size = batch_size or int(os.getenv("DB_WRITE_BATCH_SIZE", 500))
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv("DB_WRITE_FLUSH_INTERVAL", 2.0))
+        self.max_retries = max_retries
+        self._queue = queue.Queue(maxsize=max_queue or int(os.getenv("DB_WRITE_QUEUE_SIZE", 10000)))
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "submitted": 0,
+            "written": 0,
+            "dropped": 0,
+            "batches": 0,
+            "blocked_submits": 0,
+        }
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+        return self
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, table, row, timeout=None):
+        if table not in TABLE_COLUMNS and table not in UPDATES:
+            raise ValueError(f"Unknown table for write-behind: {table}")
+        if not self.running:
+            self.start()
+
+        item = (table, tuple(row))
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Backpressure: wait for the writer to drain rather than drop data
+            self.stats["blocked_submits"] += 1
+            self._queue.put(item, timeout=timeout)
+        self.stats["submitted"] += 1
+
+    def flush(self, timeout=None):
+        """
+        Block until everything submitted before this call has been committed.
+        Returns False if the timeout expired first.
+        """
+        if not self.running:
+            return self._queue.empty()
+        request = _FlushRequest()
+        self._queue.put(request, timeout=timeout)
+        return request.done.wait(timeout)
+
+    def stop(self, timeout=10):
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        batch = []
+        deadline = None
+
+        while True:
+            wait = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                item = None
+
+            if item is None or item is _STOP or isinstance(item, _FlushRequest):
+                if batch:
+                    self._write(batch)
+                    batch = []
+                deadline = None
+                if isinstance(item, _FlushRequest):
+                    item.done.set()
+                elif item is _STOP:
+                    return
+                continue
+
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+                deadline = None
+
+    def _group_by_table(self, batch):
+        # Keep arrival order across tables: only consecutive records are merged
+        groups = []
+        for table, row in batch:
+            if groups and groups[-1][0] == table:
+                groups[-1][1].append(row)
+            else:
+                groups.append((table, [row]))
+        return groups
+
+    def _write(self, batch):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                with self.connection_factory() as conn:
+                    cursor = conn.cursor()
+                    for table, rows in self._group_by_table(batch):
+                        self._insert_rows(cursor, table, rows)
+                    conn.commit()
+                self.stats["written"] += len(batch)
+                self.stats["batches"] += 1
+                return
+            except Exception as e:
+                print(f"[DBWriter] Batch of {len(batch)} failed (attempt {attempt}/{self.max_retries}): {e}")
+                time.sleep(min(0.5 * 2 ** (attempt - 1), 5))
+
+        # Fall back to one row per transaction so a single bad record
+        # doesn't take the rest of the batch down with it
+        for table, row in batch:
+            try:
+                with self.connection_factory() as conn:
+                    self._insert_rows(conn.cursor(), table, [row])
+                    conn.commit()
+                self.stats["written"] += 1
+            except Exception as e:
+                self.stats["dropped"] += 1
+                print(f"[DBWriter] Dropping {table} row {row}: {e}")
+
+    def _insert_rows(self, cursor, table, rows):
+        if table in UPDATES:
+            for row in rows:
+                cursor.execute(UPDATES[table], row)
+            return
+
+        columns = TABLE_COLUMNS[table]
+        per_statement = max(MAX_PARAMS_PER_STATEMENT // len(columns), 1)
+        placeholder = "(" + ", ".join(["%s"] * len(columns)) + ")"
+
+        for start in range(0, len(rows), per_statement):
+            chunk = rows[start:start + per_statement]
+            params = [value for row in chunk for value in row]
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+                + ", ".join([placeholder] * len(chunk))
+                + (" " + ON_CONFLICT[table] if table in ON_CONFLICT else ""),
+                params
+            )
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = WriteBehindWriter().start()
+                atexit.register(_writer.stop)
+    return _writer
+
+
+def flush_writes(timeout=None):
+    if _writer is None:
+        return True
+    return _writer.flush(timeout)
+
+
+def shutdown_writer(timeout=10):
+    if _writer is not None:
+        _writer.stop(timeout)
@@ -0,0 +1,215 @@
+# event_backtest.py
+#
+# Replays price_history ticks through the live RiskManager rules and a
+# simulated Jupiter swapper. Ensemble signals come from the vectorised
+# path (same decisions as AgentOrchestrator); everything after the signal
+# -- cooldown, confidence and RSI gates, loss streak, daily-loss cap,
+# latency, slippage, fees and FIFO PnL -- runs event by event on the
+# simulated clock. Realized PnL and win rate are net of fees.
+#
+#   python event_backtest.py --symbol SOL --slippage-bps 50 --latency-ms 1500
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from indicator_batch import indicator_series
+from position_ledger import PositionLedger
+from risk_manager import RiskManager
+from vector_backtest import ACTION_NAMES, HOLD, agent_votes, combine_votes, max_drawdown
+
+LAMPORTS_PER_SOL = 1_000_000_000
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+class SimulatedSwapper:
+    """
+    Fills an order `latency_ms` after it was signalled, at the first tick
+    at or after that time, moved against us by `slippage_bps` (Jupiter's
+    slippage cap, i.e. the worst fill the route would accept). Each swap
+    pays base + priority fee in lamports, charged at `sol_price` (the
+    tick price itself when trading SOL).
+    """
+
+    def __init__(self, slippage_bps=50, priority_fee_lamports=10_000, base_fee_lamports=5_000,
+                 latency_ms=1500.0, sol_price=None):
+        self.slippage_bps = slippage_bps
+        self.priority_fee_lamports = priority_fee_lamports
+        self.base_fee_lamports = base_fee_lamports
+        self.latency_ms = latency_ms
+        self.sol_price = sol_price
+
+    def fill_index(self, timestamps_ns, index):
+        """
+        Index of the tick the order lands on, or None past the end of the data.
+        """
+        due = timestamps_ns[index] + int(self.latency_ms * 1_000_000)
+        fill = int(np.searchsorted(timestamps_ns, due, side="left"))
+        return fill if fill < len(timestamps_ns) else None
+
+    def fill_price(self, price, action):
+        slip = self.slippage_bps / 10_000
+        return price * (1 + slip) if action == "BUY" else price * (1 - slip)
+
+    def fee(self, price):
+        sol_price = self.sol_price if self.sol_price is not None else price
+        return (self.base_fee_lamports + self.priority_fee_lamports) / LAMPORTS_PER_SOL * sol_price
+
+
+def _to_datetime(ns):
+    return datetime(1970, 1, 1) + timedelta(microseconds=int(ns) // 1000)
+
+
+def sharpe_ratio(equity, timestamps_ns):
+    """
+    Annualised Sharpe of per-tick equity changes, using the median tick
+    spacing as the period.
+    """
+    if len(equity) < 3:
+        return 0.0
+    changes = np.diff(equity)
+    std = changes.std()
+    if std == 0:
+        return 0.0
+    spacing = np.median(np.diff(timestamps_ns)) / 1e9
+    periods = SECONDS_PER_YEAR / spacing if spacing > 0 else 1.0
+    return float(changes.mean() / std * np.sqrt(periods))
+
+
+def run_event_backtest(prices, timestamps, agents, symbol="SOL", swapper=None, cooldown_minutes=None, start=50):
+    """
+    prices: tick prices; timestamps: matching naive-UTC datetimes (anything
+    np.datetime64 accepts). Risk limits come from the same env vars as the
+    daemon. Returns {"trades": DataFrame, "equity": array, "position":
+    array, "stats": dict}.
+    """
+    if cooldown_minutes is None:
+        cooldown_minutes = int(os.getenv("COOLDOWN_MINUTES", 10))
+    prices = np.asarray(prices, dtype=np.float64)
+    timestamps_ns = np.asarray(timestamps, dtype="datetime64[ns]").astype(np.int64)
+    swapper = swapper or SimulatedSwapper()
+
+    ind = indicator_series(prices)
+    action, amount, confidence = combine_votes(agent_votes(agents, ind))
+    signals = np.flatnonzero((action != HOLD) & ind["ready"] & (np.arange(len(prices)) >= start))
+
+    clock = {"now": datetime(1970, 1, 1)}
+    risk = RiskManager(cooldown_minutes, clock=lambda: clock["now"],
+                       trade_sink=lambda **row: None, ledger=PositionLedger())
+    rsi = ind["rsi"]
+
+    trades, rejected = [], {}
+    fill_at, fill_delta, fill_cash = [], [], []
+    position = 0.0
+    busy_until = -1  # live cycles wait for the swap before deciding again
+
+    for i in signals:
+        if i <= busy_until:
+            continue
+        side = ACTION_NAMES[action[i]]
+        size = float(amount[i])
+        if side == "SELL":
+            # Long only: a SELL closes at most what is open
+            size = min(size, position)
+            if size <= 1e-12:
+                rejected["flat"] = rejected.get("flat", 0) + 1
+                continue
+
+        clock["now"] = _to_datetime(timestamps_ns[i])
+        decision = {"action": side, "amount": size, "confidence": float(confidence[i])}
+        if not risk.approve_trade(decision, {"price": prices[i], "rsi": rsi[i]}):
+            rejected[risk.last_rejection] = rejected.get(risk.last_rejection, 0) + 1
+            continue
+
+        j = swapper.fill_index(timestamps_ns, i)
+        if j is None:
+            rejected["unfilled"] = rejected.get("unfilled", 0) + 1
+            break
+        busy_until = j
+        price = swapper.fill_price(prices[j], side)
+        fee = swapper.fee(prices[j])
+
+        clock["now"] = _to_datetime(timestamps_ns[j])
+        pnl_before = risk.ledger.realized_pnl
+        # Fees go into the lot prices (BUY cost up, SELL proceeds down), so
+        # the ledger's PnL, the loss streak and the daily-loss cap are net
+        net_price = price + fee / size if side == "BUY" else price - fee / size
+        risk.log_trade(side, size, net_price, decision["confidence"], symbol=symbol, tx_sig="sim")
+        position += size if side == "BUY" else -size
+
+        fill_at.append(j)
+        fill_delta.append(size if side == "BUY" else -size)
+        fill_cash.append(-size * price - fee if side == "BUY" else size * price - fee)
+        trades.append({
+            "signal_time": _to_datetime(timestamps_ns[i]),
+            "fill_time": clock["now"],
+            "action": side,
+            "amount": size,
+            "signal_price": prices[i],
+            "fill_price": price,
+            "fee": fee,
+            "confidence": decision["confidence"],
+            "pnl": risk.ledger.realized_pnl - pnl_before if side == "SELL" else 0.0,
+            "position": position,
+        })
+
+    # Mark to market on every tick from the fills
+    delta = np.zeros(len(prices))
+    cash_flow = np.zeros(len(prices))
+    np.add.at(delta, fill_at, fill_delta)
+    np.add.at(cash_flow, fill_at, fill_cash)
+    held = np.cumsum(delta)
+    equity = np.cumsum(cash_flow) + held * prices
+
+    trades = pd.DataFrame(trades)
+    durations = np.diff(timestamps_ns, append=timestamps_ns[-1]) if len(prices) else np.zeros(0)
+    total_time = durations.sum()
+    sells = trades[trades["action"] == "SELL"] if len(trades) else trades
+    stats = {
+        "ticks": len(prices),
+        "signals": len(signals),
+        "trades": len(trades),
+        "rejected": rejected,
+        "realized_pnl": round(risk.ledger.realized_pnl, 6),
+        "fees": round(float(trades["fee"].sum()), 6) if len(trades) else 0.0,
+        "final_equity": round(float(equity[-1]), 6) if len(prices) else 0.0,
+        "win_rate": round(float((sells["pnl"] > 0).mean()), 4) if len(sells) else 0.0,
+        "sharpe": round(sharpe_ratio(equity, timestamps_ns), 4),
+        "max_drawdown": round(max_drawdown(equity), 6),
+        # Share of wall-clock time with a position open, and the average size held
+        "exposure": round(float(durations[held > 1e-12].sum() / total_time), 4) if total_time else 0.0,
+        "avg_position": round(float((held * durations).sum() / total_time), 6) if total_time else 0.0,
+    }
+    return {"trades": trades, "equity": equity, "position": held, "stats": stats}
+
+
+def main():
+    from backtester import Backtester
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbol", default="SOL")
+    parser.add_argument("--slippage-bps", type=float, default=50)
+    parser.add_argument("--priority-fee-lamports", type=int, default=10_000)
+    parser.add_argument("--latency-ms", type=float, default=1500.0)
+    parser.add_argument("--sol-price", type=float, default=None, help="SOL price for fees when not trading SOL")
+    parser.add_argument("--cooldown-minutes", type=int, default=int(os.getenv("COOLDOWN_MINUTES", 10)))
+    parser.add_argument("--out", default="logs/event_backtest_trades.csv")
+    args = parser.parse_args()
+
+    tester = Backtester("trading.db", symbol=args.symbol)
+    swapper = SimulatedSwapper(args.slippage_bps, args.priority_fee_lamports,
+                               latency_ms=args.latency_ms, sol_price=args.sol_price)
+    started = time.perf_counter()
+    result = run_event_backtest(tester.df["close"], tester.df["timestamp"], tester.agent_ensemble.agents,
+                                symbol=args.symbol, swapper=swapper, cooldown_minutes=args.cooldown_minutes)
+    elapsed = time.perf_counter() - started
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    result["trades"].to_csv(args.out, index=False)
+    print(f"[EventBacktest] {len(tester.df)} ticks in {elapsed:.2f}s -> {args.out}")
+    print(f"[EventBacktest] {result['stats']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,51 @@ import pandas_ta as ta
 import httpx
 # For making asynchronous HTTP requests to external agents
 import asyncio
+from indicator_engine import indicator_engine
+from indicator_batch import build_price_matrix, batch_indicators, batch_to_dicts
 
 class IndicatorCalculator:
-    def compute_indicators(self, price_list: list) -> dict:
+    def __init__(self, engine=indicator_engine):
+        self.engine = engine
+
+    def compute_indicators_many(self, histories: dict) -> dict:
+        """
+        Indicators for many symbols at once from {symbol: price_list}.
+        Symbols the engine already tracks are read from their snapshots; the
+        rest are computed together over one NaN-padded (symbols x time)
+        matrix and handed to the engine so later cycles are O(1). Symbols
+        with fewer than 50 prices are left out of the result.
+        """
+        results = {}
+        cold = {}
+        for symbol, prices in histories.items():
+            snapshot = self.engine.snapshot(symbol) if self.engine is not None else None
+            if snapshot is not None:
+                results[symbol] = snapshot
+            elif prices and len(prices) >= 50:
+                cold[symbol] = prices
+
+        if cold:
+            if self.engine is not None:
+                results.update(self.engine.warm_many(cold))
+            else:
+                symbols, matrix, _ = build_price_matrix(cold)
+                results.update(batch_to_dicts(symbols, batch_indicators(matrix)))
+        return results
+
+    def compute_indicators(self, price_list: list, symbol: str = None) -> dict:
+        """
+        With a symbol, the first call warms that symbol's streaming state from
+        price_list and later calls read the O(1)-maintained snapshot (the engine
+        is fed by every logged price). Without one, recomputes with pandas_ta.
+        """
+        if symbol and self.engine is not None:
+            if not self.engine.has(symbol):
+                if not price_list or len(price_list) < 50:
+                    return None
+                return self.engine.warm(symbol, price_list)
+            return self.engine.snapshot(symbol)
+
         if not price_list or len(price_list) < 50:
             # print(f"[IndicatorCalculator] not enough price data to compute indicators")
             return None
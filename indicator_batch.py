@@ -0,0 +1,207 @@
+# indicator_batch.py
+import numpy as np
+import pandas as pd
+
+INDICATOR_KEYS = ("price", "sma_20", "sma_50", "rsi", "macd", "macd_signal", "macd_hist")
+
+
+def build_price_matrix(histories: dict, length: int = None):
+    """
+    Packs {symbol: [prices...]} into a right-aligned (symbols x time) float64
+    matrix. Shorter histories are NaN-padded on the left so the newest price
+    of every symbol sits in the last column. Returns (symbols, matrix, mask).
+    """
+    symbols = list(histories)
+    length = length or max((len(p) for p in histories.values()), default=0)
+    matrix = np.full((len(symbols), length), np.nan)
+    for row, symbol in enumerate(symbols):
+        prices = histories[symbol][-length:] if length else []
+        if len(prices):
+            matrix[row, length - len(prices):] = prices
+    return symbols, matrix, ~np.isnan(matrix)
+
+
+def _ewm_step(weighted, old_wt, value, active, alpha, adjust):
+    """
+    Vectorised copy of one step of pandas' ewm().mean() recurrence, applied
+    only where `active` is set.
+    """
+    first = active & np.isnan(weighted)
+    step = active & ~first
+
+    new_wt = 1.0 if adjust else alpha
+    decayed = old_wt * (1.0 - alpha)
+    with np.errstate(invalid="ignore"):
+        mixed = (decayed * weighted + new_wt * value) / (decayed + new_wt)
+    mixed = np.where(weighted != value, mixed, weighted)
+
+    weighted = np.where(first, value, np.where(step, mixed, weighted))
+    if adjust:
+        old_wt = np.where(step, decayed + new_wt, old_wt)
+    else:
+        old_wt = np.where(step, 1.0, old_wt)
+    return weighted, old_wt
+
+
+def _seeded_ema(values, start, length):
+    """
+    pandas_ta ema() over each row from its own `start` column: NaN until
+    `length` values are in, seeded with their mean, then adjust=False EWM.
+    """
+    n, t_len = values.shape
+    alpha = 2.0 / (length + 1)
+    out = np.full((n, t_len), np.nan)
+    ema = np.full(n, np.nan)
+    old_wt = np.ones(n)
+    rows = np.arange(n)
+
+    for t in range(t_len):
+        k = t - start
+        seed_rows = k == length - 1
+        if seed_rows.any():
+            window = values[seed_rows, t - length + 1:t + 1]
+            ema[seed_rows] = window.sum(axis=1) / length
+        ema, old_wt = _ewm_step(ema, old_wt, values[:, t], k >= length, alpha, adjust=False)
+        out[rows, t] = ema
+    return out, ema, old_wt
+
+
+def batch_indicators(matrix: np.ndarray, min_history: int = 50) -> dict:
+    """
+    Computes the compute_indicators() outputs for every row of a
+    right-aligned price matrix in one pass over the time axis, vectorised
+    across symbols. Rows with fewer than `min_history` prices get NaN and
+    ok=False. Besides one array per indicator key, the result carries the
+    final recurrence state so streaming IndicatorStates can be built from it.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    n, t_len = matrix.shape
+    valid = ~np.isnan(matrix)
+    count = valid.sum(axis=1)
+    start = t_len - count
+
+    last = matrix[:, -1] if t_len else np.full(n, np.nan)
+
+    def sma(length):
+        if t_len < length:
+            return np.full(n, np.nan)
+        out = matrix[:, -length:].mean(axis=1)
+        return np.where(count >= length, out, np.nan)
+
+    # RSI-14: pandas_ta rma() == ewm(alpha=1/14, min_periods=14), adjust=True
+    alpha = 1.0 / 14
+    gain = np.full(n, np.nan)
+    loss = np.full(n, np.nan)
+    gain_wt = np.ones(n)
+    loss_wt = np.ones(n)
+    diff_obs = np.zeros(n, dtype=np.int64)
+    for t in range(1, t_len):
+        active = valid[:, t] & valid[:, t - 1]
+        change = matrix[:, t] - matrix[:, t - 1]
+        up = np.where(change > 0, change, 0.0)
+        down = np.where(change < 0, -change, 0.0)
+        gain, gain_wt = _ewm_step(gain, gain_wt, up, active, alpha, adjust=True)
+        loss, loss_wt = _ewm_step(loss, loss_wt, down, active, alpha, adjust=True)
+        diff_obs += active
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total = gain + loss
+        rsi = np.where((diff_obs >= 14) & (total != 0), 100 * gain / total, np.nan)
+
+    # MACD(12, 26, 9); the signal line starts where MACD first becomes valid
+    fast, fast_last, fast_wt = _seeded_ema(matrix, start, 12)
+    slow, slow_last, slow_wt = _seeded_ema(matrix, start, 26)
+    macd_series = fast - slow
+    signal, signal_last, signal_wt = _seeded_ema(macd_series, start + 25, 9)
+    macd = macd_series[:, -1] if t_len else np.full(n, np.nan)
+
+    ok = count >= min_history
+    result = {
+        "price": last,
+        "sma_20": sma(20),
+        "sma_50": sma(50),
+        "rsi": rsi,
+        "macd": macd,
+        "macd_signal": signal_last,
+        "macd_hist": macd - signal_last,
+        "ok": ok,
+        "count": count,
+        "state": {
+            "gain": gain, "gain_wt": gain_wt,
+            "loss": loss, "loss_wt": loss_wt,
+            "diff_obs": diff_obs,
+            "fast": fast_last, "fast_wt": fast_wt,
+            "slow": slow_last, "slow_wt": slow_wt,
+            "signal": signal_last, "signal_wt": signal_wt,
+        },
+    }
+    for key in INDICATOR_KEYS:
+        result[key] = np.where(ok, result[key], np.nan)
+    return result
+
+
+def batch_to_dicts(symbols, result) -> dict:
+    """
+    {symbol: indicators dict} for rows with enough history, NaN -> 0.0 like
+    compute_indicators().
+    """
+    out = {}
+    for row, symbol in enumerate(symbols):
+        if not result["ok"][row]:
+            continue
+        out[symbol] = {
+            key: float(result[key][row]) if not np.isnan(result[key][row]) else 0.0
+            for key in INDICATOR_KEYS
+        }
+    return out
+
+
+def _seeded_ema_series(values, length):
+    """
+    pandas_ta ema() over a 1-D series whose leading NaNs are skipped:
+    the mean of the first `length` values as the seed, then
+    ewm(span=length, adjust=False). Same arithmetic as SeededEMA.
+    """
+    out = np.full(len(values), np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if len(valid) < length:
+        return out
+    seed_end = valid[0] + length
+    seed = float(np.asarray(values[valid[0]:seed_end], dtype=np.float64).sum()) / length
+    tail = np.concatenate(([seed], values[seed_end:]))
+    out[seed_end - 1:] = pd.Series(tail).ewm(alpha=2.0 / (length + 1), adjust=False).mean().to_numpy()
+    return out
+
+
+def indicator_series(prices, min_history: int = 50) -> dict:
+    """
+    The indicators IndicatorState.snapshot() would return after every
+    price of one series, as whole columns: {key: array} for INDICATOR_KEYS
+    with NaN -> 0.0 like snapshot(), plus `ready` (False where snapshot()
+    would return None).
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    series = pd.Series(prices)
+
+    change = series.diff().iloc[1:]
+    gain = change.clip(lower=0.0).ewm(alpha=1.0 / 14, adjust=True, min_periods=14).mean()
+    loss = (-change).clip(lower=0.0).ewm(alpha=1.0 / 14, adjust=True, min_periods=14).mean()
+    total = gain + loss
+    rsi = np.full(len(prices), np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi[1:] = np.where(total.to_numpy() != 0, 100 * gain.to_numpy() / total.to_numpy(), np.nan)
+
+    macd = _seeded_ema_series(prices, 12) - _seeded_ema_series(prices, 26)
+    signal = _seeded_ema_series(macd, 9)
+
+    columns = {
+        "price": prices,
+        "sma_20": series.rolling(20).mean().to_numpy(),
+        "sma_50": series.rolling(50).mean().to_numpy(),
+        "rsi": rsi,
+        "macd": macd,
+        "macd_signal": signal,
+        "macd_hist": macd - signal,
+    }
+    result = {key: np.nan_to_num(columns[key], nan=0.0) for key in INDICATOR_KEYS}
+    result["ready"] = np.arange(1, len(prices) + 1) >= min_history
+    return result
@@ -0,0 +1,333 @@
+# indicator_engine.py
+import copy
+import threading
+from collections import deque
+import numpy as np
+from indicator_batch import build_price_matrix, batch_indicators
+from price_buffer import to_epoch
+
+NAN = float("nan")
+
+
+class RollingMean:
+    """
+    Simple moving average over the last `length` values, O(1) per update.
+    Uses the same Kahan-compensated running sum as pandas' rolling mean so
+    the result doesn't drift over long streams.
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.window = deque()
+        self._sum = 0.0
+        self._comp = 0.0
+
+    def _add(self, value):
+        y = value - self._comp
+        t = self._sum + y
+        self._comp = (t - self._sum) - y
+        self._sum = t
+
+    def update(self, value):
+        self.window.append(value)
+        self._add(value)
+        if len(self.window) > self.length:
+            self._add(-self.window.popleft())
+        return self.value
+
+    @property
+    def value(self):
+        if len(self.window) < self.length:
+            return NAN
+        return self._sum / self.length
+
+
+class EWM:
+    """
+    One step of pandas' Series.ewm(...).mean() recurrence, so streaming
+    output matches the DataFrame version value for value.
+    """
+
+    def __init__(self, alpha, adjust, min_periods=0):
+        self.alpha = alpha
+        self.adjust = adjust
+        self.min_periods = min_periods
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def update(self, value):
+        if value != value:  # NaN: pandas only decays the weight
+            if self.weighted == self.weighted:
+                self.old_wt *= 1.0 - self.alpha
+            return self.value
+
+        self.nobs += 1
+        if self.weighted != self.weighted:
+            self.weighted = value
+        else:
+            new_wt = 1.0 if self.adjust else self.alpha
+            self.old_wt *= 1.0 - self.alpha
+            if self.weighted != value:
+                self.weighted = (self.old_wt * self.weighted + new_wt * value) / (self.old_wt + new_wt)
+            if self.adjust:
+                self.old_wt += new_wt
+            else:
+                self.old_wt = 1.0
+        return self.value
+
+    @property
+    def value(self):
+        return self.weighted if self.nobs >= max(self.min_periods, 1) else NAN
+
+
+class SeededEMA:
+    """
+    pandas_ta's ema(): NaN for the first length-1 values, the SMA of the
+    first `length` values as the seed, then ewm(span=length, adjust=False).
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.seed = []
+        self.ewm = EWM(alpha=2.0 / (length + 1), adjust=False)
+
+    def update(self, value):
+        if self.seed is not None:
+            self.seed.append(value)
+            if len(self.seed) < self.length:
+                return NAN
+            # Same summation pandas uses for Series.mean()
+            value = float(np.asarray(self.seed, dtype=np.float64).sum()) / self.length
+            self.seed = None
+        return self.ewm.update(value)
+
+
+class IndicatorState:
+    """
+    Running SMA-20/50, RSI-14 and MACD(12, 26, 9) for one symbol, matching
+    pandas_ta run over every price this state has seen.
+    """
+
+    def __init__(self, min_history=50):
+        self.min_history = min_history
+        self.count = 0
+        self.price = NAN
+        self.prev_price = None
+
+        self.sma_20 = RollingMean(20)
+        self.sma_50 = RollingMean(50)
+        # pandas_ta rsi: rma() of gains/losses = ewm(alpha=1/14, min_periods=14)
+        self.avg_gain = EWM(alpha=1.0 / 14, adjust=True, min_periods=14)
+        self.avg_loss = EWM(alpha=1.0 / 14, adjust=True, min_periods=14)
+        self.ema_fast = SeededEMA(12)
+        self.ema_slow = SeededEMA(26)
+        self.signal = SeededEMA(9)
+
+        self.rsi = NAN
+        self.macd = NAN
+        self.macd_signal = NAN
+
+    @classmethod
+    def from_batch(cls, result, row, prices, min_history=50):
+        """
+        Rebuilds the state a warm() over `prices` would leave behind from row
+        `row` of indicator_batch.batch_indicators(), so batch-computed symbols
+        can continue one tick at a time. Needs at least min_history prices.
+        """
+        state = cls(min_history)
+        s = {key: float(values[row]) for key, values in result["state"].items()}
+        prices = [float(p) for p in prices]
+
+        state.count = len(prices)
+        state.price = state.prev_price = prices[-1]
+        for sma in (state.sma_20, state.sma_50):
+            for price in prices[-sma.length:]:
+                sma.window.append(price)
+                sma._add(price)
+
+        for ewm, key in ((state.avg_gain, "gain"), (state.avg_loss, "loss")):
+            ewm.weighted, ewm.old_wt, ewm.nobs = s[key], s[key + "_wt"], int(s["diff_obs"])
+        for ema, key in ((state.ema_fast, "fast"), (state.ema_slow, "slow"), (state.signal, "signal")):
+            ema.seed = None
+            ema.ewm.weighted, ema.ewm.old_wt, ema.ewm.nobs = s[key], s[key + "_wt"], 1
+
+        state.rsi = float(result["rsi"][row])
+        state.macd = float(result["macd"][row])
+        state.macd_signal = float(result["macd_signal"][row])
+        return state
+
+    def update(self, price):
+        price = float(price)
+        self.count += 1
+        self.price = price
+
+        self.sma_20.update(price)
+        self.sma_50.update(price)
+
+        if self.prev_price is not None:
+            change = price - self.prev_price
+            gain = self.avg_gain.update(change if change > 0 else 0.0)
+            loss = self.avg_loss.update(-change if change < 0 else 0.0)
+            total = gain + loss
+            self.rsi = 100 * gain / total if total == total and total != 0 else NAN
+        self.prev_price = price
+
+        fast = self.ema_fast.update(price)
+        slow = self.ema_slow.update(price)
+        self.macd = fast - slow
+        # The signal line starts at MACD's first valid value
+        if self.macd == self.macd:
+            self.macd_signal = self.signal.update(self.macd)
+
+    def snapshot(self):
+        if self.count < self.min_history:
+            return None
+
+        def safe_float(x, fallback=0.0):
+            return float(x) if x == x else fallback
+
+        return {
+            'price': safe_float(self.price),
+            'sma_20': safe_float(self.sma_20.value),
+            'sma_50': safe_float(self.sma_50.value),
+            'rsi': safe_float(self.rsi),
+            'macd': safe_float(self.macd),
+            'macd_signal': safe_float(self.macd_signal),
+            'macd_hist': safe_float(self.macd - self.macd_signal),
+        }
+
+
+class StreamingIndicatorEngine:
+    """
+    Keeps an IndicatorState per symbol. Each symbol is warmed once from a
+    price list, then kept current one tick at a time from the price buffer.
+    """
+
+    def __init__(self, min_history=50):
+        self.min_history = min_history
+        self._states = {}
+        # symbol -> (epoch seconds, price) of the newest tick in the open
+        # candle, when state advances per candle (attach_candles)
+        self._provisional = {}
+        self._lock = threading.Lock()
+
+    def warm(self, symbol, prices):
+        state = IndicatorState(self.min_history)
+        for price in prices:
+            state.update(price)
+        with self._lock:
+            self._states[symbol.upper()] = state
+            return self._snapshot_locked(symbol.upper())
+
+    def warm_many(self, histories: dict) -> dict:
+        """
+        Warms every {symbol: prices} in one vectorised pass instead of a
+        Python loop per symbol. Returns {symbol: snapshot} for the symbols
+        with enough history; shorter ones are left cold.
+        """
+        symbols, matrix, _ = build_price_matrix(histories)
+        if not symbols:
+            return {}
+        result = batch_indicators(matrix, self.min_history)
+
+        states = {}
+        for row, symbol in enumerate(symbols):
+            if result["ok"][row]:
+                states[symbol.upper()] = IndicatorState.from_batch(
+                    result, row, histories[symbol], self.min_history)
+        with self._lock:
+            self._states.update(states)
+            return {
+                symbol: self._snapshot_locked(symbol.upper())
+                for symbol in symbols if symbol.upper() in states
+            }
+
+    def has(self, symbol) -> bool:
+        return symbol.upper() in self._states
+
+    def update(self, symbol, price):
+        with self._lock:
+            state = self._states.get(symbol.upper())
+            if state is None:
+                return None
+            state.update(price)
+            return state.snapshot()
+
+    def _snapshot_locked(self, symbol):
+        state = self._states.get(symbol)
+        if state is None:
+            return None
+        pending = self._provisional.get(symbol)
+        if pending is None:
+            return state.snapshot()
+        # Include the still-open candle by applying its latest price to a
+        # throwaway copy; the real state advances when the candle closes
+        trial = copy.deepcopy(state)
+        trial.update(pending[1])
+        return trial.snapshot()
+
+    def snapshot(self, symbol):
+        with self._lock:
+            return self._snapshot_locked(symbol.upper())
+
+    def reset(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                self._states.clear()
+                self._provisional.clear()
+            else:
+                self._states.pop(symbol.upper(), None)
+                self._provisional.pop(symbol.upper(), None)
+
+    def attach(self, store):
+        """
+        Subscribes to a PriceBufferStore so every logged price updates state.
+        """
+        store.add_listener(lambda symbol, timestamp, price, volume: self.update(symbol, price))
+
+    def set_provisional(self, symbol, timestamp, price):
+        """
+        Records the latest price of the open candle; snapshots include it
+        without advancing the state.
+        """
+        if price is None:
+            return
+        with self._lock:
+            self._provisional[symbol.upper()] = (to_epoch(timestamp), float(price))
+
+    def close_candle(self, symbol, bucket, interval, close):
+        """
+        Advances state by one closed candle, dropping the provisional price
+        if it belonged to that candle (or an earlier one).
+        """
+        symbol = symbol.upper()
+        with self._lock:
+            state = self._states.get(symbol)
+            if state is not None:
+                state.update(close)
+            pending = self._provisional.get(symbol)
+            if pending is not None and pending[0] < bucket + interval:
+                del self._provisional[symbol]
+
+    def attach_candles(self, candles, resolution, buffers=None):
+        """
+        Advances state once per closed `resolution` candle of a CandleStore
+        instead of once per tick, so every indicator spans a fixed number
+        of intervals. With a PriceBufferStore, each tick also becomes the
+        open candle's provisional close, so snapshots include the newest
+        price.
+        """
+        interval = candles.resolutions[resolution]
+
+        def on_candle(symbol, res, candle):
+            if res == resolution:
+                self.close_candle(symbol, candle[0], interval, candle[4])
+
+        candles.add_listener(on_candle)
+        if buffers is not None:
+            buffers.add_listener(lambda symbol, timestamp, price, volume: self.set_provisional(symbol, timestamp, price))
+
+
+# Shared by IndicatorCalculator instances and fed from price_buffer.price_buffers
+indicator_engine = StreamingIndicatorEngine()
@@ -1,17 +1,21 @@
 # jkupiter_swapper.py
 
-import requests
+import asyncio
 import base64
 import os
 import json
 import traceback
-from solana.rpc.api import Client
+from async_clients import get_http_client, get_rpc_client
+from account_cache import account_cache, is_missing_account_error
+from blockhash_service import blockhash_service
+from confirmation_tracker import confirmation_tracker
+from quote_service import SOL_MINT, quote_service
+from tx_builder import AtaTransactionBuilder, build_signed_transaction, create_ata_instruction, derive_ata
 from solana.rpc.types import TxOpts
 from solders.transaction import VersionedTransaction as SoldersVTxn
 from solders.keypair import Keypair as SoldersKeypair
 from solders.message import to_bytes_versioned
 from solders.pubkey import Pubkey
-from spl.token.instructions import get_associated_token_address, create_associated_token_account
 from spl.token.constants import TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID
 from solders.account import Account
 # from solders.program_id import ProgramId
@@ -25,16 +29,34 @@ class JupiterSwapper:
     def __init__(self, keypair): # Before: (self, executor)
         # self.executor = executor
         self.keypair = keypair
-        self.client = Client(os.getenv("SOLANA_RPC_URL"))
+        # Shared async clients are created on first use inside the event loop
+        self._client = None
+        self.account_cache = account_cache
 
         # key_json = json.loads(os.getenv("PRIVATE_KEY_JSON"))
         self.wallet = SoldersKeypair.from_bytes(bytes(self.keypair))
+        self.blockhash_service = blockhash_service
+        self.confirmations = confirmation_tracker
+        self.tx_builder = AtaTransactionBuilder(self.wallet, self.blockhash_service, self.account_cache)
         self.api_key = os.getenv("JUPITER_API_KEY")
 
         self.headers = {}
         if self.api_key:
             self.headers["Authorization"] = f"Bearer {self.api_key}"
 
+        # Quotes (URL, timeout, cache) live in the shared quote service
+        self.quotes = quote_service
+        self.swap_url = os.getenv("JUPITER_SWAP_URL", "https://lite-api.jup.ag/swap/v1/swap") # Before: swap_url = "https://quote-api.jup.ag/v6/swap"
+        self.swap_timeout = float(os.getenv("JUPITER_SWAP_TIMEOUT", 10))
+
+    @property
+    def client(self):
+        return self._client or get_rpc_client()
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+
 
     async def execute_swap(self, token, decision):
         symbol = token['symbol']
@@ -45,33 +67,25 @@ class JupiterSwapper:
         # print(f"[JupyterSwapper] Preparing swap: SOL -> {symbol}")
 
         try:
-            output_mint_pubkey = Pubkey(token["address"])
+            output_mint_pubkey = Pubkey.from_string(token["address"])
             user_pubkey = self.wallet.pubkey()
 
-            # Pass token tags to ATA creation function
-            destination_ata = await self._ensure_associated_token_account(
-                output_mint_pubkey,
-                user_pubkey,
-                token_tags=token.get("tags")
-            )
-            
             if decision['amount'] <= 0:
                 print(f"[JupyterSwapper] Invalid swap amount {decision['amount']} for {symbol}. Skipping")
 
-            quote_url = "https://lite-api.jup.ag/swap/v1/quote" #Before: quote_url = "https://quote-api.jup.ag/v6/quote"
-            
-            params = {
-                "inputMint": 'So11111111111111111111111111111111111111112',
-                "outputMint": token["address"],
-                "amount": int(decision["amount"] * 1e9),
-                "slippageBps": 50,
-                "swapMode": 'ExactIn',
-                "onlyDirectRoutes": "false",
-                "restrictIntermediateTokens": "false"
-            }
-
-            quote_res = requests.get(quote_url, params=params)
-            quote = quote_res.json()
+            http = get_http_client()
+            # The ATA check (or pre-signed creation) and the quote are
+            # independent, so they share one round trip's worth of time.
+            # The quote is usually already cached from candidate comparison.
+            destination_ata, quote = await asyncio.gather(
+                # Pass token tags to ATA creation function
+                self._ensure_associated_token_account(
+                    output_mint_pubkey,
+                    user_pubkey,
+                    token_tags=token.get("tags")
+                ),
+                self.quotes.quote(SOL_MINT, token["address"], int(decision["amount"] * 1e9), slippage_bps=50, exact=True),
+            )
 
             if "routePlan" not in quote:
                 print(f"[JupyterSwapper] No valid swap routes. Response:\n{quote}")
@@ -90,7 +104,6 @@ class JupiterSwapper:
                 "platformFee": quote["platformFee"],
             }
             
-            swap_url = "https://lite-api.jup.ag/swap/v1/swap" # Before: swap_url = "https://quote-api.jup.ag/v6/swap"
             swap_req = {
                 "quoteResponse": quote,
                 "userPublicKey": str(self.wallet.pubkey()),
@@ -107,7 +120,8 @@ class JupiterSwapper:
                 }
             }
 
-            swap_data = requests.post(swap_url, json=swap_req).json()
+            swap_res = await http.post(self.swap_url, json=swap_req, timeout=self.swap_timeout)
+            swap_data = swap_res.json()
             # print(f"[JupiterSwapper] Swap response:\n{swap_data}")
 
             if not swap_data.get("swapTransaction"):
@@ -124,9 +138,17 @@ class JupiterSwapper:
 
             txn.signatures = [signed_txn]
 
-            result = self.client.send_raw_transaction(
-                bytes(txn), opts=TxOpts(skip_confirmation=False)
-            )
+            try:
+                # Return as soon as the RPC accepts it; callers track the
+                # signature through self.confirmations
+                result = await self.client.send_raw_transaction(
+                    bytes(txn), opts=TxOpts(skip_confirmation=True)
+                )
+            except Exception as e:
+                # A cached ATA that no longer exists: re-check it next time
+                if is_missing_account_error(e):
+                    self.account_cache.invalidate(user_pubkey, output_mint_pubkey)
+                raise
             # print(f"[JupiterSwapper] Swap submitted: {result}")
 
             return result.value
@@ -146,7 +168,7 @@ class JupiterSwapper:
         This determines if it's a legacy SPL token or SPL Token 2022
         """
         try:
-            account_info = self.client.get_account_info(mint_address).value
+            account_info = (await self.client.get_account_info(mint_address)).value
             if account_info is None:
                 raise ValueError(f"Mint account {mint_address} not found.")
             
@@ -164,15 +186,25 @@ class JupiterSwapper:
         dynamically determining the correct SPL token Program ID.
         """
 
+        # Confirmed earlier: no RPC round trips needed
+        cached_ata = self.account_cache.get_ata(owner_address, mint_address)
+        if cached_ata is not None:
+            return cached_ata
+
         # Determine the correct token program ID
         target_token_program_id = TOKEN_PROGRAM_ID # Default to legacy
-        if token_tags and 'token-2022' in token_tags:
+        cached_program = self.account_cache.get_program(mint_address)
+        if cached_program is not None:
+            target_token_program_id = cached_program
+        elif token_tags and 'token-2022' in token_tags:
             target_token_program_id = TOKEN_2022_PROGRAM_ID
             # print(f"[JupiterSwapper] Token {mint_address} identified as SPL Token 2022 via tags.")
         else:
             # If not tags provided or not token-2022 fetch from chain
             try:
                 mint_owner_program_id = await self._get_mint_program_id(mint_address)
+                if mint_owner_program_id in (TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID):
+                    self.account_cache.set_program(mint_address, mint_owner_program_id)
                 if mint_owner_program_id == TOKEN_2022_PROGRAM_ID:
                     target_token_program_id = TOKEN_2022_PROGRAM_ID
                     # print(f"[JupiterSwapper] Mint {mint_address} confirmed as SPL Token 2022 via on chain lookup.")
@@ -183,14 +215,22 @@ class JupiterSwapper:
                 print(f"[JupiterSwapper] Could not confirm token program ID on-chain for {mint_address}, defaulting to legacy: {e}")
                 target_token_program_id = TOKEN_PROGRAM_ID
 
-        ata_address = get_associated_token_address(owner_address, mint_address, target_token_program_id)
+        # Pre-signed while the agents were voting: just send it
+        prepared = self.tx_builder.take(mint_address)
+        if prepared is not None and prepared.token_program == target_token_program_id:
+            await self._send_ata_creation(prepared.tx, mint_address)
+            self.account_cache.set_ata(owner_address, mint_address, prepared.ata)
+            return prepared.ata
+
+        ata_address = derive_ata(owner_address, mint_address, target_token_program_id)
 
         # Check if ATA already exists
-        response = self.client.get_account_info(ata_address)
+        response = await self.client.get_account_info(ata_address)
         if response.value is not None:
             # Check if the existing ATA is owned by the correct program ID
             if response.value.owner == target_token_program_id:
                 # print(f"[JupiterSwapper] ATA for {mint_address} already exists at {ata_address} (Correct Program)")
+                self.account_cache.set_ata(owner_address, mint_address, ata_address)
                 return ata_address
             else:
                 # print(f"[JupiterSwapper] WARNING: ATA for {mint_address} exists at {ata_address} but owned by {response.value.owner} instead of {target_token_program_id}. This might cause issues.")
@@ -199,36 +239,72 @@ class JupiterSwapper:
         # print(f"[JupiterSwapper] Creating ATA for {mint_address} at {ata_address} with Program ID: {target_token_program_id}")
 
         # Create intruction for ATA
-        create_ata_ix = create_associated_token_account(
+        create_ata_ix = create_ata_instruction(
             payer=owner_address,
             owner=owner_address,
             mint=mint_address,
-            program_id=target_token_program_id
+            token_program=target_token_program_id
         )
 
-        # Build and send the transaction to create ATA
-        blockhash = self.client.get_latest_blockhash().value.blockhash
-        create_ata_txn = SoldersVTxn.new(
-            [create_ata_ix],
-            blockhash,
-            self.wallet.pubkey(),
-            [self.wallet]
-        )
+        # Build and send the transaction to create ATA; the blockhash is
+        # already on hand from the background service
+        blockhash, _ = await self.blockhash_service.get()
+        create_ata_txn = build_signed_transaction(self.wallet, [create_ata_ix], blockhash)
+        await self._send_ata_creation(create_ata_txn, mint_address)
+
+        self.account_cache.set_ata(owner_address, mint_address, ata_address)
+        return ata_address
 
-        msg_bytes_ata = to_bytes_versioned(create_ata_txn.message)
-        signed_txn_ata = self.wallet.sign_message(msg_bytes_ata)
-        create_ata_txn.signatures = [signed_txn_ata]
 
+    async def _send_ata_creation(self, create_ata_txn, mint_address):
         try:
-            ata_creation_result = self.client.send_raw_transaction(
-                bytes(create_ata_txn), opts=TxOpts(skip_confirmation=False, preflight_commitment="confirmed")
+            ata_creation_result = await self.client.send_raw_transaction(
+                bytes(create_ata_txn), opts=TxOpts(skip_confirmation=True, preflight_commitment="confirmed")
             )
             # print(f"[JupiterSwapper] ATA creation submitted: {ata_creation_result.value}")
-            # Wait for confirmation of ATA creation
-            self.client.confirm_transaction(ata_creation_result.value, commitment="confirmed")
+            # The swap needs the ATA, so wait for it here, but on the shared
+            # tracker's batched polling rather than a dedicated confirm loop
+            status = await self.confirmations.track(ata_creation_result.value)
+            if status != "confirmed":
+                raise RuntimeError(f"ATA creation {ata_creation_result.value} {status}")
             # print(f"[JupiterSwapper] ATA creation confirmed for: {mint_address}")
         except Exception as e:
             print(f"[JupiterSwapper] Failed to create ATA for {mint_address}: {e}")
             raise # Stop if fails
 
-        return ata_address
+
+    async def prefetch_accounts(self, tokens):
+        """
+        Warms the account cache for every known token with batched
+        getMultipleAccounts calls, so BUYs skip the per-trade lookups.
+        """
+        mints = []
+        for token in tokens:
+            try:
+                mints.append(Pubkey.from_string(token["address"]))
+            except (KeyError, ValueError):
+                continue
+        return await self.account_cache.prefetch(
+            self.client,
+            self.wallet.pubkey(),
+            mints,
+            derive_ata=derive_ata,
+        )
+
+    async def prepare_candidates(self, tokens):
+        """
+        Pre-signs create-ATA transactions for candidates whose ATA doesn't
+        exist yet. Meant to run alongside agent voting; errors are only
+        logged since the swap path falls back to building on demand.
+        """
+        mints = []
+        for token in tokens:
+            try:
+                mints.append(Pubkey.from_string(token["address"]))
+            except (KeyError, ValueError):
+                continue
+        try:
+            return await self.tx_builder.prepare(self.client, mints)
+        except Exception as e:
+            print(f"[JupiterSwapper] Could not pre-build ATA transactions: {e}")
+            return 0
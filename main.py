@@ -1,12 +1,25 @@
 import asyncio
 import os
+import signal
 from dotenv import load_dotenv
 from orchestrator import TraderOrchestrator
 from price_history_logger import PriceHistoryLogger
 from multi_token_trader import MultiTokenTrader
 from price_multi_logger import PriceMultiLogger
 from token_performance import TokenPerformanceTracker
-from db import initialize_tables
+from db import initialize_tables, pool_stats
+from db_writer import shutdown_writer
+from price_buffer import price_buffers
+from price_store import price_store
+from candles import candle_store
+from indicator_engine import indicator_engine
+from market_data_client import market_data
+from async_clients import close_async_clients
+from token_scanner import token_list
+from blockhash_service import blockhash_service
+from confirmation_tracker import confirmation_tracker
+from metrics_queries import refresh_daily_rollup
+from migrations import top_up_price_partitions
 # from external_indicator_calculator import IndicatorCalculator
 import traceback
 import psutil
@@ -28,7 +41,73 @@ def log_memory():
     mem_mb = process.memory_info().rss / 1024 / 1024
     print(f"[MEMORY] RSS: {mem_mb:.2f} MB")
 
+def log_pool_stats():
+    stats = pool_stats()
+    print(f"[DBPool] in_use={stats['in_use']} idle={stats['idle']} created={stats['created']} waits={stats['waits']} wait_time={stats['wait_time']}s")
+
+def log_agent_latency(ensemble):
+    for name, stats in ensemble.latency_stats().items():
+        print(f"[Agents] {name}: calls={stats['calls']} avg={stats['avg_ms']}ms max={stats['max_ms']:.1f}ms timeouts={stats['timeouts']} errors={stats['errors']}")
+
+def log_market_data_stats():
+    stats = market_data.stats()
+    print(f"[MarketData] requests={stats['requests']} coalesced={stats['coalesced']} throttled={stats['throttled']} retries={stats['retries']} errors={stats['errors']} avg_latency={stats['avg_latency']}s queued={stats['queued']}")
+
+def refresh_metrics():
+    try:
+        rows = refresh_daily_rollup()
+        print(f"[Metrics] Daily rollup refreshed ({rows} rows)")
+    except Exception as e:
+        print(f"[Metrics] Daily rollup refresh failed: {e}")
+
+def maintain_partitions():
+    # A few catalog lookups when nothing is missing; keeps a daemon that
+    # runs for months from writing past the last price_history partition
+    try:
+        top_up_price_partitions()
+    except Exception as e:
+        print(f"[Runner] Partition top-up failed: {e}")
+
+def attach_indicator_feed(buffers=price_buffers, candles=candle_store, engine=indicator_engine, interval=None):
+    """
+    Indicators advance once per closed candle of INDICATOR_CANDLE_INTERVAL,
+    with the open candle's latest price applied provisionally ("tick":
+    once per logged price, as before). Returns True in candle mode.
+    """
+    interval = interval or os.getenv("INDICATOR_CANDLE_INTERVAL", "5m")
+    candles.attach(buffers)
+    if interval in candles.resolutions:
+        engine.attach_candles(candles, interval, buffers)
+        return True
+    if interval != "tick":
+        print(f"[Runner] INDICATOR_CANDLE_INTERVAL={interval} is not in CANDLE_INTERVALS; using ticks")
+    engine.attach(buffers)
+    return False
+
+def record_prices(price_logger, candles=candle_store, now=None):
+    # Closes every candle that has ended; the one holding the prices just
+    # logged stays open and reaches indicators as a provisional close
+    price_logger.fetch_and_log_all()
+    candles.close_due(now)
+
+async def record_prices_off_loop(price_logger, candles=candle_store):
+    # CoinGecko calls back off with time.sleep between retries, so the whole
+    # fetch runs on a worker thread; trade evaluation still waits for it
+    await asyncio.get_running_loop().run_in_executor(None, record_prices, price_logger, candles)
+
 async def main():
+    # SIGTERM (docker stop) cancels the loop so queued DB writes get flushed below
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    try:
+        await run()
+    finally:
+        print("[Runner] Flushing pending DB writes...")
+        shutdown_writer()
+        await blockhash_service.stop()
+        await confirmation_tracker.stop()
+        await close_async_clients()
+
+async def run():
     initialize_tables()
     load_dotenv()
     interval = int(os.getenv("POLL_INTERVAL", 300)) # run every 5 mins
@@ -45,6 +124,11 @@ async def main():
         top_symbols = ['SOL']
 
     price_logger = PriceMultiLogger(top_symbols)
+    use_store = os.getenv("PRICE_STORE_WARM", "False").lower() == "true"
+    price_buffers.warm(top_symbols, store=price_store if use_store else None)
+
+    if attach_indicator_feed():
+        candle_store.warm(top_symbols)
 
     multitoken = MultiTokenTrader(
         market_fetcher=orchestrator.market_fetcher,
@@ -53,14 +137,22 @@ async def main():
         risk=orchestrator.risk,
         keypair=orchestrator.keypair
     )
+    blockhash_service.start()
+    try:
+        await multitoken.swapper.prefetch_accounts(token_list.tokens())
+    except Exception as e:
+        print(f"[Runner] Account prefetch failed, continuing with on-demand lookups: {e}")
     
     await orchestrator.run_cycle()
 
     while True:
         try:
             log_memory()
+            log_pool_stats()
+            log_agent_latency(orchestrator.agent_ensemble)
+            log_market_data_stats()
             print("\n--- [Cycle Start] ---")
-            price_logger.fetch_and_log_all()
+            await record_prices_off_loop(price_logger)
 
             trade_executed = await multitoken.evaluate_and_trade_top_tokens()
 
@@ -68,6 +160,8 @@ async def main():
             if not trade_executed and enable_fallback:
                 await orchestrator.run_cycle()
 
+            refresh_metrics()
+            maintain_partitions()
             print("--- [Cycle Complete] ---\n")
         except Exception as e:
             print(f"[Runner] Error during run_cycle: {e}")
@@ -81,5 +175,5 @@ async def main():
 if __name__ == "__main__":
     try:
         asyncio.run(main())
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, asyncio.CancelledError):
             print("\n[Runner] Exiting.")
\ No newline at end of file
@@ -0,0 +1,189 @@
+# market_data_client.py
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+import requests
+from pycoingecko import CoinGeckoAPI
+from rate_limiter import TokenBucket
+
+# Priority lanes: when callers are queued on the rate limit, lower goes first
+LIVE = 0
+BACKFILL = 1
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _status_code(exc):
+    """
+    HTTP status behind a pycoingecko error. It raises ValueError(body) from
+    inside the HTTPError handler, so the response hangs off __context__.
+    """
+    while exc is not None:
+        response = getattr(exc, "response", None)
+        if response is not None:
+            return response.status_code
+        exc = exc.__context__
+    return None
+
+
+class MarketDataClient:
+    """
+    One CoinGecko client for the whole process. Every call waits on a
+    shared token bucket (live callers are served before backfill), retries
+    429/5xx and connection errors with jittered exponential backoff, and
+    identical calls already in flight share a single request.
+    """
+
+    def __init__(self, cg=None, calls_per_minute=None, burst=None, max_retries=None,
+                 base_backoff=None, max_backoff=60.0):
+        # Retries are handled here, not by pycoingecko's urllib3 adapter
+        self.cg = cg or CoinGeckoAPI(retries=0)
+        self.bucket = TokenBucket(
+            rate=(calls_per_minute or float(os.getenv("COINGECKO_CALLS_PER_MINUTE", 25))) / 60,
+            capacity=burst or float(os.getenv("COINGECKO_BURST", 5))
+        )
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("COINGECKO_MAX_RETRIES", 4))
+        self.base_backoff = base_backoff or float(os.getenv("COINGECKO_BACKOFF", 2.0))
+        self.max_backoff = max_backoff
+
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._seq = itertools.count()
+        # Set after a 429 so every lane pauses, not just the caller that hit it
+        self._blocked_until = 0.0
+
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0, "coalesced": 0, "throttled": 0, "retries": 0, "errors": 0,
+            "latency_total": 0.0, "latency_max": 0.0, "queue_wait_total": 0.0,
+        }
+
+    def _count(self, **deltas):
+        with self._stats_lock:
+            for key, value in deltas.items():
+                self._stats[key] += value
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with self._cond:
+            stats["queued"] = len(self._waiting)
+        stats["avg_latency"] = round(stats["latency_total"] / stats["requests"], 4) if stats["requests"] else 0.0
+        return stats
+
+    def _acquire_slot(self, priority):
+        started = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    is_next = self._waiting[0] == ticket
+                    if is_next and now >= self._blocked_until and self.bucket.try_acquire():
+                        heapq.heappop(self._waiting)
+                        self._cond.notify_all()
+                        break
+                    if now < self._blocked_until:
+                        wait = self._blocked_until - now
+                    elif is_next:
+                        wait = self.bucket.time_until()
+                    else:
+                        wait = None  # woken when the head of the queue is served
+                    self._cond.wait(wait)
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+        self._count(queue_wait_total=time.monotonic() - started)
+
+    def _backoff(self, attempt):
+        delay = min(self.max_backoff, self.base_backoff * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _call_with_retries(self, method, args, kwargs, priority):
+        attempt = 0
+        while True:
+            self._acquire_slot(priority)
+            started = time.monotonic()
+            try:
+                result = getattr(self.cg, method)(*args, **kwargs)
+            except Exception as e:
+                elapsed = time.monotonic() - started
+                status = _status_code(e)
+                retryable = (
+                    status == 429
+                    or (status is not None and status >= 500)
+                    or isinstance(e, (requests.ConnectionError, requests.Timeout))
+                )
+                self._count(requests=1, latency_total=elapsed, throttled=int(status == 429))
+                if not retryable or attempt >= self.max_retries:
+                    self._count(errors=1)
+                    raise
+
+                delay = self._backoff(attempt)
+                if status == 429:
+                    with self._cond:
+                        self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+                        self._cond.notify_all()
+                print(f"[MarketData] {method} failed ({status or type(e).__name__}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                self._count(retries=1)
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            elapsed = time.monotonic() - started
+            self._count(requests=1, latency_total=elapsed)
+            with self._stats_lock:
+                self._stats["latency_max"] = max(self._stats["latency_max"], elapsed)
+            return result
+
+    def request(self, method, *args, priority=LIVE, **kwargs):
+        """
+        Calls CoinGeckoAPI.<method>(*args, **kwargs) under the shared limit.
+        """
+        key = (method, _freeze(args), _freeze(kwargs))
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            self._count(coalesced=1)
+            return future.result()
+
+        try:
+            result = self._call_with_retries(method, args, kwargs, priority)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def get_price(self, ids, vs_currencies, priority=LIVE, **kwargs):
+        return self.request("get_price", ids=ids, vs_currencies=vs_currencies, priority=priority, **kwargs)
+
+    def get_coin_market_chart_by_id(self, id, vs_currency, days, priority=LIVE, **kwargs):
+        return self.request("get_coin_market_chart_by_id", id=id, vs_currency=vs_currency, days=days,
+                            priority=priority, **kwargs)
+
+
+# Shared by RealMarketDataFetcher, PriceHistoryLogger and the backfill scripts
+market_data = MarketDataClient()
@@ -0,0 +1,195 @@
+# metrics_queries.py
+from datetime import datetime, timedelta, timezone
+from db import get_connection
+from db_writer import flush_writes
+
+# UTC calendar day of a trade; matches how PositionLedger buckets days
+_TRADE_DAY = "(timestamp AT TIME ZONE 'UTC')::date"
+
+# Trades that actually executed: failed and expired swaps moved no funds
+_EXECUTED = "(tx_status IS NULL OR tx_status NOT IN ('failed', 'expired'))"
+
+# rollup_watermarks row for trade_daily_rollup
+_ROLLUP = "trade_daily_rollup"
+
+
+def _utc_day_bounds(day=None):
+    day = day or datetime.now(timezone.utc).date()
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def _query(sql, params=(), flush=True):
+    # Trades may still be sitting in the write-behind queue
+    if flush:
+        flush_writes()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def daily_realized_loss(day=None) -> float:
+    """
+    Realized loss for one UTC day (today by default), summed in Postgres
+    over an indexed timestamp range. 0.0 on a net-positive day.
+    """
+    start, end = _utc_day_bounds(day)
+    rows = _query(f"""
+        SELECT coalesce(sum(pnl), 0)
+        FROM trades
+        WHERE timestamp >= %s AND timestamp < %s AND pnl IS NOT NULL
+          AND {_EXECUTED}
+    """, (start, end))
+    return max(0.0, -float(rows[0][0]))
+
+
+def recent_performance(window=10):
+    """
+    avg_pnl / avg_return / win_rate over the last `window` closed trades,
+    or None if there are none. Served by trades_closed_timestamp_idx.
+    """
+    rows = _query(f"""
+        SELECT count(*), avg(pnl), avg(return_pct), avg(CASE WHEN pnl > 0 THEN 1.0 ELSE 0.0 END)
+        FROM (
+            SELECT pnl, return_pct
+            FROM trades
+            WHERE pnl IS NOT NULL AND {_EXECUTED}
+            ORDER BY timestamp DESC
+            LIMIT %s
+        ) recent
+    """, (window,))
+    count, avg_pnl, avg_return, win_rate = rows[0]
+    if not count:
+        return None
+    return {
+        "trades": count,
+        "avg_pnl": round(float(avg_pnl), 4),
+        "avg_return": round(float(avg_return or 0.0), 4),
+        "win_rate": round(float(win_rate), 2),
+    }
+
+
+def pnl_by_symbol(since=None, limit=None):
+    """
+    [(symbol, realized_pnl, closed_trades)] best first, optionally only
+    for trades at or after `since`.
+    """
+    sql = """
+        SELECT symbol, sum(pnl) AS total_pnl, count(*)
+        FROM trades
+        WHERE pnl IS NOT NULL
+    """
+    params = []
+    if since is not None:
+        sql += " AND timestamp >= %s"
+        params.append(since)
+    sql += " GROUP BY symbol ORDER BY total_pnl DESC"
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    return [(symbol, float(pnl), count) for symbol, pnl, count in _query(sql, params)]
+
+
+def daily_pnl(days=7):
+    """
+    [(day, realized_pnl, closed, wins, trades)] for the last `days` UTC
+    days, aggregated straight from trades.
+    """
+    start, _ = _utc_day_bounds(datetime.now(timezone.utc).date() - timedelta(days=days - 1))
+    rows = _query(f"""
+        SELECT {_TRADE_DAY} AS day,
+               coalesce(sum(pnl), 0),
+               count(pnl),
+               count(*) FILTER (WHERE pnl > 0),
+               count(*)
+        FROM trades
+        WHERE timestamp >= %s
+        GROUP BY day
+        ORDER BY day
+    """, (start,))
+    return [tuple(row) for row in rows]
+
+
+def refresh_daily_rollup(full=False) -> int:
+    """
+    Re-aggregates trade_daily_rollup for every UTC day that has a trade
+    inserted since the last refresh (by trades.id, so late or backfilled
+    trades for old days are picked up too) or a swap that has since
+    failed or expired (rollup_dirty_days), or every day with full=True.
+    Failed and expired swaps are left out. Returns the number of
+    (day, symbol) rows written.
+    """
+    flush_writes()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        # The row lock keeps two refreshes from interleaving
+        cursor.execute("SELECT last_id FROM rollup_watermarks WHERE name = %s FOR UPDATE", (_ROLLUP,))
+        found = cursor.fetchall()
+        watermark = 0 if full or not found else found[0][0]
+
+        cursor.execute(f"""
+            SELECT max(id), array_agg(DISTINCT {_TRADE_DAY})
+            FROM trades
+            WHERE id > %s
+        """, (watermark,))
+        high, days = cursor.fetchall()[0]
+        # Drained in this transaction, so a failed refresh leaves them queued
+        cursor.execute("DELETE FROM rollup_dirty_days RETURNING day")
+        days = sorted(set(days or ()) | {day for (day,) in cursor.fetchall()})
+        if not days:
+            conn.commit()
+            return 0
+
+        # Cleared first: a day whose trades all failed has nothing to re-insert
+        cursor.execute("DELETE FROM trade_daily_rollup WHERE day = ANY(%s)", (days,))
+        # One indexed timestamp range per affected day
+        ranges = [bound for day in days for bound in _utc_day_bounds(day)]
+        where = " OR ".join(["(timestamp >= %s AND timestamp < %s)"] * len(days))
+        cursor.execute(f"""
+            INSERT INTO trade_daily_rollup
+                (day, symbol, trades, closed, wins, realized_pnl, buy_volume, sell_volume, updated_at)
+            SELECT {_TRADE_DAY} AS day,
+                   coalesce(symbol, 'UNKNOWN'),
+                   count(*),
+                   count(pnl),
+                   count(*) FILTER (WHERE pnl > 0),
+                   coalesce(sum(pnl), 0),
+                   coalesce(sum(amount * price) FILTER (WHERE action = 'BUY'), 0),
+                   coalesce(sum(amount * price) FILTER (WHERE action = 'SELL'), 0),
+                   now()
+            FROM trades
+            WHERE ({where}) AND {_EXECUTED}
+            GROUP BY 1, 2
+            ON CONFLICT (day, symbol) DO UPDATE SET
+                trades = EXCLUDED.trades,
+                closed = EXCLUDED.closed,
+                wins = EXCLUDED.wins,
+                realized_pnl = EXCLUDED.realized_pnl,
+                buy_volume = EXCLUDED.buy_volume,
+                sell_volume = EXCLUDED.sell_volume,
+                updated_at = EXCLUDED.updated_at
+        """, ranges)
+        written = cursor.rowcount
+        if high is not None:
+            cursor.execute("""
+                INSERT INTO rollup_watermarks (name, last_id) VALUES (%s, %s)
+                ON CONFLICT (name) DO UPDATE SET last_id = EXCLUDED.last_id, updated_at = now()
+            """, (_ROLLUP, high))
+        conn.commit()
+    return written
+
+
+def rollup_daily_pnl(days=7):
+    """
+    Same shape as daily_pnl(), read from the rollup table.
+    """
+    start = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    rows = _query("""
+        SELECT day, sum(realized_pnl), sum(closed), sum(wins), sum(trades)
+        FROM trade_daily_rollup
+        WHERE day >= %s
+        GROUP BY day
+        ORDER BY day
+    """, (start,), flush=False)
+    return [tuple(row) for row in rows]
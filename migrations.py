@@ -0,0 +1,322 @@
+# migrations.py
+import os
+from datetime import datetime, timezone
+from db import get_connection
+
+# Arbitrary key for pg_advisory_xact_lock so two processes starting at
+# once don't both try to apply the same migration
+MIGRATION_LOCK_ID = 827361
+
+# Catches price_history rows no monthly partition covers yet
+DEFAULT_PARTITION = "price_history_default"
+
+
+def _month_start(dt):
+    # Partitions are cut on UTC month boundaries; naive datetimes are UTC
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
+
+
+def _next_month(dt):
+    return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def price_partition_bounds(dt):
+    """
+    (name, start, end) of the monthly price_history partition holding `dt`.
+    """
+    start = _month_start(dt)
+    return f"price_history_{start:%Y_%m}", start, _next_month(start)
+
+
+def missing_price_partitions(cursor, timestamps):
+    """
+    Month starts, oldest first, of the months `timestamps` fall in that
+    have no price_history partition yet. Only reads the catalog, so it is
+    cheap to call on every write without taking any lock.
+    """
+    missing = []
+    for month in sorted({_month_start(ts) for ts in timestamps if ts is not None}):
+        cursor.execute("SELECT to_regclass(%s) IS NULL", (price_partition_bounds(month)[0],))
+        if cursor.fetchall()[0][0]:
+            missing.append(month)
+    return missing
+
+
+def create_price_partition(cursor, month_start):
+    """
+    Creates the monthly price_history partition covering `month_start`,
+    unless it exists. Rows that already landed in the DEFAULT partition
+    for that month are moved into the new table before it is attached
+    (Postgres refuses to attach a range the DEFAULT partition still
+    holds rows for). Takes the migration lock until the caller's
+    transaction ends, so check missing_price_partitions() first and
+    commit soon after. Returns True if a partition was created.
+    """
+    name, start, end = price_partition_bounds(month_start)
+    # Serialises with migrations and other writers creating the same
+    # month; the check is repeated under the lock
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL, to_regclass(%s) IS NOT NULL", (name, DEFAULT_PARTITION))
+    exists, has_default = cursor.fetchall()[0]
+    if exists:
+        return False
+
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    if not has_default:
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF price_history FOR VALUES {bounds}")
+        return True
+
+    cursor.execute(f"CREATE TABLE {name} (LIKE price_history INCLUDING DEFAULTS)")
+    cursor.execute(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE timestamp >= %s AND timestamp < %s
+            RETURNING timestamp, symbol, price, volume
+        )
+        INSERT INTO {name} (timestamp, symbol, price, volume)
+        SELECT timestamp, symbol, price, volume FROM moved
+    """, (start, end))
+    moved = cursor.rowcount
+    cursor.execute(f"ALTER TABLE price_history ATTACH PARTITION {name} FOR VALUES {bounds}")
+    if moved and moved > 0:
+        print(f"[Migrations] Moved {moved} rows from {DEFAULT_PARTITION} into {name}")
+    return True
+
+
+def ensure_price_partitions(cursor, months_ahead=None):
+    """
+    Creates partitions for this month and the next `months_ahead`
+    (PRICE_PARTITION_MONTHS_AHEAD, default 2). Returns the number created.
+    """
+    if months_ahead is None:
+        months_ahead = int(os.getenv("PRICE_PARTITION_MONTHS_AHEAD", 2))
+    months = [_month_start(datetime.now(timezone.utc))]
+    for _ in range(months_ahead):
+        months.append(_next_month(months[-1]))
+    return sum(create_price_partition(cursor, month) for month in missing_price_partitions(cursor, months))
+
+
+def top_up_price_partitions():
+    """
+    Committed ensure_price_partitions() on its own connection, for the
+    daemon to call periodically so a long-running process never writes
+    past the last partition. Returns False if it failed.
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            ensure_price_partitions(cursor)
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            print(f"[Migrations] Could not create upcoming price_history partitions: {e}")
+            return False
+
+
+def _partition_legacy_price_history(cursor):
+    cursor.execute("SELECT min(timestamp), max(timestamp) FROM price_history_legacy")
+    first, last = cursor.fetchall()[0]
+    if first is None:
+        return
+
+    month = _month_start(first)
+    while month <= last:
+        create_price_partition(cursor, month)
+        month = _next_month(month)
+
+
+MIGRATIONS = [
+    (1, "baseline tables", [
+        """
+        CREATE TABLE IF NOT EXISTS trades (
+            timestamp TIMESTAMPTZ,
+            action TEXT,
+            amount FLOAT,
+            price FLOAT,
+            confidence FLOAT,
+            symbol TEXT,
+            tx_sig TEXT,
+            pnl FLOAT,
+            Return_pct FLOAT,
+            sentiment FLOAT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS agent_votes (
+            timestamp TIMESTAMPTZ,
+            agent TEXT,
+            action TEXT,
+            amount FLOAT,
+            confidence FLOAT,
+            symbol TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS price_history (
+            timestamp TIMESTAMPTZ,
+            symbol TEXT,
+            price FLOAT,
+            volume FLOAT
+        )
+        """,
+    ]),
+    (2, "partition price_history by month with a (symbol, timestamp) key", [
+        "ALTER TABLE price_history RENAME TO price_history_legacy",
+        # The key doubles as the covering index for the per-cycle
+        # "last N prices for a symbol" query (index-only backward scan)
+        """
+        CREATE TABLE price_history (
+            timestamp TIMESTAMPTZ NOT NULL,
+            symbol TEXT NOT NULL,
+            price FLOAT,
+            volume FLOAT,
+            PRIMARY KEY (symbol, timestamp) INCLUDE (price, volume)
+        ) PARTITION BY RANGE (timestamp)
+        """,
+        "CREATE TABLE price_history_default PARTITION OF price_history DEFAULT",
+        _partition_legacy_price_history,
+        ensure_price_partitions,
+        # Duplicate ticks collapse to one row per (symbol, timestamp)
+        """
+        INSERT INTO price_history (timestamp, symbol, price, volume)
+        SELECT DISTINCT ON (symbol, timestamp) timestamp, symbol, price, volume
+        FROM price_history_legacy
+        WHERE symbol IS NOT NULL AND timestamp IS NOT NULL
+        ORDER BY symbol, timestamp
+        """,
+        "DROP TABLE price_history_legacy",
+    ]),
+    (3, "keys and indexes for trades and agent_votes", [
+        "ALTER TABLE trades ADD COLUMN IF NOT EXISTS id BIGSERIAL PRIMARY KEY",
+        "CREATE INDEX IF NOT EXISTS trades_timestamp_idx ON trades (timestamp)",
+        "CREATE INDEX IF NOT EXISTS trades_symbol_timestamp_idx ON trades (symbol, timestamp)",
+        # PerformanceMonitor: last N closed trades
+        """
+        CREATE INDEX IF NOT EXISTS trades_closed_timestamp_idx
+        ON trades (timestamp DESC) INCLUDE (pnl, return_pct, confidence)
+        WHERE pnl IS NOT NULL
+        """,
+        "CREATE INDEX IF NOT EXISTS agent_votes_symbol_timestamp_idx ON agent_votes (symbol, timestamp)",
+    ]),
+    (4, "transaction confirmation status on trades", [
+        # NULL for trades logged before confirmation tracking existed
+        "ALTER TABLE trades ADD COLUMN IF NOT EXISTS tx_status TEXT",
+        "CREATE INDEX IF NOT EXISTS trades_tx_sig_idx ON trades (tx_sig)",
+    ]),
+    (5, "daily trade rollup", [
+        # Refreshed by metrics_queries.refresh_daily_rollup
+        """
+        CREATE TABLE IF NOT EXISTS trade_daily_rollup (
+            day DATE NOT NULL,
+            symbol TEXT NOT NULL,
+            trades INTEGER NOT NULL,
+            closed INTEGER NOT NULL,
+            wins INTEGER NOT NULL,
+            realized_pnl FLOAT NOT NULL,
+            buy_volume FLOAT NOT NULL,
+            sell_volume FLOAT NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (day, symbol)
+        )
+        """,
+    ]),
+    (6, "OHLCV candles", [
+        # Written by candles.CandleStore; the key serves "last N candles
+        # for a symbol at a resolution" as a backward index scan
+        """
+        CREATE TABLE IF NOT EXISTS price_candles (
+            symbol TEXT NOT NULL,
+            resolution TEXT NOT NULL,
+            bucket TIMESTAMPTZ NOT NULL,
+            open FLOAT NOT NULL,
+            high FLOAT NOT NULL,
+            low FLOAT NOT NULL,
+            close FLOAT NOT NULL,
+            volume FLOAT,
+            ticks INTEGER NOT NULL,
+            PRIMARY KEY (symbol, resolution, bucket)
+        )
+        """,
+    ]),
+    (7, "rollup watermarks", [
+        # Highest trades.id each rollup has aggregated; rows past it mark
+        # the days to re-aggregate, however old their timestamps are
+        """
+        CREATE TABLE IF NOT EXISTS rollup_watermarks (
+            name TEXT PRIMARY KEY,
+            last_id BIGINT NOT NULL,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+    ]),
+    (8, "rollup days invalidated by trade status changes", [
+        # Filled by the trade_status update when a swap fails or expires;
+        # drained by refresh_daily_rollup
+        """
+        CREATE TABLE IF NOT EXISTS rollup_dirty_days (
+            day DATE PRIMARY KEY
+        )
+        """,
+    ]),
+]
+
+
+def _apply_step(cursor, step):
+    if callable(step):
+        step(cursor)
+    else:
+        cursor.execute(step)
+
+
+def run_migrations(migrations=MIGRATIONS):
+    """
+    Applies every migration newer than the recorded schema version, each
+    in its own transaction, then tops up future price_history partitions.
+    Returns the list of versions applied.
+    """
+    applied = []
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        conn.commit()
+
+        for version, name, steps in sorted(migrations, key=lambda m: m[0]):
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+            cursor.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+            if cursor.fetchall():
+                conn.commit()
+                continue
+
+            try:
+                for step in steps:
+                    _apply_step(cursor, step)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (version, name)
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"[Migrations] Failed to apply {version} ({name}): {e}")
+                raise
+            applied.append(version)
+            print(f"[Migrations] Applied {version}: {name}")
+
+    top_up_price_partitions()
+    return applied
+
+
+def schema_version():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT coalesce(max(version), 0) FROM schema_migrations")
+        return cursor.fetchall()[0][0]
@@ -1,5 +1,6 @@
 # Extension for TraderOrchestrator to support multi-token evaluation
 import asyncio
+import os
 from token_scanner import fetch_top_tokens
 from jupiter_swapper import JupiterSwapper
 # from gdrive_logger import DriveLogger
@@ -7,6 +8,9 @@ from token_performance import TokenPerformanceTracker
 from sentiment_fetcher import SentimentSignalFetcher
 # from log_paths import get_log_path
 from real_market_data import RealMarketDataFetcher
+from confirmation_tracker import confirmation_tracker
+from quote_service import SOL_MINT, quote_service
+from db_logger import update_trade_status
 # from log_router import LogRouter
 
 
@@ -18,20 +22,83 @@ class MultiTokenTrader:
         self.risk = risk
         self.keypair = keypair
         self.swapper = JupiterSwapper(self.keypair)
+        self.confirmations = confirmation_tracker
+        self.quotes = quote_service
+        # Sizes quoted per BUY candidate, relative to the decided amount
+        factors = {float(f) for f in os.getenv("QUOTE_SIZE_FACTORS", "0.5,1,2").split(",") if f.strip()}
+        self.quote_size_factors = sorted(factors | {1.0})
+        self.max_price_impact = float(os.getenv("MAX_PRICE_IMPACT", 0.01))
+
+        # Tokens evaluated at once; each cycle takes about as long as the slowest one
+        self.concurrency = int(os.getenv("TOKEN_EVAL_CONCURRENCY", 8))
 
         self.performance_tracker = TokenPerformanceTracker()
         self.signal_fetcher = SentimentSignalFetcher()
         # self.logger = LogRouter(use_drive = True)
 
-    async def evaluate_token(self, token):
+    def _on_tx_status(self, tx_sig, status):
+        print(f"[MultiTokenTrader] Transaction {tx_sig} {status}")
+        update_trade_status(tx_sig, status)
+        self.risk.on_trade_status(tx_sig, status)
+
+    async def compare_route(self, token, decision):
+        """
+        Quotes a BUY at several sizes around the decided amount and stores
+        the price impact of each on the decision. The decided size stays in
+        the quote cache, so the swap itself doesn't re-request it.
+        """
+        if decision.get("action") != "BUY" or not decision.get("amount") or decision["amount"] <= 0:
+            return decision
+        lamports = int(decision["amount"] * 1e9)
+        sizes = [int(lamports * factor) for factor in self.quote_size_factors]
+        try:
+            ladder = await self.quotes.quote_sizes(SOL_MINT, token["address"], sizes)
+        except Exception as e:
+            print(f"[MultiTokenTrader] Could not quote {token['symbol']}: {e}")
+            return decision
+        decision["route_sizes"] = [(q["amount"], q["price_impact"]) for q in ladder]
+        for q in ladder:
+            if q["amount"] == lamports:
+                decision["price_impact"] = q["price_impact"]
+        return decision
+
+    async def precompute_indicators(self, tokens) -> dict:
+        """
+        Fetches every candidate's history concurrently on the default
+        executor, then computes all of their indicators in one batch call
+        off the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(symbol):
+            async with limit:
+                return await loop.run_in_executor(None, self.market_fetcher.fetch_price_history, symbol)
+
+        symbols = [token["symbol"] for token in tokens]
+        fetched = await asyncio.gather(*(fetch(symbol) for symbol in symbols), return_exceptions=True)
+
+        histories = {}
+        for symbol, price_data in zip(symbols, fetched):
+            if isinstance(price_data, Exception):
+                print(f"[MultiTokenTrader] Error fetching history for {symbol}: {price_data}")
+                continue
+            if not price_data or len(price_data) < 30:
+                print(f"[MultiTokenTrader] Skipping {symbol} due to limited price history.")
+                continue
+            histories[symbol] = price_data
+        return await loop.run_in_executor(None, self.indicator.compute_indicators_many, histories)
+
+    async def evaluate_token(self, token, indicators=None):
         symbol = token["symbol"]
         # print(f"[MultiTokenTrader] Evaluating {symbol}...")
 
-        price_data = self.market_fetcher.fetch_price_history(symbol)
-        if not price_data or len(price_data) < 30:
-            print(f"[MultiTokenTrader] Skipping {symbol} due to limited price history.")
+        if indicators is None:
+            price_data = self.market_fetcher.fetch_price_history(symbol)
+            if not price_data or len(price_data) < 30:
+                print(f"[MultiTokenTrader] Skipping {symbol} due to limited price history.")
 
-        indicators = self.indicator.compute_indicators(price_data)
+            indicators = self.indicator.compute_indicators(price_data, symbol=symbol)
         if not indicators:
             return None
         indicators['symbol'] = symbol
@@ -43,8 +110,9 @@ class MultiTokenTrader:
 
         decision["confidence"] = float(decision["confidence"])
 
-        # Inject sentiment
-        social = self.signal_fetcher.get_social_score(symbol)
+        # Inject sentiment (get_social_score does blocking HTTP)
+        social = await asyncio.get_running_loop().run_in_executor(
+            None, self.signal_fetcher.get_social_score, symbol)
         # onchain = self.signal_fetcher.get_onchain_popularity(token["address"])
         onchain = self.signal_fetcher.get_onchain_popularity(symbol)
         combined = 0.5 * social + 0.5 * onchain
@@ -81,50 +149,46 @@ class MultiTokenTrader:
         best_combined = 0.0
 
         self.signal_fetcher.cache_volumes(tokens)
-
-
-        for token in tokens:
-            # symbol = token["symbol"]
-            # print(f"[MultiTokenTrader] Evaluating {symbol}...")
-            try:
-                result = await self.evaluate_token(token)
-                if not result:
-                    continue
-                decision, indicators, combined = result
-
-                # price_data = self.market_fetcher.fetch_price_history(symbol)
-                # if not price_data or len(price_data) < 50:
-                #     print(f"[MultiTokenTrader] Skipping {symbol} due to limited price history.")
-                #     continue
-
-
-                # indicators = self.indicator.compute_indicators(price_data)
-                # if not indicators:
-                #     continue
-                # indicators['symbol'] = symbol
-                # decision = await self.agent_ensemble.resolve_decision(indicators)
-
-                # if decision["confidence"] is None or decision["amount"] is None:
-                #     raise ValueError(f"Agent returned incomplete action decision: {decision}")
-
-                # # Inject sentiment
-                # social = self.signal_fetcher.get_social_score(symbol)
-                # onchain = self.signal_fetcher.get_onchain_popularity(token["address"])
-                # combined = 0.5 * social + 0.5 * onchain
-                # decision["confidence"] *= (1 + combined)
-
-
-                # print(f"[MultiTokenTrader] Sentiment-adjusted confidence for {symbol}: {decision['confidence']:.2f}")
-
-
-                if decision["confidence"] > best_decision["confidence"]:
-                    best_decision = decision
-                    best_token = token
-                    best_indicators = indicators
-                    best_combined = combined
-                    
-            except Exception as e:
-                print(f"[MultiTokenTrader] Error evaluating {token['symbol']}: {e}")
+        indicators_by_symbol = await self.precompute_indicators(tokens)
+        candidates = [t for t in tokens if t["symbol"] in indicators_by_symbol]
+        limit = asyncio.Semaphore(self.concurrency)
+        # Pre-sign ATA creation for the candidates while the agents vote
+        prepare = asyncio.ensure_future(self.swapper.prepare_candidates(candidates))
+
+        async def evaluate(rank, token):
+            async with limit:
+                try:
+                    result = await self.evaluate_token(token, indicators_by_symbol[token["symbol"]])
+                    # Routes for every candidate are quoted in parallel, each
+                    # as soon as its own decision is in
+                    if result:
+                        await self.compare_route(token, result[0])
+                    return rank, token, result
+                except Exception as e:
+                    print(f"[MultiTokenTrader] Error evaluating {token['symbol']}: {e}")
+                    return rank, token, None
+
+        # Reduce as evaluations finish; on equal confidence the token listed
+        # first wins, as it did when tokens were evaluated one by one
+        best_rank = None
+        for next_done in asyncio.as_completed([evaluate(i, t) for i, t in enumerate(candidates)]):
+            rank, token, result = await next_done
+            if not result:
+                continue
+            decision, indicators, combined = result
+
+            if decision.get("price_impact", 0.0) > self.max_price_impact:
+                print(f"[MultiTokenTrader] Skipping {token['symbol']}: price impact {decision['price_impact']} at {decision['amount']} SOL")
+                continue
+            if (decision["confidence"] > best_decision["confidence"]
+                    or (decision["confidence"] == best_decision["confidence"] and best_rank is not None and rank < best_rank)):
+                best_decision = decision
+                best_token = token
+                best_indicators = indicators
+                best_combined = combined
+                best_rank = rank
+
+        await prepare
 
 
         # ✅ Fallback if nothing selected
@@ -175,6 +239,9 @@ class MultiTokenTrader:
                 # print(f"[MultiTokenTrader] Swap failed: {e}")
                 tx_sig = "-"
 
+            sent = bool(tx_sig) and tx_sig != "-"
+            if sent:
+                tx_sig = str(tx_sig)
 
             # ✅ Log trade fully
             self.risk.log_trade(
@@ -184,8 +251,12 @@ class MultiTokenTrader:
                 best_decision.get("confidence", 1.0),
                 best_indicators.get("symbol", "UNKNOWN"),
                 tx_sig,
-                best_combined
+                best_combined,
+                tx_status="submitted" if sent else None
             )
+            if sent:
+                # Status is filled in later; the loop doesn't wait for it
+                self.confirmations.track(tx_sig, callback=self._on_tx_status)
             # DriveLogger().upload_or_append("logs/trade_log.csv")
             return True
 
@@ -52,7 +52,7 @@ class TraderOrchestrator:
                 # print("[Orchestrator] Insufficient price history for SOL. Skipping cycle.")
                 return False
 
-            indicators = self.indicator.compute_indicators(price_list)
+            indicators = self.indicator.compute_indicators(price_list, symbol="SOL")
             if not indicators:
                 # print("[Orchestrator] Marklet data unavailable. Skipping cycle.")
                 return False
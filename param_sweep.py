@@ -0,0 +1,261 @@
+# param_sweep.py
+#
+# Grid or random search over agent thresholds, ensemble weights and risk
+# limits on the vectorised backtester, spread over a process pool.
+# Indicators are computed once in the parent and shared with the workers
+# through one shared-memory block; a task only carries its parameter set
+# and the bar range to score. With --train/--test every parameter set is
+# scored on rolling walk-forward windows; each window's best set on its
+# train bars is then judged on the test bars that follow.
+#
+#   python param_sweep.py --symbol SOL --workers 8 --random 500
+#   python param_sweep.py --symbol SOL --train 20000 --test 5000 --out logs/walk_forward.csv
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from indicator_batch import INDICATOR_KEYS, indicator_series
+from price_store import price_store
+from vector_backtest import DEFAULT_PARAMS, HOLD, decisions_for_params, max_drawdown, simulate_positions
+
+COLUMNS = INDICATOR_KEYS + ("ready",)
+
+# Values tried by default; any DEFAULT_PARAMS key can be swept
+DEFAULT_GRID = {
+    "rule_rsi_buy": [25.0, 30.0, 35.0],
+    "rule_rsi_sell": [65.0, 70.0, 75.0],
+    "threshold_rsi_buy": [25.0, 30.0, 35.0],
+    "threshold_rsi_sell": [65.0, 70.0, 75.0],
+    "rule_weight": [0.5, 1.0, 1.5],
+    "threshold_weight": [0.5, 1.0, 1.5],
+    "min_confidence": [0.6, 0.75, 0.85, 0.9],
+}
+
+METRICS = ("pnl", "pnl_to_drawdown")
+
+# Set in each worker by _attach
+_columns = None
+_shm = None
+
+
+def grid_params(grid):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def random_params(space, n, seed=None):
+    """
+    n parameter sets drawn from `space`: a list picks one of its values,
+    a (low, high) tuple draws uniformly.
+    """
+    rng = random.Random(seed)
+    sets = []
+    for _ in range(n):
+        params = {}
+        for key, values in space.items():
+            params[key] = rng.uniform(*values) if isinstance(values, tuple) else rng.choice(values)
+        sets.append(params)
+    return sets
+
+
+def walk_forward_windows(n_bars, train, test, step=None, start=50):
+    """
+    [(train_start, train_end, test_start, test_end)] rolling forward by
+    `step` bars (default: one test window) until the data runs out.
+    """
+    step = step or test
+    windows = []
+    begin = start
+    while begin + train + test <= n_bars:
+        windows.append((begin, begin + train, begin + train, begin + train + test))
+        begin += step
+    return windows
+
+
+def score(columns, params, start, end):
+    """
+    Backtests one parameter set on bars [start, end), starting flat.
+    """
+    ind = {key: columns[key][start:end] for key in INDICATOR_KEYS}
+    action, amount, confidence = decisions_for_params(ind, params)
+    action = np.where(columns["ready"][start:end] > 0, action, HOLD)
+    min_confidence = params.get("min_confidence", DEFAULT_PARAMS["min_confidence"])
+    sim = simulate_positions(ind["price"], action, amount, confidence, min_confidence)
+
+    equity = sim["equity"]
+    pnl = float(equity[-1]) if len(equity) else 0.0
+    drawdown = max_drawdown(equity)
+    return {
+        "pnl": pnl,
+        "max_drawdown": drawdown,
+        "pnl_to_drawdown": pnl / drawdown if drawdown > 0 else pnl,
+        "fills": int(np.count_nonzero(sim["fills"])),
+        "exposure": float(np.mean(sim["position"] > 0)) if len(equity) else 0.0,
+    }
+
+
+def _attach(name, shape):
+    global _columns, _shm
+    # Workers share the parent's resource tracker, so attaching doesn't
+    # register a second owner; the parent unlinks the block
+    _shm = shared_memory.SharedMemory(name=name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=_shm.buf)
+    _columns = {key: block[i] for i, key in enumerate(COLUMNS)}
+
+
+def _run_task(task):
+    task_id, params, start, end = task
+    return task_id, score(_columns, params, start, end)
+
+
+def share_columns(prices):
+    """
+    Computes the indicator columns once and copies them into a new
+    shared-memory block. Returns (shm, shape); the caller unlinks it.
+    """
+    series = indicator_series(prices)
+    shape = (len(COLUMNS), len(prices))
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+    block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    for i, key in enumerate(COLUMNS):
+        block[i] = series[key]
+    return shm, shape
+
+
+def run_sweep(prices, param_sets, windows=None, workers=None, chunksize=None, start=50):
+    """
+    Scores every parameter set on every window. windows are
+    walk_forward_windows() tuples; without them each set is scored once
+    over bars [start, end). Returns [(params_index, window_index, phase,
+    metrics)] with phase "train", "test" or "all".
+    """
+    workers = workers or os.cpu_count() or 1
+    prices = np.asarray(prices, dtype=np.float64)
+
+    tasks, keys = [], []
+    if windows:
+        for w, (train_start, train_end, test_start, test_end) in enumerate(windows):
+            for p, params in enumerate(param_sets):
+                keys += [(p, w, "train"), (p, w, "test")]
+                tasks += [(len(tasks), params, train_start, train_end), (len(tasks) + 1, params, test_start, test_end)]
+    else:
+        for p, params in enumerate(param_sets):
+            keys.append((p, 0, "all"))
+            tasks.append((len(tasks), params, start, len(prices)))
+
+    shm, shape = share_columns(prices)
+    try:
+        # Big chunks keep pickling and IPC small next to the backtests themselves
+        chunksize = chunksize or max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(shm.name, shape)) as pool:
+            results = dict(pool.map(_run_task, tasks, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+    return [keys[task_id] + (results[task_id],) for task_id in range(len(tasks))]
+
+
+def walk_forward_selection(param_sets, results, metric="pnl"):
+    """
+    One row per walk-forward window: the parameter set with the best train
+    metric and how it then did on that window's test bars. Nothing here
+    looks at test data before choosing, so the test columns are the
+    out-of-sample result of tuning on each train window.
+    """
+    chosen = {}
+    for p, w, phase, metrics in results:
+        if phase == "train" and (w not in chosen or metrics[metric] > chosen[w][1][metric]):
+            chosen[w] = (p, metrics)
+    tests = {(p, w): metrics for p, w, phase, metrics in results if phase == "test"}
+
+    rows = []
+    for w in sorted(chosen):
+        p, train = chosen[w]
+        row = {"window": w, "params_index": p, f"train_{metric}": train[metric]}
+        row.update({f"test_{key}": value for key, value in tests[(p, w)].items()})
+        row.update(param_sets[p])
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def rank_results(param_sets, results, metric="pnl"):
+    """
+    One row per parameter set, best first. Walk-forward runs report the
+    train and test means and are ranked by how many windows chose the set
+    on its train score, then by the train mean; test scores never decide
+    the order (see walk_forward_selection for the out-of-sample result).
+    """
+    rows = {p: dict(params) for p, params in enumerate(param_sets)}
+    phases = {phase for _, _, phase, _ in results}
+    if phases == {"all"}:
+        for p, _, _, metrics in results:
+            rows[p].update(metrics)
+        sort_keys = [metric]
+    else:
+        by_phase = {"train": {}, "test": {}}
+        for p, w, phase, metrics in results:
+            by_phase[phase].setdefault(p, []).append(metrics)
+        picks = walk_forward_selection(param_sets, results, metric)["params_index"].value_counts()
+        for p in rows:
+            for phase in ("train", "test"):
+                runs = by_phase[phase].get(p, [])
+                for key in ("pnl", "max_drawdown", "pnl_to_drawdown", "fills", "exposure"):
+                    rows[p][f"{phase}_{key}"] = float(np.mean([m[key] for m in runs])) if runs else float("nan")
+            rows[p]["windows_chosen"] = int(picks.get(p, 0))
+        sort_keys = ["windows_chosen", f"train_{metric}"]
+    table = pd.DataFrame(rows.values())
+    return table.sort_values(sort_keys, ascending=False, kind="stable").reset_index(drop=True)
+
+
+def load_prices(symbol):
+    # Memory-mapped straight from the price store; workers only ever see
+    # the shared indicator block
+    price_store.sync(symbol)
+    return price_store.open(symbol)["price"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbol", default="SOL")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--random", type=int, default=0, help="random search with N sets instead of the full grid")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--train", type=int, default=0, help="walk-forward train window, in bars")
+    parser.add_argument("--test", type=int, default=0, help="walk-forward test window, in bars")
+    parser.add_argument("--step", type=int, default=None)
+    parser.add_argument("--metric", choices=METRICS, default="pnl")
+    parser.add_argument("--out", default="logs/sweep_results.csv")
+    args = parser.parse_args()
+
+    prices = load_prices(args.symbol)
+    param_sets = random_params(DEFAULT_GRID, args.random, args.seed) if args.random else grid_params(DEFAULT_GRID)
+    windows = walk_forward_windows(len(prices), args.train, args.test, args.step) if args.train and args.test else None
+    if args.train and args.test and not windows:
+        raise SystemExit(f"[ParamSweep] {len(prices)} bars is too short for train={args.train} test={args.test}")
+
+    started = time.perf_counter()
+    results = run_sweep(prices, param_sets, windows, args.workers)
+    elapsed = time.perf_counter() - started
+    table = rank_results(param_sets, results, args.metric)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    table.to_csv(args.out, index=False)
+    print(f"[ParamSweep] {len(results)} backtests of {len(prices)} bars on {args.workers} workers in {elapsed:.1f}s -> {args.out}")
+    print(table.head(10).to_string())
+
+    if windows:
+        selection = walk_forward_selection(param_sets, results, args.metric)
+        selection_out = os.path.splitext(args.out)[0] + "_windows.csv"
+        selection.to_csv(selection_out, index=False)
+        oos = selection[f"test_{args.metric}"]
+        print(f"[ParamSweep] Out of sample (best-on-train per window): {args.metric} mean={oos.mean():.4f} "
+              f"total={oos.sum():.4f} over {len(selection)} windows -> {selection_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ import csv
 from collections import deque
 # from log_router import LogRouter
 import sqlite3
-from db import get_connection
+from metrics_queries import recent_performance
 
 
 class PerformanceMonitor:
@@ -13,44 +13,14 @@ class PerformanceMonitor:
 
 
     def evaluate(self):
-        trades = deque(maxlen=self.window)
-
+        # Averaged in Postgres; only one row comes back
         try:
-            # with sqlite3.connect(self.db_path) as conn:
-            with get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT pnl, return_pct, confidence
-                    FROM trades
-                    WHERE pnl IS NOT NULL
-                    ORDER BY timestamp DESC
-                    LIMIT %s
-                """, [self.window])
-                rows = cursor.fetchall()
-
-            for pnl, ret, conf in rows:
-                try:
-                    trades.append({
-                        "pnl": float(pnl),
-                        "return_pct": float(ret),
-                        "confidence": float(conf)
-                    })
-                except (TypeError, ValueError):
-                    continue
-
-            if not trades:
+            performance = recent_performance(self.window)
+            if performance is None:
                 # print(f"[PerformanceMonitor] Not recent trades found.")
                 return None
-
-            avg_pnl = sum(float(t["pnl"]) for t in trades) / len(trades)
-            avg_return = sum(float(t["return_pct"]) for t in trades) / len(trades)
-            win_rate = sum(1 for t in trades if float(t["pnl"]) > 0) / len(trades)
-
-            return {
-                "avg_pnl": round(avg_pnl, 4),
-                "avg_return": round(avg_return, 4),
-                "win_rate": round(win_rate, 2)
-            }
+            performance.pop("trades")
+            return performance
         except Exception as e:
             print(f"[PerformanceMonitor] Error evaluating DB trades: {e}")
-            return None
\ No newline at end of file
+            return None
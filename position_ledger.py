@@ -0,0 +1,100 @@
+# position_ledger.py
+import threading
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+
+
+def _utc_day(timestamp):
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.date()
+
+
+class PositionLedger:
+    """
+    Open BUY lots per symbol, matched FIFO against SELLs, with running
+    realized PnL and per-UTC-day realized loss. Built once from the trades
+    table and then updated as trades are logged, so risk checks don't have
+    to rescan the history.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._lots = defaultdict(deque)  # symbol -> deque of [amount, price]
+        self._daily_pnl = defaultdict(float)  # UTC date -> realized PnL
+        self.realized_pnl = 0.0
+        self.closed = 0
+        self.wins = 0
+        self.losses = 0
+        self.unmatched_sells = 0
+
+    def apply(self, timestamp, action, amount, price, symbol="SOL"):
+        """
+        Records one trade. For a SELL returns (pnl, return_pct) over the
+        lots it closed, or None if there was nothing open to sell.
+        """
+        if action == "BUY":
+            with self._lock:
+                self._lots[symbol].append([float(amount), float(price)])
+            return None
+        if action != "SELL":
+            return None
+
+        remaining = float(amount)
+        pnl = cost = 0.0
+        with self._lock:
+            lots = self._lots[symbol]
+            while remaining > 1e-9 and lots:
+                lot = lots[0]
+                filled = min(lot[0], remaining)
+                pnl += (price - lot[1]) * filled
+                cost += lot[1] * filled
+                lot[0] -= filled
+                remaining -= filled
+                if lot[0] <= 1e-9:
+                    lots.popleft()
+
+            if cost == 0.0:
+                self.unmatched_sells += 1
+                return None
+            if remaining > 1e-9:
+                self.unmatched_sells += 1
+
+            self.realized_pnl += pnl
+            self._daily_pnl[_utc_day(timestamp)] += pnl
+            self.closed += 1
+            if pnl > 0:
+                self.wins += 1
+            else:
+                self.losses += 1
+        return pnl, pnl / cost
+
+    def rebuild(self, rows):
+        """
+        rows: (timestamp, action, amount, price, symbol) in time order.
+        """
+        with self._lock:
+            self._reset()
+        for timestamp, action, amount, price, symbol in rows:
+            if amount is None or price is None:
+                continue
+            self.apply(timestamp, action, amount, price, symbol or "SOL")
+        return self
+
+    def daily_loss(self, day=None) -> float:
+        """
+        Realized loss for a UTC day (today by default); 0.0 on a net-positive day.
+        """
+        day = day or datetime.now(timezone.utc).date()
+        return max(0.0, -self._daily_pnl.get(day, 0.0))
+
+    def open_amount(self, symbol) -> float:
+        return sum(lot[0] for lot in self._lots.get(symbol, ()))
+
+    def open_lots(self) -> int:
+        return sum(len(lots) for lots in self._lots.values())
@@ -0,0 +1,197 @@
+# price_buffer.py
+import os
+import threading
+from datetime import datetime, timezone
+import numpy as np
+from db import get_connection
+
+
+def to_epoch(ts) -> float:
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    if ts.tzinfo is None:
+        # Naive timestamps in this codebase come from datetime.utcnow()
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+class PriceRingBuffer:
+    """
+    Fixed-capacity ring of (timestamp, price, volume) backed by three numpy
+    arrays. Appends overwrite the oldest point once the buffer is full.
+    """
+
+    def __init__(self, capacity=200):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.prices = np.zeros(capacity, dtype=np.float64)
+        self.volumes = np.zeros(capacity, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, price, volume=0.0):
+        i = self._next
+        self.timestamps[i] = to_epoch(timestamp)
+        self.prices[i] = price
+        self.volumes[i] = volume if volume is not None else 0.0
+        self._next = (i + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+    def _order(self, n):
+        n = min(n, self._count)
+        start = (self._next - n) % self.capacity
+        return (np.arange(n) + start) % self.capacity
+
+    def last(self, n):
+        """
+        Returns (timestamps, prices, volumes) for the newest n points, oldest first.
+        """
+        idx = self._order(n)
+        return self.timestamps[idx], self.prices[idx], self.volumes[idx]
+
+    def last_prices(self, n) -> list:
+        return self.prices[self._order(n)].tolist()
+
+    def latest(self):
+        if not self._count:
+            return None
+        i = (self._next - 1) % self.capacity
+        return self.timestamps[i], self.prices[i], self.volumes[i]
+
+
+class PriceBufferStore:
+    def __init__(self, capacity=None):
+        self.capacity = capacity or int(os.getenv("PRICE_BUFFER_CAPACITY", 200))
+        self._buffers = {}
+        # Symbols loaded from the DB; from then on appends keep them current
+        self._warm = set()
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def _buffer(self, symbol):
+        symbol = symbol.upper()
+        buf = self._buffers.get(symbol)
+        if buf is None:
+            buf = self._buffers[symbol] = PriceRingBuffer(self.capacity)
+        return buf
+
+    def add_listener(self, callback):
+        """
+        callback(symbol, timestamp, price, volume) runs after every append.
+        """
+        self._listeners.append(callback)
+
+    def append(self, symbol, timestamp, price, volume=0.0):
+        if price is None:
+            return
+        with self._lock:
+            self._buffer(symbol).append(timestamp, price, volume)
+        for callback in self._listeners:
+            try:
+                callback(symbol.upper(), timestamp, price, volume)
+            except Exception as e:
+                print(f"[PriceBuffer] Listener error for {symbol}: {e}")
+
+    def seed(self, symbol, rows):
+        """
+        Replaces a symbol's buffer with (timestamp, price, volume) rows, oldest first.
+        """
+        with self._lock:
+            buf = self._buffer(symbol)
+            buf.clear()
+            for timestamp, price, volume in rows:
+                buf.append(timestamp, price, volume)
+            self._warm.add(symbol.upper())
+
+    def is_warm(self, symbol) -> bool:
+        return symbol.upper() in self._warm
+
+    def size(self, symbol) -> int:
+        buf = self._buffers.get(symbol.upper())
+        return len(buf) if buf else 0
+
+    def prices(self, symbol, n) -> list:
+        with self._lock:
+            buf = self._buffers.get(symbol.upper())
+            return buf.last_prices(n) if buf else []
+
+    def last(self, symbol, n):
+        with self._lock:
+            buf = self._buffers.get(symbol.upper())
+            if buf is None:
+                empty = np.empty(0)
+                return empty, empty, empty
+            return tuple(a.copy() for a in buf.last(n))
+
+    def symbols(self):
+        return list(self._buffers)
+
+    def warm(self, symbols, lookback=None, store=None):
+        """
+        Loads the newest `lookback` points for every symbol in one round trip.
+        With a PriceStore, symbols it holds are topped up and seeded from
+        its files instead; the rest still come from the query.
+        """
+        symbols = [s.upper() for s in symbols]
+        lookback = lookback or self.capacity
+        if store is not None:
+            symbols = self._warm_from_store(symbols, lookback, store)
+        if not symbols:
+            return 0
+
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            # LATERAL keeps it to one (symbol, timestamp) index probe per symbol
+            cursor.execute("""
+                SELECT s.symbol, p.timestamp, p.price, p.volume
+                FROM unnest(%s::text[]) AS s(symbol)
+                CROSS JOIN LATERAL (
+                    SELECT timestamp, price, volume
+                    FROM price_history
+                    WHERE symbol = s.symbol
+                    ORDER BY timestamp DESC
+                    LIMIT %s
+                ) p
+                ORDER BY s.symbol, p.timestamp
+            """, (symbols, lookback))
+            rows = cursor.fetchall()
+
+        by_symbol = {s: [] for s in symbols}
+        for symbol, timestamp, price, volume in rows:
+            by_symbol[symbol].append((timestamp, price, volume))
+        for symbol, points in by_symbol.items():
+            self.seed(symbol, points)
+
+        print(f"[PriceBuffer] Warmed {len(rows)} points for {len(symbols)} symbols")
+        return len(rows)
+
+    def _warm_from_store(self, symbols, lookback, store):
+        # Returns the symbols the store couldn't serve
+        missing = []
+        for symbol in symbols:
+            try:
+                store.sync(symbol)
+                points = store.tail(symbol, lookback)
+            except Exception as e:
+                print(f"[PriceBuffer] Price store warm-up failed for {symbol}: {e}")
+                points = []
+            if points:
+                self.seed(symbol, points)
+            else:
+                missing.append(symbol)
+        if len(missing) < len(symbols):
+            print(f"[PriceBuffer] Warmed {len(symbols) - len(missing)} symbols from the price store")
+        return missing
+
+
+# Process-wide store: db_logger appends to it, RealMarketDataFetcher reads from it
+price_buffers = PriceBufferStore()
@@ -1,14 +1,14 @@
 import os
 # import csv
 from datetime import datetime 
-from pycoingecko import CoinGeckoAPI
+from market_data_client import market_data
 from cg_symbol_map import COINGECKO_IDS
 # from log_paths import PRICE_LOG
 from db_logger import log_price_history
 # 
 class PriceHistoryLogger:
     def __init__(self, db_path="trading.db"):
-        self.cg = CoinGeckoAPI()
+        self.cg = market_data
         self.symbol_to_id = COINGECKO_IDS
         self.db_path = db_path
 
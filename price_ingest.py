@@ -0,0 +1,122 @@
+# price_ingest.py
+import io
+import csv
+from datetime import timezone
+from db import get_connection
+from migrations import create_price_partition, missing_price_partitions
+
+COPY_CHUNK_ROWS = 5000
+VALUES_BATCH_ROWS = 2000
+
+
+def _csv_chunks(rows, chunk_rows=None):
+    """
+    Yields CSV text in chunks so COPY streams the rows instead of
+    building one giant buffer (pg8000 sends one CopyData per item).
+    """
+    chunk_rows = chunk_rows or COPY_CHUNK_ROWS
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for row in rows:
+        writer.writerow(["" if value is None else value for value in row])
+        count += 1
+        if count >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    if count:
+        yield buffer.getvalue()
+
+
+def _stage_with_copy(cursor, rows):
+    cursor.execute(
+        "COPY price_history_staging (timestamp, symbol, price, volume) FROM STDIN WITH (FORMAT csv)",
+        stream=_csv_chunks(rows)
+    )
+
+
+def _stage_with_values(cursor, rows):
+    batch = []
+
+    def send(batch):
+        placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(batch))
+        cursor.execute(
+            f"INSERT INTO price_history_staging (timestamp, symbol, price, volume) VALUES {placeholders}",
+            [value for row in batch for value in row]
+        )
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= VALUES_BATCH_ROWS:
+            send(batch)
+            batch = []
+    if batch:
+        send(batch)
+
+
+def bulk_upsert_price_history(rows, method="copy", conn=None) -> int:
+    """
+    Loads (timestamp, symbol, price, volume) rows into price_history in one
+    transaction. Rows are staged through COPY (or multi-row VALUES with
+    method="values"), then upserted on the (symbol, timestamp) key so
+    re-running the same backfill updates points instead of duplicating them.
+    Returns the number of points written (inserted or updated).
+    """
+    own_conn = conn is None
+    conn = conn or get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS price_history_staging (
+                timestamp TIMESTAMPTZ,
+                symbol TEXT,
+                price FLOAT,
+                volume FLOAT
+            )
+        """)
+        cursor.execute("TRUNCATE price_history_staging")
+
+        if method == "copy":
+            _stage_with_copy(cursor, rows)
+        elif method == "values":
+            _stage_with_values(cursor, rows)
+        else:
+            raise ValueError(f"Unknown ingest method: {method}")
+
+        # Backfills can reach months no partition covers yet
+        cursor.execute("""
+            SELECT DISTINCT date_trunc('month', timestamp AT TIME ZONE 'UTC')
+            FROM price_history_staging
+            WHERE timestamp IS NOT NULL
+        """)
+        missing = missing_price_partitions(cursor, [month.replace(tzinfo=timezone.utc) for (month,) in cursor.fetchall()])
+        if missing:
+            # Created in a short transaction of their own, so the migration
+            # lock isn't held for the rest of the load. The staged rows are
+            # in a session temp table and survive the commits.
+            conn.commit()
+            for month in missing:
+                create_price_partition(cursor, month)
+            conn.commit()
+
+        # DISTINCT ON because ON CONFLICT can't touch the same row twice
+        # in one statement
+        cursor.execute("""
+            INSERT INTO price_history (timestamp, symbol, price, volume)
+            SELECT DISTINCT ON (symbol, timestamp) timestamp, symbol, price, volume
+            FROM price_history_staging
+            ORDER BY symbol, timestamp
+            ON CONFLICT (symbol, timestamp)
+            DO UPDATE SET price = EXCLUDED.price, volume = EXCLUDED.volume
+        """)
+        written = cursor.rowcount
+        conn.commit()
+        return written
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if own_conn:
+            conn.close()
@@ -5,7 +5,7 @@ from pycoingecko import CoinGeckoAPI
 # from log_router import LogRouter
 # from log_paths import PRICE_LOG, get_log_path
 from real_market_data import RealMarketDataFetcher
-from db_logger import log_price_history
+from db_logger import log_price_history_many
 
 
 class PriceMultiLogger:
@@ -16,33 +16,21 @@ class PriceMultiLogger:
 
 
     def fetch_and_log_all(self):
-        for symbol in self.token_symbols:
-            try:
-                price = self.fetcher.fetch_current_price(symbol)
-                volume = self.fetcher.fetch_current_volume(symbol)
-                timestamp = datetime.utcnow().isoformat()
-
-                log_price_history(
-                    timestamp=timestamp,
-                    symbol=symbol, 
-                    price=price, 
-                    volume=volume
-                )
-                # log_file = get_log_path(f"{symbol.lower()}_price_log.csv")
-
-                # # Ensure file add header
-                # if not os.path.exists(log_file):
-                #     with open(log_file, "w", newline="") as f:
-                #         writer = csv.writer(f)
-                #         writer.writerow(["timestamp", "price", "volume"])
+        # One batched quote request for every symbol, then one bulk insert
+        quotes = self.fetcher.fetch_current_quotes(self.token_symbols)
+        timestamp = datetime.utcnow().isoformat()
 
-                # # Append price log
-                # with open(log_file, "a", newline="") as f:
-                #     writer = csv.writer(f)
-                #     writer.writerow([timestamp, price, volume])
-
-                # print(f"[PriceLogger] {timestamp} - {symbol}: Price={price}, Volume={volume}")
-                # self.logger.log_local_and_remote(log_file)
-
-            except Exception as e:
-                print(f"[PriceLogger] Error logging price for {symbol}: {e}")
\ No newline at end of file
+        points = []
+        for symbol in self.token_symbols:
+            quote = quotes.get(symbol)
+            if not quote or not quote["price"]:
+                # print(f"[PriceLogger] No quote for {symbol}; skipping")
+                continue
+            points.append((timestamp, symbol, quote["price"], quote["volume"]))
+
+        try:
+            log_price_history_many(points)
+        except Exception as e:
+            print(f"[PriceLogger] Error logging prices: {e}")
+        # print(f"[PriceLogger] {timestamp} - logged {len(points)}/{len(self.token_symbols)} symbols")
+        return len(points)
@@ -0,0 +1,262 @@
+# price_store.py
+import argparse
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+from db import get_connection
+
+# One flat file per column per symbol: <root>/<SYMBOL>/<column>.bin
+COLUMNS = {"timestamp": np.int64, "price": np.float64, "volume": np.float64}
+
+
+def _to_ns(timestamps):
+    # UTC epoch nanoseconds; naive datetimes are taken as UTC
+    index = pd.DatetimeIndex(pd.to_datetime(list(timestamps), utc=True))
+    return index.asi8.astype(np.int64)
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _from_ns(ns):
+    return _EPOCH + timedelta(microseconds=int(ns) // 1000)
+
+
+class PriceStore:
+    """
+    Local columnar copy of price_history: per symbol, fixed-width
+    timestamp (int64 ns, UTC) / price / volume (float64) files that are
+    only ever appended to. Readers get read-only np.memmap views, so
+    years of ticks open in milliseconds and only the pages touched are
+    loaded. sync() pulls rows newer than the last stored timestamp;
+    rows backfilled or corrected behind it need sync(verify=True), which
+    compares per-month summaries with Postgres and re-exports from the
+    first month that differs (or full=True to re-export everything).
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.getenv("PRICE_STORE_DIR", os.path.join(os.getenv("BASE_DIR", "./tmp"), "price_store"))
+        self._lock = threading.Lock()
+
+    def _path(self, symbol, column):
+        return os.path.join(self.root, symbol.upper(), f"{column}.bin")
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
+
+    def rows(self, symbol) -> int:
+        # A crash mid-append can leave columns of different lengths; the
+        # shortest one is what was fully written
+        counts = []
+        for column, dtype in COLUMNS.items():
+            path = self._path(symbol, column)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            counts.append(size // np.dtype(dtype).itemsize)
+        return min(counts)
+
+    def _memmap(self, symbol, column, rows):
+        if rows == 0:
+            return np.empty(0, dtype=COLUMNS[column])
+        return np.memmap(self._path(symbol, column), dtype=COLUMNS[column], mode="r", shape=(rows,))
+
+    def last_timestamp(self, symbol):
+        """
+        Newest stored timestamp as epoch ns, or None for an empty symbol.
+        """
+        rows = self.rows(symbol)
+        if not rows:
+            return None
+        return int(self._memmap(symbol, "timestamp", rows)[-1])
+
+    def append(self, symbol, timestamps, prices, volumes=None) -> int:
+        """
+        Appends rows in time order. Rows at or before the last stored
+        timestamp are dropped, so replaying an overlap is harmless.
+        Returns the number of rows written.
+        """
+        ns = _to_ns(timestamps)
+        prices = np.asarray(prices, dtype=np.float64)
+        volumes = np.zeros(len(prices)) if volumes is None else np.asarray(volumes, dtype=np.float64)
+        with self._lock:
+            os.makedirs(os.path.join(self.root, symbol.upper()), exist_ok=True)
+            rows = self.rows(symbol)
+            last = self.last_timestamp(symbol)
+            keep = ns > last if last is not None else np.ones(len(ns), dtype=bool)
+            if not keep.any():
+                return 0
+            columns = {
+                "timestamp": ns[keep],
+                "price": prices[keep],
+                "volume": volumes[keep],
+            }
+            for column, values in columns.items():
+                path = self._path(symbol, column)
+                with open(path, "ab") as f:
+                    # Drop any torn tail before appending
+                    f.truncate(rows * np.dtype(COLUMNS[column]).itemsize)
+                    f.write(np.ascontiguousarray(values, dtype=COLUMNS[column]).tobytes())
+            return int(keep.sum())
+
+    def truncate(self, symbol, before=None) -> int:
+        """
+        Drops every row at or after `before` (epoch ns; None drops all).
+        Views opened earlier must not be read past the new end. Returns
+        the number of rows kept.
+        """
+        with self._lock:
+            rows = self.rows(symbol)
+            keep = 0
+            if before is not None and rows:
+                keep = int(np.searchsorted(self._memmap(symbol, "timestamp", rows), before, side="left"))
+            for column, dtype in COLUMNS.items():
+                path = self._path(symbol, column)
+                if os.path.exists(path):
+                    with open(path, "r+b") as f:
+                        f.truncate(keep * np.dtype(dtype).itemsize)
+            return keep
+
+    def month_summary(self, symbol):
+        """
+        {month start as epoch ns: (rows, last timestamp ns, sum of prices)}
+        over the stored rows, in the shape of _db_month_summary().
+        """
+        columns = self.open(symbol)
+        ts = np.asarray(columns["timestamp"])
+        if not len(ts):
+            return {}
+        months = ts.astype("datetime64[ns]").astype("datetime64[M]").astype("datetime64[ns]").astype(np.int64)
+        keys, first, counts = np.unique(months, return_index=True, return_counts=True)
+        sums = np.add.reduceat(np.nan_to_num(np.asarray(columns["price"])), first)
+        last = ts[first + counts - 1]
+        return {int(k): (int(n), int(t), float(p)) for k, n, t, p in zip(keys, counts, last, sums)}
+
+    def _db_month_summary(self, cursor, symbol):
+        cursor.execute("""
+            SELECT date_trunc('month', timestamp AT TIME ZONE 'UTC'), count(*), max(timestamp), coalesce(sum(price), 0)
+            FROM price_history
+            WHERE symbol = %s
+            GROUP BY 1
+        """, (symbol,))
+        return {
+            int(_to_ns([month])[0]): (int(count), int(_to_ns([last])[0]), float(total))
+            for month, count, last, total in cursor.fetchall()
+        }
+
+    def stale_since(self, symbol, cursor):
+        """
+        Start (epoch ns) of the first month whose row count, last timestamp
+        or price sum differs from price_history, or None if all match.
+        """
+        local = self.month_summary(symbol)
+        remote = self._db_month_summary(cursor, symbol)
+        for month in sorted(set(local) | set(remote)):
+            mine, theirs = local.get(month), remote.get(month)
+            if mine is None or theirs is None or mine[:2] != theirs[:2] \
+                    or not np.isclose(mine[2], theirs[2], rtol=1e-9, atol=1e-9):
+                return month
+        return None
+
+    def open(self, symbol, start=None, end=None):
+        """
+        Read-only, zero-copy columns for `symbol`, optionally limited to
+        start <= timestamp < end (datetimes; naive means UTC).
+        Returns {"timestamp": int64 ns, "price": float64, "volume": float64}.
+        """
+        rows = self.rows(symbol)
+        columns = {column: self._memmap(symbol, column, rows) for column in COLUMNS}
+        lo, hi = 0, rows
+        if start is not None:
+            lo = int(np.searchsorted(columns["timestamp"], _to_ns([start])[0], side="left"))
+        if end is not None:
+            hi = int(np.searchsorted(columns["timestamp"], _to_ns([end])[0], side="left"))
+        return {column: values[lo:hi] for column, values in columns.items()}
+
+    def tail(self, symbol, n):
+        """
+        Newest `n` rows as [(timestamp, price, volume)], oldest first.
+        """
+        columns = self.open(symbol)
+        start = max(len(columns["price"]) - n, 0)
+        return [(_from_ns(ts), float(price), float(volume)) for ts, price, volume in
+                zip(columns["timestamp"][start:], columns["price"][start:], columns["volume"][start:])]
+
+    def frame(self, symbol, start=None, end=None):
+        """
+        (timestamp, close) DataFrame in the shape Backtester expects, with
+        naive UTC timestamps.
+        """
+        columns = self.open(symbol, start, end)
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(np.asarray(columns["timestamp"])),
+            "close": np.asarray(columns["price"]),
+        })
+
+    def sync(self, symbol, batch_size=None, verify=False, full=False) -> int:
+        """
+        Appends every price_history row newer than the last stored one,
+        paging by timestamp over the (symbol, timestamp) key. Backfilled or
+        corrected rows land behind that point: after a backfill, sync with
+        verify=True to re-export the months that changed, or full=True to
+        start over.
+        """
+        symbol = symbol.upper()
+        batch_size = batch_size or int(os.getenv("PRICE_STORE_SYNC_BATCH", 50_000))
+        written = 0
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            if full:
+                self.truncate(symbol)
+            elif verify and self.rows(symbol):
+                stale = self.stale_since(symbol, cursor)
+                if stale is not None:
+                    kept = self.truncate(symbol, stale)
+                    print(f"[PriceStore] {symbol}: out of date from {_from_ns(stale):%Y-%m}, re-exporting ({kept} rows kept)")
+
+            last = self.last_timestamp(symbol)
+            since = _from_ns(last) if last is not None else _EPOCH
+            while True:
+                cursor.execute("""
+                    SELECT timestamp, price, volume
+                    FROM price_history
+                    WHERE symbol = %s AND timestamp > %s
+                    ORDER BY timestamp
+                    LIMIT %s
+                """, (symbol, since, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                timestamps, prices, volumes = zip(*rows)
+                written += self.append(symbol, timestamps, [np.nan if p is None else p for p in prices],
+                                       [0.0 if v is None else v for v in volumes])
+                since = timestamps[-1]
+                if len(rows) < batch_size:
+                    break
+        if written:
+            print(f"[PriceStore] {symbol}: appended {written} rows ({self.rows(symbol)} stored)")
+        return written
+
+    def sync_many(self, symbols, verify=False, full=False) -> int:
+        return sum(self.sync(symbol, verify=verify, full=full) for symbol in symbols)
+
+
+# Process-wide store under PRICE_STORE_DIR
+price_store = PriceStore()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export price_history into the local price store")
+    parser.add_argument("symbols", nargs="*", help="default: every symbol already in the store")
+    parser.add_argument("--verify", action="store_true", help="re-export months that differ from Postgres")
+    parser.add_argument("--full", action="store_true", help="drop the local copy and export everything")
+    args = parser.parse_args()
+    symbols = args.symbols or price_store.symbols()
+    written = price_store.sync_many(symbols, verify=args.verify, full=args.full)
+    print(f"[PriceStore] {written} rows written for {len(symbols)} symbols")
+
+
+if __name__ == "__main__":
+    main()
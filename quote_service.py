@@ -0,0 +1,169 @@
+# quote_service.py
+import asyncio
+import math
+import os
+import time
+from async_clients import get_http_client
+
+SOL_MINT = "So11111111111111111111111111111111111111112"
+
+
+def price_impact(quote) -> float:
+    """
+    Jupiter's priceImpactPct as a float; 0.0 if absent.
+    """
+    try:
+        return abs(float(quote.get("priceImpactPct") or 0.0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class QuoteService:
+    """
+    Jupiter quotes with a short-lived cache and concurrent fetching.
+
+    Quotes are cached for `ttl` seconds keyed by (inputMint, outputMint,
+    amount bucket, slippageBps). Buckets are geometric, `bucket_bps` wide,
+    so a slightly different size reuses the same route when only a rough
+    price impact is needed; pass exact=True (as the swap path does) to
+    only accept a quote for exactly that amount. Identical requests already
+    in flight share one HTTP call.
+    """
+
+    def __init__(self, quote_url=None, timeout=None, ttl=None, bucket_bps=None,
+                 slippage_bps=50, concurrency=None, http=None):
+        self.quote_url = quote_url or os.getenv("JUPITER_QUOTE_URL", "https://lite-api.jup.ag/swap/v1/quote")
+        self.timeout = timeout or float(os.getenv("JUPITER_QUOTE_TIMEOUT", 5))
+        self.ttl = ttl if ttl is not None else float(os.getenv("QUOTE_CACHE_TTL", 10))
+        self.bucket_bps = bucket_bps or float(os.getenv("QUOTE_AMOUNT_BUCKET_BPS", 50))
+        self.slippage_bps = slippage_bps
+        self.concurrency = concurrency or int(os.getenv("QUOTE_CONCURRENCY", 8))
+        self._http = http
+
+        self.headers = {}
+        api_key = os.getenv("JUPITER_API_KEY")
+        if api_key:
+            self.headers["Authorization"] = f"Bearer {api_key}"
+
+        self._cache = {}
+        self._inflight = {}
+        self._limit = None
+        self.stats = {"requests": 0, "hits": 0, "coalesced": 0, "errors": 0}
+
+    @property
+    def http(self):
+        return self._http or get_http_client()
+
+    def bucket(self, amount: int) -> int:
+        if amount <= 0:
+            return 0
+        return int(math.log(amount) / math.log1p(self.bucket_bps / 10_000))
+
+    def _key(self, input_mint, output_mint, amount, slippage_bps):
+        return (str(input_mint), str(output_mint), self.bucket(amount), slippage_bps)
+
+    def _cached(self, key, amount, exact):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        fetched_at, quote = entry
+        if time.monotonic() - fetched_at >= self.ttl:
+            self._cache.pop(key, None)
+            return None
+        if exact and str(quote.get("inAmount")) != str(amount):
+            return None
+        return quote
+
+    async def _fetch(self, key, input_mint, output_mint, amount, slippage_bps):
+        loop = asyncio.get_running_loop()
+        if self._limit is None or self._limit[0] is not loop:
+            self._limit = (loop, asyncio.Semaphore(self.concurrency))
+        params = {
+            "inputMint": str(input_mint),
+            "outputMint": str(output_mint),
+            "amount": amount,
+            "slippageBps": slippage_bps,
+            "swapMode": 'ExactIn',
+            "onlyDirectRoutes": "false",
+            "restrictIntermediateTokens": "false"
+        }
+        async with self._limit[1]:
+            self.stats["requests"] += 1
+            res = await self.http.get(self.quote_url, params=params, headers=self.headers, timeout=self.timeout)
+        quote = res.json()
+        # Error bodies ({"error": ...}) and route-less answers aren't cached
+        if "routePlan" in quote:
+            self._cache[key] = (time.monotonic(), quote)
+        return quote
+
+    async def quote(self, input_mint, output_mint, amount: int, slippage_bps=None, exact=False) -> dict:
+        """
+        Quote for `amount` base units of input_mint. Returns Jupiter's
+        response as-is, so callers check for "routePlan" as before.
+        """
+        slippage_bps = self.slippage_bps if slippage_bps is None else slippage_bps
+        key = self._key(input_mint, output_mint, amount, slippage_bps)
+        quote = self._cached(key, amount, exact)
+        if quote is not None:
+            self.stats["hits"] += 1
+            return quote
+
+        loop = asyncio.get_running_loop()
+        inflight_key = key + (amount if exact else None,)
+        task = self._inflight.get(inflight_key)
+        if task is not None and task.get_loop() is loop and not task.done():
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        task = self._inflight[inflight_key] = loop.create_task(
+            self._fetch(key, input_mint, output_mint, amount, slippage_bps))
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            if self._inflight.get(inflight_key) is task and task.done():
+                del self._inflight[inflight_key]
+
+    async def quote_sizes(self, input_mint, output_mint, amounts, slippage_bps=None) -> list:
+        """
+        Quotes every size concurrently. Returns [{"amount", "out_amount",
+        "price_impact", "quote"}] in the order given; sizes that failed or
+        have no route are left out.
+        """
+        results = await asyncio.gather(
+            *(self.quote(input_mint, output_mint, amount, slippage_bps, exact=True) for amount in amounts),
+            return_exceptions=True,
+        )
+        ladder = []
+        for amount, quote in zip(amounts, results):
+            if isinstance(quote, Exception):
+                print(f"[QuoteService] Quote {input_mint} -> {output_mint} for {amount} failed: {quote}")
+                continue
+            if "routePlan" not in quote:
+                continue
+            ladder.append({
+                "amount": amount,
+                "out_amount": int(quote["outAmount"]),
+                "price_impact": price_impact(quote),
+                "quote": quote,
+            })
+        return ladder
+
+    async def quote_tokens(self, requests, slippage_bps=None) -> dict:
+        """
+        requests: {output_mint: [amounts]} bought with SOL. All tokens and
+        sizes are quoted at once; returns {output_mint: ladder}.
+        """
+        mints = list(requests)
+        ladders = await asyncio.gather(
+            *(self.quote_sizes(SOL_MINT, mint, requests[mint], slippage_bps) for mint in mints))
+        return dict(zip(mints, ladders))
+
+    def clear(self):
+        self._cache.clear()
+
+
+# Shared by JupiterSwapper and MultiTokenTrader so a cycle's quotes are reused
+quote_service = QuoteService()
@@ -1,32 +1,53 @@
-from pycoingecko import CoinGeckoAPI
+import os
+from market_data_client import market_data
 from cg_symbol_map import COINGECKO_IDS
 import sqlite3
 from db import get_connection
+from db_writer import flush_writes
+from price_buffer import price_buffers
+from candles import candle_store
 
 
 class RealMarketDataFetcher:
-    def __init__(self):
-        self.cg = CoinGeckoAPI()
+    def __init__(self, db_fallback=True, client=None, candle_interval=None, candles=None):
+        # Shared, rate-limited client; CoinGeckoAPI-compatible get_* methods
+        self.cg = client or market_data
+        self.db_fallback = db_fallback
+        # Indicators run on closes of this candle resolution; "tick" keeps raw ticks
+        self.candles = candles or candle_store
+        self.candle_interval = candle_interval or os.getenv("INDICATOR_CANDLE_INTERVAL", "5m")
 
     def fetch_price_history(self, symbol, lookback=50) -> list:
+        if self.candle_interval in self.candles.resolutions:
+            return self.fetch_candle_closes(symbol, lookback)
+
+        prices = price_buffers.prices(symbol, lookback)
+        if len(prices) >= lookback or price_buffers.is_warm(symbol) or not self.db_fallback:
+            return prices
+
+        # Cold buffer: read from the DB once and seed it for next time.
+        # Make sure the prices PriceMultiLogger just queued are visible first
+        flush_writes()
         # conn = sqlite3.connect("trading.db")
-        conn = get_connection()
-        c = conn.cursor()
-        c.execute("""
-            SELECT price FROM price_history
-            WHERE symbol = %s
-            ORDER BY timestamp DESC
-            LIMIT %s 
-        """, (symbol.upper(), lookback))
-        # try:
-            # cg_id = COINGECKO_IDS.get(symbol.upper(), symbol.lower())
-            # data = self.cg.get_coin_market_chart_by_id(id='solana', vs_currency='usd', days=days)
-        prices = [point[0] for point in c.fetchall()]
-        conn.close()
-        return prices[::-1]
-        # except Exception as e:
-        #     print(f"[DataFetcher] Error fetching data: {e}")
-        #     return []
+        with get_connection() as conn:
+            c = conn.cursor()
+            c.execute("""
+                SELECT timestamp, price, volume FROM price_history
+                WHERE symbol = %s
+                ORDER BY timestamp DESC
+                LIMIT %s 
+            """, (symbol.upper(), max(lookback, price_buffers.capacity)))
+            rows = c.fetchall()[::-1]
+        price_buffers.seed(symbol, rows)
+        return [row[1] for row in rows[-lookback:]]
+
+    def fetch_candle_closes(self, symbol, lookback=50) -> list:
+        closes = self.candles.closes(symbol, self.candle_interval, lookback)
+        if len(closes) >= lookback or self.candles.is_warm(symbol, self.candle_interval) or not self.db_fallback:
+            return closes
+        # Cold: load stored candles once (built from price_history if there are none)
+        self.candles.warm([symbol], self.candle_interval)
+        return self.candles.closes(symbol, self.candle_interval, lookback)
     
     def fetch_sol_usdc_indicators(self):
         try:
@@ -75,7 +96,7 @@ class RealMarketDataFetcher:
             data = self.cg.get_price(ids=cg_id, vs_currencies='usd')
             return float(data[cg_id]['usd'])
         except Exception as e:
-            # print(f"[DataFetcher] Error fetching current price for {symbol}: {e}")
+            print(f"[DataFetcher] Error fetching current price for {symbol}: {e}")
             return 0.0
 
     def fetch_current_volume(self, symbol: str) -> float:
@@ -89,3 +110,45 @@ class RealMarketDataFetcher:
         except Exception as e:
             print(f"[DataFetcher] Error fetching volume for {symbol}: {e}")
             return 0.0
+
+    def fetch_current_quotes(self, symbols, batch_size=None) -> dict:
+        """
+        Price, 24h volume and last-updated time for many symbols from one
+        simple/price call per `batch_size` ids, instead of a get_price plus a
+        one-day market chart per symbol. Returns
+        {symbol: {"price", "volume", "last_updated"}} for symbols CoinGecko
+        priced; unknown or missing ones are left out.
+        """
+        batch_size = batch_size or int(os.getenv("QUOTE_BATCH_SIZE", 200))
+        by_id = {}
+        for symbol in symbols:
+            cg_id = COINGECKO_IDS.get(symbol.upper())
+            if cg_id:
+                by_id.setdefault(cg_id, []).append(symbol)
+
+        ids = list(by_id)
+        quotes = {}
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            try:
+                data = self.cg.get_price(
+                    ids=chunk,
+                    vs_currencies='usd',
+                    include_24hr_vol=True,
+                    include_last_updated_at=True
+                )
+            except Exception as e:
+                print(f"[DataFetcher] Error fetching quotes for {len(chunk)} ids: {e}")
+                continue
+
+            for cg_id in chunk:
+                quote = data.get(cg_id) or {}
+                if quote.get('usd') is None:
+                    continue
+                for symbol in by_id[cg_id]:
+                    quotes[symbol] = {
+                        "price": float(quote['usd']),
+                        "volume": float(quote.get('usd_24h_vol') or 0.0),
+                        "last_updated": quote.get('last_updated_at'),
+                    }
+        return quotes
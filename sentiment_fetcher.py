@@ -44,23 +44,20 @@ class SentimentSignalFetcher:
 
     def get_social_score(self, symbol: str) -> float:
         # TODO: Later connect to Twitter, Farcaster, or SocialScan
-        from token_scanner import fetch_top_tokens
-        tokens = fetch_top_tokens()
-        
-        if not tokens:
-            print(f"[SentimentFetcher] Empty token list.Returning default score for {symbol}")
-            return 0.1
-
-        # Normalize volumes to [0, 1]
-        volumes = [t.get("volume24h", 0) for t in tokens]
-        max_volume = max(volumes, default=1)
+        from token_scanner import FALLBACK_TOKENS, token_list
+        # Scored against the whole cached list; its max volume and symbol
+        # index are computed once per refresh, not per call
+        if not token_list.tokens():
+            # Nothing fetched or cached yet: score against the built-in list
+            max_volume = max((t.get("volume24h") or 0 for t in FALLBACK_TOKENS), default=0)
+            token = next((t for t in FALLBACK_TOKENS if t["symbol"].upper() == symbol.upper()), None)
+        else:
+            max_volume = token_list.max_volume
+            token = token_list.get(symbol)
 
         if max_volume <= 0:
             print(f"[SentimentFetcher] max_volume=0 for {symbol}. Avoiding division.")
             return 0.1
-
-        for t in tokens:
-            if t["symbol"].upper() == symbol.upper():
-                return round(t.get("volume24h", 0) / max_volume, 3)
-        
-        return 0.1 # Fallback low interest score 
\ No newline at end of file
+        if token is None:
+            return 0.1 # Fallback low interest score
+        return round((token.get("volume24h") or 0) / max_volume, 3)
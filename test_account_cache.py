@@ -0,0 +1,65 @@
+import asyncio
+from types import SimpleNamespace
+from solders.pubkey import Pubkey
+from spl.token.constants import TOKEN_PROGRAM_ID, TOKEN_2022_PROGRAM_ID
+from account_cache import AccountCache, is_missing_account_error
+
+OWNER = Pubkey.new_unique()
+
+
+class FakeRpc:
+    def __init__(self, accounts):
+        self.accounts = accounts
+        self.calls = []
+
+    async def get_multiple_accounts(self, pubkeys):
+        self.calls.append(len(pubkeys))
+        return SimpleNamespace(value=[self.accounts.get(p) for p in pubkeys])
+
+
+def derive(owner, mint, program):
+    return Pubkey.create_with_seed(owner, str(mint)[:16], program)
+
+
+def test_prefetch_batches_lookups_and_persists(tmp_path):
+    mints = [Pubkey.new_unique() for _ in range(150)]
+    accounts = {m: SimpleNamespace(owner=TOKEN_PROGRAM_ID) for m in mints}
+    accounts[mints[0]] = SimpleNamespace(owner=TOKEN_2022_PROGRAM_ID)
+    # Only the first 10 ATAs exist
+    for mint in mints[:10]:
+        program = accounts[mint].owner
+        accounts[derive(OWNER, mint, program)] = SimpleNamespace(owner=program)
+
+    rpc = FakeRpc(accounts)
+    cache = AccountCache(path=str(tmp_path / "accounts.json"))
+    assert asyncio.run(cache.prefetch(rpc, OWNER, mints, derive)) == 10
+    assert rpc.calls == [100, 50, 100, 50]
+
+    reloaded = AccountCache(path=str(tmp_path / "accounts.json"))
+    assert reloaded.get_program(mints[0]) == TOKEN_2022_PROGRAM_ID
+    assert reloaded.get_ata(OWNER, mints[0]) == derive(OWNER, mints[0], TOKEN_2022_PROGRAM_ID)
+    assert reloaded.get_ata(OWNER, mints[20]) is None
+
+    reloaded.invalidate(OWNER, mints[0])
+    assert AccountCache(path=str(tmp_path / "accounts.json")).get_ata(OWNER, mints[0]) is None
+
+
+def test_missing_account_errors_are_recognised():
+    assert is_missing_account_error(RuntimeError("Transaction simulation failed: AccountNotFound"))
+    assert not is_missing_account_error(RuntimeError("Blockhash not found"))
+
+
+def test_prefetch_skips_mints_not_owned_by_a_token_program(tmp_path):
+    mint, bogus = Pubkey.new_unique(), Pubkey.new_unique()
+    system_program = Pubkey.default()
+    accounts = {
+        mint: SimpleNamespace(owner=TOKEN_PROGRAM_ID),
+        bogus: SimpleNamespace(owner=system_program),
+        derive(OWNER, mint, TOKEN_PROGRAM_ID): SimpleNamespace(owner=TOKEN_PROGRAM_ID),
+        # An account at the derived address doesn't make it a token account
+        derive(OWNER, bogus, system_program): SimpleNamespace(owner=system_program),
+    }
+    cache = AccountCache(path=str(tmp_path / "accounts.json"))
+    assert asyncio.run(cache.prefetch(FakeRpc(accounts), OWNER, [mint, bogus], derive)) == 1
+    assert cache.get_program(bogus) is None
+    assert cache.get_ata(OWNER, bogus) is None
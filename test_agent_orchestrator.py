@@ -0,0 +1,90 @@
+import asyncio
+import time
+from agents.agent_orchestrator import AgentOrchestrator
+
+
+class SleepyAgent:
+    def __init__(self, delay, action="BUY", confidence=0.9, timeout=None):
+        self.delay = delay
+        self.action = action
+        self.confidence = confidence
+        if timeout:
+            self.timeout = timeout
+        self.finished = False
+
+    async def get_decision(self, indicators):
+        await asyncio.sleep(self.delay)
+        self.finished = True
+        return {"action": self.action, "amount": 0.05, "confidence": self.confidence}
+
+
+class BrokenAgent:
+    async def get_decision(self, indicators):
+        raise RuntimeError("model unavailable")
+
+
+def make_orchestrator(monkeypatch, agents, **kwargs):
+    monkeypatch.setattr(AgentOrchestrator, "_ensure_vote_table", lambda self: None)
+    monkeypatch.setattr(AgentOrchestrator, "_log_vote", lambda self, *args: None)
+    return AgentOrchestrator(agents, **kwargs)
+
+
+def test_agents_run_concurrently_and_late_agents_abstain(monkeypatch):
+    agents = [SleepyAgent(0.2), SleepyAgent(0.2, "SELL"), SleepyAgent(5, timeout=0.3), BrokenAgent()]
+    orch = make_orchestrator(monkeypatch, agents, agent_timeout=1, quorum=0)
+
+    started = time.perf_counter()
+    votes = asyncio.run(orch._collect_votes({"symbol": "SOL"}))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.6
+    assert [d["action"] for _, d in votes] == ["BUY", "SELL"]
+    stats = orch.latency_stats()
+    assert stats["SleepyAgent"]["timeouts"] == 1
+    assert stats["BrokenAgent"]["errors"] == 1
+    assert stats["SleepyAgent"]["calls"] == 3
+
+
+def test_quorum_cancels_pending_agents(monkeypatch):
+    slow = SleepyAgent(2)
+    agents = [SleepyAgent(0.01), SleepyAgent(0.02), slow]
+    orch = make_orchestrator(monkeypatch, agents, agent_timeout=5, quorum=2, quorum_confidence=0.8)
+
+    started = time.perf_counter()
+    votes = asyncio.run(orch._collect_votes({"symbol": "SOL"}))
+
+    assert time.perf_counter() - started < 1
+    assert len(votes) == 2 and not slow.finished
+    assert orch.latency_stats()["SleepyAgent"]["cancelled"] == 1
+
+
+def test_performance_lookup_runs_off_the_loop_once_per_ttl(monkeypatch):
+    orch = make_orchestrator(monkeypatch, [SleepyAgent(0.01)], agent_timeout=1, quorum=0)
+    calls = []
+
+    def blocking_evaluate():
+        calls.append(1)
+        time.sleep(0.3)  # a slow Postgres round trip
+        return {"avg_pnl": 0.1, "avg_return": 0.01, "win_rate": 0.9}
+
+    monkeypatch.setattr(orch.monitor, "evaluate", blocking_evaluate)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.ensure_future(ticker())
+        decisions = await asyncio.gather(*(orch.resolve_decision({"symbol": s}) for s in ("SOL", "JUP", "BONK")))
+        ticking.cancel()
+        return decisions, ticks
+
+    decisions, ticks = asyncio.run(run())
+    assert [d["action"] for d in decisions] == ["BUY"] * 3
+    assert calls == [1]
+    # The loop kept running while the lookup blocked a worker thread
+    assert ticks >= 15
@@ -0,0 +1,37 @@
+import asyncio
+from benchmarks.bench_swap import percentiles, run_swaps
+from benchmarks.mock_solana import MockSolanaServer
+
+
+def test_swaps_run_end_to_end_against_the_mock(tmp_path):
+    server = MockSolanaServer(latency_ms=1, jitter_ms=0, confirm_ms=0, seed=0)
+    base_url = server.start()
+    try:
+        result = asyncio.run(run_swaps(base_url, 30, concurrency=8, mints=5, confirm=True, cache_dir=str(tmp_path)))
+    finally:
+        server.stop()
+
+    assert result["ok"] == 30 and result["failed"] == 0
+    assert result["confirmed"] == 30
+    assert set(result["swap"]) == {"p50_ms", "p95_ms", "p99_ms", "max_ms"}
+    assert server.stats["sendTransaction"] == 30
+    # Mint program + ATA lookups happen once per mint, then come from the cache
+    assert server.stats["getAccountInfo"] <= 2 * 5 + 8
+
+
+def test_injected_errors_fail_swaps_without_raising(tmp_path):
+    server = MockSolanaServer(latency_ms=1, jitter_ms=0, error_rate=1.0, seed=0)
+    base_url = server.start()
+    try:
+        result = asyncio.run(run_swaps(base_url, 5, concurrency=5, mints=1, cache_dir=str(tmp_path)))
+    finally:
+        server.stop()
+
+    assert result["ok"] == 0 and result["failed"] == 5
+
+
+def test_percentiles_use_the_nearest_rank():
+    # With 30 samples, p95 is the 29th (int() truncation gave the 28th)
+    stats = percentiles([float(i) for i in range(1, 31)])
+    assert (stats["p95_ms"], stats["p99_ms"], stats["max_ms"]) == (29.0, 30.0, 30.0)
+    assert percentiles([5.0])["p99_ms"] == 5.0
@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from spl.token.constants import TOKEN_PROGRAM_ID
+from account_cache import AccountCache
+from blockhash_service import BlockhashService
+from tx_builder import AtaTransactionBuilder, derive_ata
+
+
+class FakeRpc:
+    def __init__(self, accounts=None):
+        self.accounts = accounts or {}
+        self.blockhash_calls = 0
+
+    async def get_latest_blockhash(self, commitment=None):
+        self.blockhash_calls += 1
+        return SimpleNamespace(value=SimpleNamespace(blockhash=Hash.new_unique(), last_valid_block_height=100))
+
+    async def get_multiple_accounts(self, pubkeys):
+        return SimpleNamespace(value=[self.accounts.get(p) for p in pubkeys])
+
+
+def test_blockhash_is_reused_until_it_ages_out():
+    rpc = FakeRpc()
+    service = BlockhashService(client=rpc, max_age=30)
+
+    async def run():
+        first, _ = await service.get()
+        again = [h for h, _ in await asyncio.gather(service.get(), service.get())]
+        service.fetched_at -= 31
+        refreshed, _ = await service.get()
+        return first, again, refreshed
+
+    first, again, refreshed = asyncio.run(run())
+    assert again == [first, first]
+    assert refreshed != first
+    assert rpc.blockhash_calls == 2
+
+
+def test_builder_presigns_only_missing_atas(tmp_path):
+    wallet = Keypair()
+    have, need, unknown = Pubkey.new_unique(), Pubkey.new_unique(), Pubkey.new_unique()
+    accounts = {
+        have: SimpleNamespace(owner=TOKEN_PROGRAM_ID),
+        need: SimpleNamespace(owner=TOKEN_PROGRAM_ID),
+        derive_ata(wallet.pubkey(), have, TOKEN_PROGRAM_ID): SimpleNamespace(owner=TOKEN_PROGRAM_ID),
+    }
+    rpc = FakeRpc(accounts)
+    service = BlockhashService(client=rpc, max_age=30)
+    builder = AtaTransactionBuilder(wallet, service, AccountCache(path=str(tmp_path / "accounts.json")))
+
+    assert asyncio.run(builder.prepare(rpc, [have, need, unknown])) == 1
+    assert builder.take(have) is None and builder.take(unknown) is None
+
+    prepared = builder.take(need)
+    assert prepared.ata == derive_ata(wallet.pubkey(), need, TOKEN_PROGRAM_ID)
+    assert prepared.tx.message.recent_blockhash == service.blockhash
+    assert prepared.tx.verify_with_results() == [True]
+    assert builder.take(need) is None
+
+
+def test_prepared_transactions_expire_with_their_blockhash(tmp_path):
+    wallet = Keypair()
+    mint = Pubkey.new_unique()
+    rpc = FakeRpc({mint: SimpleNamespace(owner=TOKEN_PROGRAM_ID)})
+    service = BlockhashService(client=rpc, max_age=30)
+    builder = AtaTransactionBuilder(wallet, service, AccountCache(path=str(tmp_path / "accounts.json")))
+
+    asyncio.run(builder.prepare(rpc, [mint]))
+    builder._prepared[str(mint)].fetched_at -= 31
+    assert builder.take(mint) is None
+    assert builder.stats["expired"] == 1
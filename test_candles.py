@@ -0,0 +1,123 @@
+import numpy as np
+from candles import FIELDS, CandleStore, bulk_candles
+from indicator_engine import StreamingIndicatorEngine
+
+
+def ticks_with_gaps(seed=5):
+    rng = np.random.default_rng(seed)
+    gaps = rng.exponential(20.0, 3000)
+    gaps[[500, 1500]] = [900.0, 40000.0]  # a short outage and a long one
+    timestamps = 1_700_000_000 + np.cumsum(gaps)
+    prices = 100 + np.cumsum(rng.normal(0, 0.1, len(gaps)))
+    volumes = rng.uniform(1e6, 2e6, len(gaps))
+    return timestamps, prices, volumes
+
+
+def test_incremental_candles_match_bulk():
+    timestamps, prices, volumes = ticks_with_gaps()
+    store = CandleStore(resolutions=["1m", "5m"], capacity=10_000, max_gap=60, persist=False)
+    for ts, price, volume in zip(timestamps, prices, volumes):
+        store.on_tick("sol", float(ts), price, volume)
+    store.close_due(timestamps[-1] + 3600)
+
+    for resolution, interval in (("1m", 60), ("5m", 300)):
+        bulk = bulk_candles(timestamps, prices, volumes, interval, max_gap=60)
+        streamed = store.candles("SOL", resolution)
+        assert [tuple(c) for c in zip(*(bulk[f].tolist() for f in FIELDS))] == streamed
+
+        buckets = bulk["bucket"]
+        assert (np.diff(buckets) % interval == 0).all()
+        # The 15-minute outage is filled with flat candles, the 11-hour one is not
+        assert np.diff(buckets).max() > 60 * interval
+        assert bulk["ticks"].sum() == len(prices)
+        assert (bulk["low"] <= bulk["open"]).all() and (bulk["open"] <= bulk["high"]).all()
+        flat = bulk["ticks"] == 0
+        assert (bulk["open"][flat] == bulk["close"][flat]).all()
+
+
+def test_late_ticks_dropped_and_engine_reads_candles():
+    store = CandleStore(resolutions=["1m"], max_gap=5, persist=False)
+    engine = StreamingIndicatorEngine(min_history=3)
+    engine.warm("SOL", [1.0, 2.0, 3.0])
+    engine.attach_candles(store, "1m")
+
+    store.on_tick("SOL", 60.0, 10.0)
+    store.on_tick("SOL", 90.0, 12.0)
+    assert engine.snapshot("SOL")["price"] == 3.0  # nothing closed yet
+
+    closed = store.on_tick("SOL", 130.0, 11.0)
+    assert [c for _, c in closed] == [(60, 10.0, 12.0, 10.0, 12.0, 0.0, 2)]
+    assert engine.snapshot("SOL")["price"] == 12.0
+
+    store.on_tick("SOL", 100.0, 99.0)  # bucket 60 is already closed
+    assert store.late_ticks == 1
+    assert store.closes("SOL", "1m") == [12.0]
+
+    store.close_due(400.0)
+    assert store.closes("SOL", "1m") == [12.0, 11.0]
+
+
+def test_main_loop_decides_on_the_price_just_logged():
+    import main
+    from indicator_engine import IndicatorState
+    from price_buffer import PriceBufferStore
+
+    buffers = PriceBufferStore()
+    store = CandleStore(resolutions=["5m"], persist=False)
+    engine = StreamingIndicatorEngine()
+    assert main.attach_indicator_feed(buffers, store, engine, interval="5m")
+
+    closes = [100 + np.sin(i / 4) for i in range(60)]
+    engine.warm("SOL", closes)
+    start = 1_700_000_100  # mid-bucket, like a daemon cycle
+
+    class FakeLogger:
+        # Stands in for PriceLogger: one logged price per cycle
+        def __init__(self):
+            self.cycle = 0
+
+        def fetch_and_log_all(self):
+            self.cycle += 1
+            buffers.append("SOL", float(start + self.cycle * 120), 100.0 + self.cycle)
+
+    logger = FakeLogger()
+    for cycle in range(1, 8):
+        main.record_prices(logger, store, now=float(start + cycle * 120))
+        latest = 100.0 + cycle
+        expected = IndicatorState()
+        for price in closes + store.closes("SOL", "5m") + [latest]:
+            expected.update(price)
+        snap = engine.snapshot("SOL")
+        assert snap["price"] == latest
+        assert snap == expected.snapshot()
+    # Candles did close along the way and only their closes advanced state
+    assert len(store.closes("SOL", "5m")) >= 2
+
+
+def test_price_fetch_does_not_block_the_event_loop():
+    import asyncio
+    import time
+    import main
+
+    store = CandleStore(resolutions=["5m"], persist=False)
+
+    class SlowLogger:
+        # A CoinGecko retry sleeping through its backoff
+        def fetch_and_log_all(self):
+            time.sleep(0.3)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.ensure_future(ticker())
+        await main.record_prices_off_loop(SlowLogger(), store)
+        ticking.cancel()
+        return ticks
+
+    assert asyncio.run(run()) >= 15
@@ -0,0 +1,57 @@
+import asyncio
+from types import SimpleNamespace
+from solders.signature import Signature
+from solders.transaction_status import TransactionConfirmationStatus
+from confirmation_tracker import ConfirmationTracker
+
+
+class FakeRpc:
+    def __init__(self):
+        self.statuses = {}
+        self.calls = []
+
+    async def get_signature_statuses(self, signatures):
+        self.calls.append(len(signatures))
+        return SimpleNamespace(value=[self.statuses.get(s) for s in signatures])
+
+
+def _status(level, err=None):
+    return SimpleNamespace(err=err, confirmation_status=level)
+
+
+def test_statuses_are_polled_in_one_batch_and_resolved():
+    rpc = FakeRpc()
+    tracker = ConfirmationTracker(client=rpc, poll_interval=0.01, timeout=5)
+    ok, bad, slow = Signature.new_unique(), Signature.new_unique(), Signature.new_unique()
+    seen = []
+
+    async def on_status(sig, status):
+        seen.append((sig, status))
+
+    async def run():
+        futures = [tracker.track(sig, callback=on_status) for sig in (ok, bad, slow)]
+        rpc.statuses[ok] = _status(TransactionConfirmationStatus.Confirmed)
+        rpc.statuses[bad] = _status(TransactionConfirmationStatus.Processed, err="InstructionError")
+        rpc.statuses[slow] = _status(TransactionConfirmationStatus.Processed)
+        await asyncio.sleep(0.05)
+        assert not futures[2].done()
+        rpc.statuses[slow] = _status(TransactionConfirmationStatus.Finalized)
+        return await asyncio.gather(*futures)
+
+    assert asyncio.run(run()) == ["confirmed", "failed", "confirmed"]
+    assert rpc.calls[0] == 3 and set(rpc.calls[1:]) == {1}
+    assert sorted(seen) == sorted([(str(ok), "confirmed"), (str(bad), "failed"), (str(slow), "confirmed")])
+    assert tracker.pending() == 0
+
+
+def test_unseen_signatures_expire():
+    rpc = FakeRpc()
+    tracker = ConfirmationTracker(client=rpc, poll_interval=0.01, timeout=0.03)
+    seen = []
+
+    async def run():
+        return await tracker.track(str(Signature.new_unique()), callback=lambda sig, status: seen.append(status))
+
+    assert asyncio.run(run()) == "expired"
+    assert seen == ["expired"]
+    assert tracker.stats["expired"] == 1
@@ -0,0 +1,141 @@
+import threading
+import time
+from db import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, args=()):
+        if self.conn.broken:
+            raise ConnectionError("server closed the connection")
+
+    def fetchall(self):
+        return [(1,)]
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.broken = False
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def connect():
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    return ConnectionPool(connect=connect, **kwargs), created
+
+
+def test_connections_are_reused():
+    pool, created = make_pool(max_size=2)
+
+    for _ in range(5):
+        with pool.connection() as conn:
+            conn.cursor().execute("SELECT 1")
+
+    assert len(created) == 1
+    stats = pool.stats()
+    assert stats["checkouts"] == 5
+    assert stats["in_use"] == 0
+    assert stats["idle"] == 1
+
+
+def test_close_returns_connection_to_pool():
+    pool, created = make_pool(max_size=1)
+
+    conn = pool.acquire()
+    conn.close()
+    conn.close()  # double close must not double release
+
+    assert pool.stats()["idle"] == 1
+    assert not created[0].closed
+
+
+def test_checkout_waits_then_times_out():
+    pool, _ = make_pool(max_size=1)
+    held = pool.acquire()
+
+    try:
+        pool.acquire(timeout=0.05)
+        assert False, "expected PoolTimeout"
+    except PoolTimeout:
+        pass
+
+    def release_later():
+        time.sleep(0.05)
+        held.close()
+
+    threading.Thread(target=release_later).start()
+    with pool.connection(timeout=1):
+        pass
+
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["waits"] == 2
+    assert stats["wait_time"] > 0
+
+
+def test_broken_idle_connection_is_replaced():
+    pool, created = make_pool(max_size=1, health_check_after=0)
+
+    with pool.connection():
+        pass
+    created[0].broken = True
+
+    with pool.connection() as conn:
+        assert conn._raw is created[1]
+
+    assert created[0].closed
+    assert pool.stats()["failed_health_checks"] == 1
+
+
+def test_expired_connection_is_recycled():
+    pool, created = make_pool(max_size=1, max_lifetime=0)
+
+    with pool.connection():
+        pass
+    with pool.connection():
+        pass
+
+    assert len(created) == 2
+    assert all(c.closed for c in created[:1])
+    assert pool.stats()["recycled"] >= 1
+
+
+def test_failed_queries_return_connections(monkeypatch):
+    import db
+    import db_logger
+    from real_market_data import RealMarketDataFetcher
+    from token_performance import TokenPerformanceTracker
+
+    pool, created = make_pool(max_size=1, checkout_timeout=0.2)
+    monkeypatch.setattr(db, "_pool", pool)
+    conn = pool.acquire()
+    conn._raw.broken = True
+    conn.close()
+
+    # With max_size=1 a leaked connection would make the next call time out
+    for call in (db_logger.fetch_all_trades, db_logger.fetch_ledger_rows,
+                 lambda: RealMarketDataFetcher(candle_interval="tick").fetch_price_history("NOPE_COLD_SYMBOL", 50)):
+        try:
+            call()
+        except ConnectionError:
+            pass
+    assert TokenPerformanceTracker().top_tokens_by_pnl() == TokenPerformanceTracker().bootstrap_symbols
+    assert pool.stats()["in_use"] == 0
@@ -0,0 +1,125 @@
+import threading
+from db_writer import WriteBehindWriter
+
+
+class RecordingCursor:
+    def __init__(self, db):
+        self.db = db
+
+    def execute(self, query, params=()):
+        if self.db.fail_on and self.db.fail_on in params:
+            raise ValueError("invalid input syntax for type double precision")
+        self.db.statements.append((query, list(params)))
+
+
+class RecordingConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return RecordingCursor(self.db)
+
+    def commit(self):
+        self.db.commits += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class RecordingDB:
+    def __init__(self, fail_on=None):
+        self.statements = []
+        self.commits = 0
+        self.fail_on = fail_on
+
+    def connect(self):
+        return RecordingConnection(self)
+
+
+def test_rows_are_batched_into_multi_row_inserts():
+    db = RecordingDB()
+    writer = WriteBehindWriter(db.connect, batch_size=100, flush_interval=60).start()
+
+    for i in range(10):
+        writer.submit("price_history", ("2025-01-01T00:00:00", "SOL", 100.0 + i, 1.0))
+    assert writer.flush(timeout=5)
+    writer.stop()
+
+    assert len(db.statements) == 1
+    query, params = db.statements[0]
+    assert query.startswith("INSERT INTO price_history (timestamp, symbol, price, volume) VALUES")
+    assert len(params) == 40
+    assert db.commits == 1
+
+
+def test_size_threshold_triggers_flush_without_waiting_for_timer():
+    db = RecordingDB()
+    writer = WriteBehindWriter(db.connect, batch_size=5, flush_interval=60).start()
+    written = threading.Event()
+
+    original = writer._write
+
+    def spy(batch):
+        original(batch)
+        written.set()
+
+    writer._write = spy
+    for i in range(5):
+        writer.submit("agent_votes", ("2025-01-01T00:00:00", "RuleBasedAgent", "BUY", 0.05, 0.85, "SOL"))
+
+    assert written.wait(timeout=5)
+    writer.stop()
+
+
+def test_arrival_order_is_kept_across_tables():
+    db = RecordingDB()
+    writer = WriteBehindWriter(db.connect, batch_size=100, flush_interval=60).start()
+
+    writer.submit("price_history", ("t1", "SOL", 1.0, 1.0))
+    writer.submit("trades", ("t2", "BUY", 0.05, 1.0, 0.9, "SOL", "sig", None, None, 0.1))
+    writer.submit("price_history", ("t3", "SOL", 2.0, 1.0))
+    writer.flush(timeout=5)
+    writer.stop()
+
+    tables = [query.split()[2] for query, _ in db.statements]
+    assert tables == ["price_history", "trades", "price_history"]
+
+
+def test_bad_row_is_dropped_without_losing_the_batch():
+    db = RecordingDB(fail_on="bad")
+    writer = WriteBehindWriter(db.connect, batch_size=100, flush_interval=60, max_retries=1).start()
+
+    writer.submit("price_history", ("t1", "SOL", 1.0, 1.0))
+    writer.submit("price_history", ("t2", "SOL", "bad", 1.0))
+    writer.submit("price_history", ("t3", "SOL", 3.0, 1.0))
+    writer.flush(timeout=10)
+    writer.stop()
+
+    assert writer.stats["written"] == 2
+    assert writer.stats["dropped"] == 1
+
+
+def test_stop_drains_queue():
+    db = RecordingDB()
+    writer = WriteBehindWriter(db.connect, batch_size=1000, flush_interval=60).start()
+
+    for i in range(50):
+        writer.submit("price_history", (f"t{i}", "SOL", float(i), 1.0))
+    writer.stop()
+
+    assert sum(len(params) for _, params in db.statements) == 200
+
+
+def test_gap_fill_candles_never_overwrite_stored_ones():
+    db = RecordingDB()
+    writer = WriteBehindWriter(db.connect, batch_size=100, flush_interval=60).start()
+    writer.submit("price_candles", ("SOL", "5m", "2025-01-01T00:00:00", 1.0, 1.0, 1.0, 1.0, 0.0, 0))
+    assert writer.flush(timeout=5)
+    writer.stop()
+
+    query = " ".join(db.statements[0][0].split())
+    assert "ON CONFLICT (symbol, resolution, bucket) DO UPDATE SET" in query
+    assert query.endswith("WHERE EXCLUDED.ticks > 0")
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+from agents.rule_based_agent import RuleBasedAgent
+from agents.threshold_agent import ThresholdAgent
+from event_backtest import SimulatedSwapper, run_event_backtest
+
+
+def synthetic_ticks(n=20000, seed=3):
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.003, n)))
+    return prices, pd.date_range("2024-01-01", periods=n, freq="10s")
+
+
+def test_fills_respect_cooldown_latency_and_slippage(monkeypatch):
+    monkeypatch.setenv("MAX_CONSECUTIVE_LOSSES", "1000")
+    monkeypatch.setenv("MAX_DAILY_LOSS", "1000")
+    prices, timestamps = synthetic_ticks()
+    swapper = SimulatedSwapper(slippage_bps=100, latency_ms=25_000)
+    result = run_event_backtest(prices, timestamps, [RuleBasedAgent(), ThresholdAgent()],
+                                swapper=swapper, cooldown_minutes=30)
+    trades = result["trades"]
+    assert len(trades) > 2
+
+    assert ((trades["fill_time"] - trades["signal_time"]) >= pd.Timedelta(seconds=25)).all()
+    assert (trades["signal_time"].iloc[1:].values - trades["fill_time"].iloc[:-1].values
+            >= np.timedelta64(30, "m")).all()
+
+    by_time = pd.Series(prices, index=timestamps)
+    market = by_time.loc[trades["fill_time"]].to_numpy()
+    buys = trades["action"].to_numpy() == "BUY"
+    assert np.allclose(trades["fill_price"][buys], market[buys] * 1.01)
+    assert np.allclose(trades["fill_price"][~buys], market[~buys] * 0.99)
+    assert (trades["position"] >= -1e-12).all()
+
+
+def test_equity_reconciles_with_trade_pnl(monkeypatch):
+    monkeypatch.setenv("MAX_CONSECUTIVE_LOSSES", "1000")
+    prices, timestamps = synthetic_ticks()
+    result = run_event_backtest(prices, timestamps, [RuleBasedAgent(), ThresholdAgent()], cooldown_minutes=0)
+    trades, stats = result["trades"], result["stats"]
+
+    assert stats["trades"] == len(trades)
+    assert np.isclose(trades["pnl"].sum(), stats["realized_pnl"], atol=1e-5)
+    # Final equity = realized PnL + open lots marked at the last price - fees
+    open_value = result["position"][-1] * prices[-1]
+    cost = (trades["amount"] * trades["fill_price"] * np.where(trades["action"] == "BUY", 1, -1)).sum()
+    assert np.isclose(stats["final_equity"], open_value - cost - stats["fees"], atol=1e-5)
+    assert 0.0 <= stats["exposure"] <= 1.0
+    assert stats["max_drawdown"] >= 0.0
+
+
+def test_rejections_come_from_risk_manager_and_pnl_is_net_of_fees(monkeypatch):
+    monkeypatch.setenv("MAX_CONSECUTIVE_LOSSES", "1000")
+    monkeypatch.setenv("MAX_DAILY_LOSS", "1000")
+    prices, timestamps = synthetic_ticks()
+    agents = [RuleBasedAgent(), ThresholdAgent()]
+
+    free = run_event_backtest(prices, timestamps, agents, swapper=SimulatedSwapper(0, 0, 0, latency_ms=0),
+                              cooldown_minutes=30)
+    assert free["stats"]["fees"] == 0.0
+    assert free["stats"]["win_rate"] > 0.0
+    assert set(free["stats"]["rejected"]) <= {"confidence", "rsi", "cooldown", "flat", "unfilled"}
+    assert free["stats"]["rejected"]["cooldown"] > 0
+
+    # 1 SOL of fees per swap at $100 SOL: no round trip of 0.05 can win
+    costly = SimulatedSwapper(0, 1_000_000_000, 0, latency_ms=0, sol_price=100.0)
+    result = run_event_backtest(prices, timestamps, agents, swapper=costly, cooldown_minutes=30)
+    stats, trades = result["stats"], result["trades"]
+    assert len(trades) == len(free["trades"])
+    assert stats["win_rate"] == 0.0
+    assert stats["realized_pnl"] < free["stats"]["realized_pnl"] - stats["fees"] / 2
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+from indicator_engine import EWM, RollingMean, SeededEMA, IndicatorState, StreamingIndicatorEngine
+
+
+def random_walk(n, seed=7):
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    # A flat stretch exercises the zero-change RSI branch
+    if n > 135:
+        prices[120:135] = prices[119]
+    return prices.tolist()
+
+
+def stream(obj, values):
+    return np.array([obj.update(v) for v in values])
+
+
+def test_rolling_mean_matches_pandas():
+    prices = random_walk(2000)
+    expected = pd.Series(prices).rolling(20, min_periods=20).mean().to_numpy()
+    np.testing.assert_allclose(stream(RollingMean(20), prices), expected, rtol=1e-12, equal_nan=True)
+
+
+def test_adjusted_ewm_matches_pandas_rma():
+    changes = pd.Series(random_walk(1000)).diff()
+    expected = changes.ewm(alpha=1 / 14, min_periods=14).mean().to_numpy()
+    np.testing.assert_array_equal(stream(EWM(1 / 14, adjust=True, min_periods=14), changes), expected)
+
+
+def test_seeded_ema_matches_pandas_ta_formula():
+    close = pd.Series(random_walk(1000))
+    seeded = close.copy()
+    seeded[:25] = np.nan
+    seeded.iloc[25] = close[0:26].mean()
+    expected = seeded.ewm(span=26, adjust=False).mean().to_numpy()
+    np.testing.assert_array_equal(stream(SeededEMA(26), close), expected)
+
+
+def test_snapshot_needs_fifty_prices():
+    state = IndicatorState()
+    for price in random_walk(49):
+        state.update(price)
+    assert state.snapshot() is None
+    state.update(100.0)
+    assert set(state.snapshot()) == {"price", "sma_20", "sma_50", "rsi", "macd", "macd_signal", "macd_hist"}
+
+
+def test_engine_only_tracks_warmed_symbols():
+    engine = StreamingIndicatorEngine()
+    prices = random_walk(80)
+
+    assert engine.update("SOL", 1.0) is None
+    engine.warm("SOL", prices[:60])
+    for price in prices[60:]:
+        engine.update("sol", price)
+
+    fresh = IndicatorState()
+    for price in prices:
+        fresh.update(price)
+    assert engine.snapshot("SOL") == fresh.snapshot()
+
+
+def test_streaming_matches_compute_indicators():
+    pytest.importorskip("pandas_ta")
+    from external_indicator_calculator import IndicatorCalculator
+
+    calc = IndicatorCalculator(engine=None)
+    prices = random_walk(300)
+    state = IndicatorState()
+
+    for i, price in enumerate(prices):
+        state.update(price)
+        if i < 49 or i % 10:
+            continue
+        expected = calc.compute_indicators(prices[:i + 1])
+        got = state.snapshot()
+        for key, value in expected.items():
+            assert got[key] == pytest.approx(value, rel=1e-9, abs=1e-12), (i, key)
+
+
+def test_batch_matches_streaming_for_ragged_histories():
+    from indicator_batch import build_price_matrix, batch_indicators, batch_to_dicts
+
+    histories = {f"T{n}": random_walk(n, seed=n) for n in (30, 50, 51, 64, 140, 200)}
+    symbols, matrix, mask = build_price_matrix(histories)
+    assert mask.sum(axis=1).tolist() == [len(p) for p in histories.values()]
+
+    got = batch_to_dicts(symbols, batch_indicators(matrix))
+    assert "T30" not in got
+    for symbol, prices in histories.items():
+        state = IndicatorState()
+        for price in prices:
+            state.update(price)
+        if state.snapshot() is None:
+            continue
+        for key, value in state.snapshot().items():
+            assert got[symbol][key] == pytest.approx(value, rel=1e-9, abs=1e-12), (symbol, key)
+
+
+def test_warm_many_continues_like_a_full_stream():
+    engine = StreamingIndicatorEngine()
+    prices = {"SOL": random_walk(200, seed=1), "BONK": random_walk(90, seed=2), "NEW": random_walk(10)}
+
+    snapshots = engine.warm_many({s: p[:-20] for s, p in prices.items()})
+    assert set(snapshots) == {"SOL", "BONK"} and not engine.has("NEW")
+
+    for symbol in ("SOL", "BONK"):
+        for price in prices[symbol][-20:]:
+            engine.update(symbol, price)
+        fresh = IndicatorState()
+        for price in prices[symbol]:
+            fresh.update(price)
+        for key, value in fresh.snapshot().items():
+            assert engine.snapshot(symbol)[key] == pytest.approx(value, rel=1e-9, abs=1e-12), (symbol, key)
@@ -0,0 +1,98 @@
+import asyncio
+import base64
+import json
+import httpx
+from types import SimpleNamespace
+from solders.keypair import Keypair
+from solders.hash import Hash
+from solders.message import MessageV0
+from solders.null_signer import NullSigner
+from solders.pubkey import Pubkey
+from solders.transaction import VersionedTransaction
+from spl.token.constants import TOKEN_PROGRAM_ID
+import async_clients
+from jupiter_swapper import JupiterSwapper
+
+USDC = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+
+
+def unsigned_swap_tx(wallet):
+    message = MessageV0.try_compile(wallet.pubkey(), [], [], Hash.default())
+    return VersionedTransaction(message, [NullSigner(wallet.pubkey())])
+
+
+class FakeRpc:
+    def __init__(self):
+        self.sent = []
+
+    async def get_account_info(self, pubkey):
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(value=SimpleNamespace(owner=TOKEN_PROGRAM_ID))
+
+    async def send_raw_transaction(self, txn, opts=None):
+        await asyncio.sleep(0.05)
+        self.sent.append(txn)
+        return SimpleNamespace(value="sig123")
+
+
+def test_swap_runs_without_blocking_the_loop(monkeypatch):
+    wallet = Keypair()
+    requests_seen = []
+
+    async def handler(request):
+        requests_seen.append(request.url.path)
+        await asyncio.sleep(0.05)
+        if request.url.path.endswith("/quote"):
+            return httpx.Response(200, json={"routePlan": [], "inputMint": "SOL", "inAmount": "1", "outputMint": USDC,
+                                             "outAmount": "1", "otherAmountThreshold": "1", "swapMode": "ExactIn",
+                                             "slippageBps": 50, "platformFee": None})
+        body = json.loads(request.content)
+        assert body["userPublicKey"] == str(wallet.pubkey())
+        tx = base64.b64encode(bytes(unsigned_swap_tx(wallet))).decode()
+        return httpx.Response(200, json={"swapTransaction": tx})
+
+    async def run():
+        key = id(asyncio.get_running_loop())
+        monkeypatch.setitem(async_clients._http_clients, key, httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        swapper = JupiterSwapper(bytes(wallet))
+        swapper.client = FakeRpc()
+
+        async def existing_ata(mint, owner, token_tags=None):
+            await swapper.client.get_account_info(mint)
+            return Pubkey.new_unique()
+        swapper._ensure_associated_token_account = existing_ata
+
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        beat = asyncio.create_task(heartbeat())
+        sig = await swapper.execute_swap({"symbol": "USDC", "address": USDC}, {"action": "BUY", "amount": 0.001})
+        beat.cancel()
+        await async_clients.close_async_clients()
+        return sig, ticks, swapper.client.sent
+
+    sig, ticks, sent = asyncio.run(run())
+    assert sig == "sig123"
+    assert requests_seen == ["/swap/v1/quote", "/swap/v1/swap"]
+    assert ticks >= 10
+    assert VersionedTransaction.from_bytes(sent[0]).signatures[0] != VersionedTransaction.from_bytes(bytes(unsigned_swap_tx(wallet))).signatures[0]
+
+
+def test_cached_ata_skips_account_lookups(tmp_path):
+    from account_cache import AccountCache
+
+    wallet = Keypair()
+    mint = Pubkey.from_string(USDC)
+    ata = Pubkey.new_unique()
+    swapper = JupiterSwapper(bytes(wallet))
+    swapper.client = FakeRpc()
+    swapper.account_cache = AccountCache(path=str(tmp_path / "accounts.json"))
+    swapper.account_cache.set_ata(wallet.pubkey(), mint, ata)
+
+    swapper.client.get_account_info = None  # any lookup would raise
+    assert asyncio.run(swapper._ensure_associated_token_account(mint, wallet.pubkey())) == ata
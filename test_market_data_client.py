@@ -0,0 +1,83 @@
+import threading
+import time
+import requests
+from market_data_client import MarketDataClient, LIVE, BACKFILL
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status}", response=response)
+
+
+class FakeCoinGecko:
+    def __init__(self, failures=(), delay=0.0):
+        self.failures = list(failures)
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get_price(self, ids, vs_currencies, **kwargs):
+        with self.lock:
+            self.calls.append(ids)
+            failure = self.failures.pop(0) if self.failures else None
+        time.sleep(self.delay)
+        if failure:
+            try:
+                raise failure
+            except requests.HTTPError:
+                # pycoingecko re-raises the error body as a ValueError
+                raise ValueError({"status": {"error_code": failure.response.status_code}})
+        return {ids: {"usd": 1.0}}
+
+
+def test_retries_throttled_calls_with_backoff():
+    cg = FakeCoinGecko(failures=[http_error(429), http_error(503)])
+    client = MarketDataClient(cg, calls_per_minute=6000, burst=10, base_backoff=0.01)
+
+    assert client.get_price("solana", "usd") == {"solana": {"usd": 1.0}}
+    stats = client.stats()
+    assert stats["requests"] == 3 and stats["retries"] == 2 and stats["throttled"] == 1
+
+
+def test_client_errors_are_not_retried():
+    client = MarketDataClient(FakeCoinGecko(failures=[http_error(404)]), calls_per_minute=6000, base_backoff=0.01)
+    try:
+        client.get_price("nope", "usd")
+        assert False, "expected the 404 to propagate"
+    except ValueError:
+        pass
+    assert client.stats()["retries"] == 0 and client.stats()["errors"] == 1
+
+
+def test_identical_inflight_calls_are_coalesced():
+    cg = FakeCoinGecko(delay=0.2)
+    client = MarketDataClient(cg, calls_per_minute=6000, burst=10)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.get_price("solana", "usd"))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(cg.calls) == 1 and len(results) == 5
+    assert client.stats()["coalesced"] == 4
+
+
+def test_live_lane_is_served_before_backfill():
+    cg = FakeCoinGecko()
+    # One call per 50ms, no burst: every caller after the first queues
+    client = MarketDataClient(cg, calls_per_minute=1200, burst=1)
+    client.get_price("warmup", "usd")
+
+    threads = [threading.Thread(target=client.get_price, args=(f"backfill-{i}", "usd"), kwargs={"priority": BACKFILL})
+               for i in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.01)
+    live = threading.Thread(target=client.get_price, args=("live", "usd"), kwargs={"priority": LIVE})
+    live.start()
+    for t in threads + [live]:
+        t.join()
+
+    assert cg.calls.index("live") <= 2
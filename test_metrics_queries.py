@@ -0,0 +1,118 @@
+from datetime import date, datetime, timezone
+import metrics_queries
+
+
+class RecordingCursor:
+    """
+    Records every statement; fetchall() hands out `results` in order.
+    """
+
+    def __init__(self, results=()):
+        self.results = list(results)
+        self.statements = []
+        self.rowcount = 3
+
+    def execute(self, query, args=()):
+        self.statements.append((" ".join(query.split()), tuple(args)))
+
+    def fetchall(self):
+        return self.results.pop(0) if self.results else []
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def use_cursor(monkeypatch, *results):
+    cursor = RecordingCursor(results)
+    conn = FakeConnection(cursor)
+    monkeypatch.setattr(metrics_queries, "get_connection", lambda: conn)
+    monkeypatch.setattr(metrics_queries, "flush_writes", lambda: True)
+    return cursor, conn
+
+
+def test_daily_loss_sums_one_utc_day_in_postgres(monkeypatch):
+    cursor, _ = use_cursor(monkeypatch, [(-2.5,)])
+    assert metrics_queries.daily_realized_loss(date(2025, 3, 9)) == 2.5
+
+    sql, args = cursor.statements[0]
+    assert sql.startswith("SELECT coalesce(sum(pnl), 0) FROM trades WHERE timestamp >= %s AND timestamp < %s")
+    assert "AND (tx_status IS NULL OR tx_status NOT IN ('failed', 'expired'))" in sql
+    assert args == (datetime(2025, 3, 9, tzinfo=timezone.utc), datetime(2025, 3, 10, tzinfo=timezone.utc))
+
+
+def test_pnl_by_symbol_adds_optional_filters_as_parameters(monkeypatch):
+    cursor, _ = use_cursor(monkeypatch, [("SOL", 1.5, 2)])
+    since = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert metrics_queries.pnl_by_symbol(since=since, limit=5) == [("SOL", 1.5, 2)]
+
+    sql, args = cursor.statements[0]
+    assert sql.endswith("AND timestamp >= %s GROUP BY symbol ORDER BY total_pnl DESC LIMIT %s")
+    assert args == (since, 5)
+
+
+def test_rollup_reaggregates_every_day_with_new_trades(monkeypatch):
+    # Watermark 40; trades 41..45 include a late one for Jan 2nd, and a
+    # swap from Jan 1st has since failed
+    cursor, conn = use_cursor(monkeypatch, [(40,)], [(45, [date(2025, 1, 9), date(2025, 1, 2)])],
+                              [(date(2025, 1, 1),), (date(2025, 1, 9),)])
+    assert metrics_queries.refresh_daily_rollup() == 3
+
+    (lock_sql, _), (days_sql, days_args), (dirty_sql, _), (clear_sql, clear_args), \
+        (insert_sql, insert_args), (mark_sql, mark_args) = cursor.statements
+    assert lock_sql.endswith("FROM rollup_watermarks WHERE name = %s FOR UPDATE")
+    assert "FROM trades WHERE id > %s" in days_sql and days_args == (40,)
+    assert dirty_sql == "DELETE FROM rollup_dirty_days RETURNING day"
+
+    days = [date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 9)]
+    assert clear_sql == "DELETE FROM trade_daily_rollup WHERE day = ANY(%s)" and clear_args == (days,)
+    assert insert_sql.startswith("INSERT INTO trade_daily_rollup")
+    assert ("WHERE ((timestamp >= %s AND timestamp < %s) OR (timestamp >= %s AND timestamp < %s) "
+            "OR (timestamp >= %s AND timestamp < %s)) "
+            "AND (tx_status IS NULL OR tx_status NOT IN ('failed', 'expired')) GROUP BY 1, 2") in insert_sql
+    assert insert_args == tuple(bound for day in days for bound in metrics_queries._utc_day_bounds(day))
+
+    assert mark_sql.startswith("INSERT INTO rollup_watermarks") and mark_args == ("trade_daily_rollup", 45)
+    assert conn.commits == 1
+
+
+def test_failed_swaps_requeue_their_day_without_new_trades(monkeypatch):
+    cursor, _ = use_cursor(monkeypatch, [(45,)], [(None, None)], [(date(2025, 1, 1),)])
+    metrics_queries.refresh_daily_rollup()
+    sqls = [sql for sql, _ in cursor.statements]
+    assert any(sql.startswith("INSERT INTO trade_daily_rollup") for sql in sqls)
+    # Nothing new by id, so the watermark stays put
+    assert not any(sql.startswith("INSERT INTO rollup_watermarks") for sql in sqls)
+
+
+def test_rollup_without_new_trades_writes_nothing(monkeypatch):
+    cursor, _ = use_cursor(monkeypatch, [(45,)], [(None, None)])
+    assert metrics_queries.refresh_daily_rollup() == 0
+    assert len(cursor.statements) == 3
+
+    # full=True ignores the watermark
+    cursor, _ = use_cursor(monkeypatch, [(45,)], [(None, None)])
+    metrics_queries.refresh_daily_rollup(full=True)
+    assert cursor.statements[1][1] == (0,)
+
+
+def test_recent_performance_skips_swaps_that_never_executed(monkeypatch):
+    cursor, _ = use_cursor(monkeypatch, [(4, 0.5, 0.02, 0.75)])
+    assert metrics_queries.recent_performance(4)["win_rate"] == 0.75
+    sql, args = cursor.statements[0]
+    assert "WHERE pnl IS NOT NULL AND (tx_status IS NULL OR tx_status NOT IN ('failed', 'expired'))" in sql
+    assert args == (4,)
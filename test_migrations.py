@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+import price_ingest
+from migrations import create_price_partition, missing_price_partitions, price_partition_bounds
+
+
+class RecordingCursor:
+    """
+    Records every statement; fetchall() hands out `results` in order.
+    """
+
+    def __init__(self, results=()):
+        self.results = list(results)
+        self.statements = []
+        self.rowcount = 0
+
+    def execute(self, query, args=(), stream=None):
+        self.statements.append((" ".join(query.split()), args))
+        if stream is not None:
+            self.streamed = "".join(stream)
+
+    def fetchall(self):
+        return self.results.pop(0) if self.results else []
+
+
+def test_partition_bounds_cover_utc_months():
+    assert price_partition_bounds(datetime(2024, 12, 31, 23, 59)) == (
+        "price_history_2024_12",
+        datetime(2024, 12, 1, tzinfo=timezone.utc),
+        datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+    # 00:30 on Feb 1st in UTC+2 is still January in UTC
+    local = datetime(2024, 2, 1, 0, 30, tzinfo=timezone(timedelta(hours=2)))
+    assert price_partition_bounds(local)[0] == "price_history_2024_01"
+
+
+def test_existing_partition_is_left_alone():
+    cursor = RecordingCursor([[(True, True)]])
+    assert create_price_partition(cursor, datetime(2024, 5, 1)) is False
+    assert not any("CREATE" in sql for sql, _ in cursor.statements)
+
+
+def test_new_partition_takes_its_rows_out_of_default():
+    cursor = RecordingCursor([[(False, True)]])
+    assert create_price_partition(cursor, datetime(2024, 5, 17)) is True
+
+    sqls = [sql for sql, _ in cursor.statements]
+    create, move, attach = sqls[-3:]
+    assert create == "CREATE TABLE price_history_2024_05 (LIKE price_history INCLUDING DEFAULTS)"
+    assert move.startswith("WITH moved AS ( DELETE FROM price_history_default")
+    assert "INSERT INTO price_history_2024_05" in move
+    assert cursor.statements[-2][1] == (datetime(2024, 5, 1, tzinfo=timezone.utc),
+                                        datetime(2024, 6, 1, tzinfo=timezone.utc))
+    assert attach == ("ALTER TABLE price_history ATTACH PARTITION price_history_2024_05 "
+                      "FOR VALUES FROM ('2024-05-01T00:00:00+00:00') TO ('2024-06-01T00:00:00+00:00')")
+
+
+def test_missing_partitions_are_found_without_the_lock():
+    cursor = RecordingCursor([[(False,)], [(True,)]])
+    stamps = [datetime(2019, 3, 5), datetime(2019, 3, 30), datetime(2019, 4, 2), None]
+    assert missing_price_partitions(cursor, stamps) == [datetime(2019, 4, 1, tzinfo=timezone.utc)]
+    assert cursor.statements == [("SELECT to_regclass(%s) IS NULL", ("price_history_2019_03",)),
+                                 ("SELECT to_regclass(%s) IS NULL", ("price_history_2019_04",))]
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+        self._cursor.statements.append(("COMMIT", ()))
+
+    def rollback(self):
+        pass
+
+
+def test_ingest_creates_partitions_before_upserting():
+    # Staged rows span two months; only the second one is missing
+    months = [(datetime(2019, 3, 1),), (datetime(2019, 4, 1),)]
+    cursor = RecordingCursor([months, [(False,)], [(True,)], [(False, True)]])
+    conn = FakeConnection(cursor)
+    rows = [(datetime(2019, 3, 5, tzinfo=timezone.utc), "SOL", 1.0, 0.0),
+            (datetime(2019, 4, 2, tzinfo=timezone.utc), "SOL", 2.0, 0.0)]
+    price_ingest.bulk_upsert_price_history(rows, conn=conn)
+
+    sqls = [sql for sql, _ in cursor.statements]
+    months_query = next(i for i, sql in enumerate(sqls) if "date_trunc('month'" in sql)
+    lock = sqls.index("SELECT pg_advisory_xact_lock(%s)")
+    attach = next(i for i, sql in enumerate(sqls) if "ATTACH PARTITION price_history_2019_04" in sql)
+    upsert = next(i for i, sql in enumerate(sqls) if sql.startswith("INSERT INTO price_history "))
+    # The lock is only taken for the missing month, in its own transaction
+    assert months_query < lock < attach < upsert
+    assert sqls[lock - 1] == "COMMIT" and sqls[attach + 1] == "COMMIT"
+    assert sqls.count("SELECT pg_advisory_xact_lock(%s)") == 1
+    assert not any("price_history_2019_03 (LIKE" in sql for sql in sqls)
+    assert sqls[-1] == "COMMIT" and conn.commits == 3
+
+
+def test_ingest_into_existing_partitions_never_locks():
+    months = [(datetime(2019, 3, 1),)]
+    cursor = RecordingCursor([months, [(False,)]])
+    conn = FakeConnection(cursor)
+    price_ingest.bulk_upsert_price_history([(datetime(2019, 3, 5, tzinfo=timezone.utc), "SOL", 1.0, 0.0)], conn=conn)
+    sqls = [sql for sql, _ in cursor.statements]
+    assert not any("pg_advisory" in sql for sql in sqls)
+    assert conn.commits == 1
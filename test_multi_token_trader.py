@@ -0,0 +1,86 @@
+import asyncio
+import time
+import multi_token_trader
+from multi_token_trader import MultiTokenTrader
+
+TOKENS = [{"symbol": s, "address": s, "volume24h": v} for s, v in (("SOL", 100), ("BONK", 50), ("JUP", 10))]
+CONFIDENCE = {"SOL": 0.6, "BONK": 0.9, "JUP": 0.9}
+
+
+class SlowFetcher:
+    def fetch_price_history(self, symbol, lookback=50):
+        time.sleep(0.2)
+        return [1.0] * 60
+
+
+class FakeIndicators:
+    def compute_indicators_many(self, histories):
+        return {symbol: {"price": 1.0} for symbol in histories}
+
+
+class SlowEnsemble:
+    async def resolve_decision(self, indicators):
+        await asyncio.sleep(0.3)
+        return {"action": "BUY", "amount": 0.05, "confidence": CONFIDENCE[indicators["symbol"]]}
+
+
+class FakeSwapper:
+    async def prepare_candidates(self, tokens):
+        await asyncio.sleep(0.3)
+        return len(tokens)
+
+
+class FakeQuotes:
+    def __init__(self, impacts=None):
+        self.impacts = impacts or {}
+        self.requested = []
+
+    async def quote_sizes(self, input_mint, output_mint, amounts, slippage_bps=None):
+        self.requested.append((output_mint, amounts))
+        await asyncio.sleep(0.1)
+        impact = self.impacts.get(output_mint, 0.001)
+        return [{"amount": a, "out_amount": a, "price_impact": impact, "quote": {}} for a in amounts]
+
+
+class RecordingRisk:
+    def approve_trade(self, decision, indicators):
+        self.approved = (decision, indicators)
+        return False
+
+
+def make_trader(monkeypatch, risk, quotes):
+    monkeypatch.setattr(multi_token_trader, "fetch_top_tokens", lambda limit=5: TOKENS)
+    monkeypatch.setattr(multi_token_trader, "JupiterSwapper", lambda keypair: FakeSwapper())
+
+    trader = MultiTokenTrader(SlowFetcher(), FakeIndicators(), SlowEnsemble(), risk, keypair=None)
+    trader.quotes = quotes
+    monkeypatch.setattr(trader.performance_tracker, "top_tokens_by_pnl", lambda: ["SOL", "BONK", "JUP"])
+    monkeypatch.setattr(trader.signal_fetcher, "get_social_score", lambda symbol: 0.0)
+    return trader
+
+
+def test_tokens_are_evaluated_concurrently(monkeypatch):
+    risk = RecordingRisk()
+    quotes = FakeQuotes()
+    trader = make_trader(monkeypatch, risk, quotes)
+
+    started = time.perf_counter()
+    assert asyncio.run(trader.evaluate_and_trade_top_tokens()) is False
+    elapsed = time.perf_counter() - started
+
+    # Sequentially this is 3 x (0.2 + 0.3 + 0.1)s
+    assert elapsed < 1.0
+    decision, indicators = risk.approved
+    # BONK and JUP tie on raw confidence; BONK's higher volume wins the sentiment boost
+    assert indicators["symbol"] == "BONK"
+    assert decision["price_impact"] == 0.001
+    assert sorted(amounts for _, amounts in quotes.requested) == [[25_000_000, 50_000_000, 100_000_000]] * 3
+
+
+def test_candidates_with_high_price_impact_are_skipped(monkeypatch):
+    risk = RecordingRisk()
+    trader = make_trader(monkeypatch, risk, FakeQuotes({"BONK": 0.05}))
+
+    asyncio.run(trader.evaluate_and_trade_top_tokens())
+    decision, indicators = risk.approved
+    assert indicators["symbol"] == "JUP"
@@ -0,0 +1,51 @@
+import numpy as np
+from agents.rule_based_agent import RuleBasedAgent
+from agents.threshold_agent import ThresholdAgent
+from param_sweep import grid_params, rank_results, run_sweep, walk_forward_selection, walk_forward_windows
+from vector_backtest import run_vectorized
+
+
+def synthetic_prices(n=3000, seed=7):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.004, n)) + 0.3 * np.sin(np.arange(n) / 40))
+
+
+def test_default_params_match_vectorized_backtest():
+    prices = synthetic_prices()
+    param_sets = [{}, {"min_confidence": 0.95}]
+    results = run_sweep(prices, param_sets, workers=2)
+
+    expected = run_vectorized(prices, [RuleBasedAgent(), ThresholdAgent()], min_confidence=0.75)["stats"]
+    _, _, phase, metrics = results[0]
+    assert phase == "all"
+    assert metrics["pnl"] == expected["final_equity"]
+    assert metrics["max_drawdown"] == expected["max_drawdown"]
+    assert metrics["fills"] == expected["fills"]
+    assert results[1][3]["fills"] <= metrics["fills"]
+
+
+def test_walk_forward_chooses_on_train_and_reports_test():
+    prices = synthetic_prices()
+    windows = walk_forward_windows(len(prices), train=1000, test=500)
+    assert windows[0] == (50, 1050, 1050, 1550)
+    assert all(w[3] <= len(prices) for w in windows)
+
+    param_sets = grid_params({"rule_rsi_buy": [30.0, 40.0], "min_confidence": [0.75, 0.9]})
+    results = run_sweep(prices, param_sets, windows, workers=2)
+    assert len(results) == len(param_sets) * len(windows) * 2
+
+    table = rank_results(param_sets, results)
+    assert len(table) == len(param_sets)
+    assert table["windows_chosen"].is_monotonic_decreasing
+    assert table["windows_chosen"].sum() == len(windows)
+
+    selection = walk_forward_selection(param_sets, results)
+    assert list(selection["window"]) == list(range(len(windows)))
+    for row in selection.to_dict("records"):
+        w, p = row["window"], row["params_index"]
+        train = {q: m["pnl"] for q, win, phase, m in results if win == w and phase == "train"}
+        test = {q: m for q, win, phase, m in results if win == w and phase == "test"}
+        # Chosen on train alone; the test columns are that set's next window
+        assert train[p] == max(train.values())
+        assert row["test_pnl"] == test[p]["pnl"] and row["test_fills"] == test[p]["fills"]
+        assert row["min_confidence"] == param_sets[p]["min_confidence"]
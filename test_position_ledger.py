@@ -0,0 +1,74 @@
+from datetime import date, datetime, timezone
+import risk_manager
+from position_ledger import PositionLedger
+from risk_manager import RiskManager
+
+
+def test_sells_close_lots_fifo_per_symbol():
+    ledger = PositionLedger()
+    ledger.apply("2025-01-01T10:00:00", "BUY", 1.0, 10.0, "SOL")
+    ledger.apply("2025-01-01T10:01:00", "BUY", 1.0, 20.0, "SOL")
+    ledger.apply("2025-01-01T10:02:00", "BUY", 5.0, 1.0, "BONK")
+
+    pnl, ret = ledger.apply("2025-01-01T11:00:00", "SELL", 1.5, 16.0, "SOL")
+    # 1.0 from the 10.0 lot and 0.5 from the 20.0 lot
+    assert pnl == (16 - 10) * 1.0 + (16 - 20) * 0.5
+    assert ret == pnl / (10.0 + 10.0)
+    assert ledger.open_amount("SOL") == 0.5 and ledger.open_amount("BONK") == 5.0
+    assert ledger.apply("2025-01-01T11:00:00", "SELL", 1.0, 1.0, "JUP") is None
+    assert ledger.unmatched_sells == 1
+
+
+def test_daily_loss_is_per_utc_day():
+    ledger = PositionLedger().rebuild([
+        ("2025-01-01T10:00:00", "BUY", 2.0, 10.0, "SOL"),
+        (datetime(2025, 1, 1, 23, 0, tzinfo=timezone.utc), "SELL", 1.0, 7.0, "SOL"),
+        # 01:00 on Jan 2 UTC, written with a +02:00 offset
+        ("2025-01-02T03:00:00+02:00", "SELL", 1.0, 12.0, "SOL"),
+    ])
+    assert ledger.daily_loss(date(2025, 1, 1)) == 3.0
+    assert ledger.daily_loss(date(2025, 1, 2)) == 0.0
+    assert ledger.realized_pnl == -1.0
+    assert (ledger.closed, ledger.wins, ledger.losses) == (2, 1, 1)
+
+
+def test_risk_manager_loads_ledger_once_and_updates_it(monkeypatch):
+    loads, logged = [], []
+    today = datetime.utcnow().isoformat()
+    monkeypatch.setattr(risk_manager, "fetch_ledger_rows",
+                        lambda: loads.append(1) or [(today, "BUY", 1.0, 10.0, "SOL")])
+    monkeypatch.setattr(risk_manager, "log_trade", lambda **row: logged.append(row))
+
+    risk = RiskManager()
+    risk.log_trade("BUY", 1.0, 12.0, 0.9, "SOL", "sig-1", tx_status="submitted")
+    risk.log_trade("SELL", 1.5, 8.0, 0.9, "SOL", "sig-2", tx_status="submitted")
+
+    assert logged[1]["pnl"] == round((8 - 10) * 1.0 + (8 - 12) * 0.5, 4)
+    assert risk.calculate_daily_loss() == 4.0
+    assert risk.loss_streak == 1
+    assert loads == [1]
+
+
+def test_only_sent_trades_move_the_ledger_and_failures_are_rebuilt(monkeypatch):
+    stored = [(datetime.utcnow().isoformat(), "BUY", 1.0, 10.0, "SOL")]
+    monkeypatch.setattr(risk_manager, "fetch_ledger_rows", lambda: list(stored))
+    monkeypatch.setattr(risk_manager, "log_trade", lambda **row: None)
+
+    risk = RiskManager()
+    risk.log_trade("BUY", 2.0, 11.0, 0.9, "SOL")  # swap never sent: tx_sig "-"
+    assert risk.ledger.open_amount("SOL") == 1.0
+
+    risk.log_trade("BUY", 2.0, 11.0, 0.9, "SOL", "sig-1", tx_status="submitted")
+    assert risk.ledger.open_amount("SOL") == 3.0
+
+    # The swap fails on chain; the trades table no longer returns it
+    risk.on_trade_status("sig-1", "confirmed")
+    assert risk.ledger.open_amount("SOL") == 3.0
+    risk.on_trade_status("sig-1", "failed")
+    assert risk.ledger.open_amount("SOL") == 1.0
+
+    # A swap that never lands expires; its lot goes the same way
+    risk.log_trade("BUY", 0.5, 11.0, 0.9, "SOL", "sig-2", tx_status="submitted")
+    assert risk.ledger.open_amount("SOL") == 1.5
+    risk.on_trade_status("sig-2", "expired")
+    assert risk.ledger.open_amount("SOL") == 1.0
@@ -0,0 +1,38 @@
+from price_buffer import PriceRingBuffer, PriceBufferStore, to_epoch
+
+
+def test_ring_buffer_wraps_and_keeps_newest():
+    buf = PriceRingBuffer(capacity=5)
+    for i in range(8):
+        buf.append(1000 + i, float(i), 10.0 * i)
+
+    assert len(buf) == 5
+    assert buf.last_prices(5) == [3.0, 4.0, 5.0, 6.0, 7.0]
+    assert buf.last_prices(2) == [6.0, 7.0]
+    assert buf.last_prices(50) == [3.0, 4.0, 5.0, 6.0, 7.0]
+
+    timestamps, prices, volumes = buf.last(3)
+    assert timestamps.tolist() == [1005.0, 1006.0, 1007.0]
+    assert volumes.tolist() == [50.0, 60.0, 70.0]
+    assert buf.latest() == (1007.0, 7.0, 70.0)
+
+
+def test_store_seed_then_append_and_notify():
+    store = PriceBufferStore(capacity=3)
+    seen = []
+    store.add_listener(lambda *args: seen.append(args))
+
+    store.seed("sol", [("2025-01-01T00:00:00", 1.0, 0.0), ("2025-01-01T00:05:00", 2.0, 0.0)])
+    assert store.is_warm("SOL")
+    store.append("SOL", "2025-01-01T00:10:00", 3.0, 1.0)
+    store.append("SOL", "2025-01-01T00:15:00", 4.0, 1.0)
+
+    assert store.prices("SOL", 50) == [2.0, 3.0, 4.0]
+    assert [args[2] for args in seen] == [3.0, 4.0]
+    assert not store.is_warm("JUP")
+    assert store.prices("JUP", 50) == []
+
+
+def test_naive_timestamps_are_treated_as_utc():
+    assert to_epoch("1970-01-01T00:01:00") == 60.0
+    assert to_epoch("1970-01-01T00:01:00+00:00") == 60.0
@@ -0,0 +1,83 @@
+from datetime import datetime
+import pytest
+import price_ingest
+from price_ingest import bulk_upsert_price_history
+
+ROWS = [
+    (datetime(2025, 1, 1, 0, 0), "SOL", 100.0, 5.0),
+    (datetime(2025, 1, 1, 0, 5), "SOL", 101.0, None),
+    (datetime(2025, 1, 1, 0, 5), "SOL", 102.0, 7.0),  # duplicate key, last one wins
+]
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.statements = []
+        self.streams = []
+        self.rowcount = 2
+
+    def execute(self, query, args=(), stream=None):
+        self.statements.append((" ".join(query.split()), list(args)))
+        if stream is not None:
+            self.streams.append(list(stream))
+
+    def fetchall(self):
+        # No staged month is missing a partition
+        return []
+
+
+class FakeConnection:
+    def __init__(self):
+        self._cursor = RecordingCursor()
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_copy_streams_csv_chunks_then_upserts(monkeypatch):
+    monkeypatch.setattr(price_ingest, "COPY_CHUNK_ROWS", 2)
+    conn = FakeConnection()
+    assert bulk_upsert_price_history(iter(ROWS), conn=conn) == 2
+
+    sqls = [sql for sql, _ in conn._cursor.statements]
+    assert sqls[0].startswith("CREATE TEMP TABLE IF NOT EXISTS price_history_staging")
+    assert sqls[1] == "TRUNCATE price_history_staging"
+    assert sqls[2] == ("COPY price_history_staging (timestamp, symbol, price, volume) "
+                       "FROM STDIN WITH (FORMAT csv)")
+    assert conn._cursor.streams == [
+        ["2025-01-01 00:00:00,SOL,100.0,5.0\r\n2025-01-01 00:05:00,SOL,101.0,\r\n",
+         "2025-01-01 00:05:00,SOL,102.0,7.0\r\n"],
+    ]
+    assert sqls[-1] == (
+        "INSERT INTO price_history (timestamp, symbol, price, volume) "
+        "SELECT DISTINCT ON (symbol, timestamp) timestamp, symbol, price, volume "
+        "FROM price_history_staging ORDER BY symbol, timestamp "
+        "ON CONFLICT (symbol, timestamp) DO UPDATE SET price = EXCLUDED.price, volume = EXCLUDED.volume"
+    )
+    assert (conn.commits, conn.rollbacks) == (1, 0)
+
+
+def test_values_method_batches_placeholders(monkeypatch):
+    monkeypatch.setattr(price_ingest, "VALUES_BATCH_ROWS", 2)
+    conn = FakeConnection()
+    bulk_upsert_price_history(ROWS, method="values", conn=conn)
+
+    inserts = [(sql, args) for sql, args in conn._cursor.statements
+               if sql.startswith("INSERT INTO price_history_staging")]
+    assert [sql.count("(%s, %s, %s, %s)") for sql, _ in inserts] == [2, 1]
+    assert [value for _, args in inserts for value in args] == [value for row in ROWS for value in row]
+
+
+def test_unknown_method_rolls_back():
+    conn = FakeConnection()
+    with pytest.raises(ValueError):
+        bulk_upsert_price_history(ROWS, method="bogus", conn=conn)
+    assert (conn.commits, conn.rollbacks) == (0, 1)
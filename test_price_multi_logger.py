@@ -0,0 +1,42 @@
+import price_multi_logger
+from price_multi_logger import PriceMultiLogger
+from real_market_data import RealMarketDataFetcher
+
+
+class FakeCoinGecko:
+    def __init__(self):
+        self.calls = []
+
+    def get_price(self, ids, vs_currencies, **kwargs):
+        self.calls.append((list(ids), kwargs))
+        prices = {"solana": 150.0, "jupiter-exchange-solana": 0.0, "bonk": 2e-5}
+        return {
+            cg_id: {"usd": prices[cg_id], "usd_24h_vol": 1000.0, "last_updated_at": 1700000000}
+            for cg_id in ids if cg_id in prices
+        }
+
+
+def test_quotes_are_fetched_in_batches():
+    fetcher = RealMarketDataFetcher()
+    fetcher.cg = FakeCoinGecko()
+
+    quotes = fetcher.fetch_current_quotes(["SOL", "BONK", "NOTATOKEN", "ETHFI"], batch_size=2)
+
+    assert [len(ids) for ids, _ in fetcher.cg.calls] == [2, 1]
+    assert fetcher.cg.calls[0][1] == {"include_24hr_vol": True, "include_last_updated_at": True}
+    assert quotes["SOL"] == {"price": 150.0, "volume": 1000.0, "last_updated": 1700000000}
+    assert set(quotes) == {"SOL", "BONK"}
+
+
+def test_logger_makes_one_request_and_skips_unpriced_symbols(monkeypatch):
+    logged = []
+    monkeypatch.setattr(price_multi_logger, "log_price_history_many", lambda points: logged.extend(points))
+    fetcher = RealMarketDataFetcher()
+    fetcher.cg = FakeCoinGecko()
+
+    logger = PriceMultiLogger(["SOL", "JUP", "BONK", "NOTATOKEN"], fetcher=fetcher)
+    assert logger.fetch_and_log_all() == 2
+
+    assert len(fetcher.cg.calls) == 1
+    assert [(symbol, price) for _, symbol, price, _ in logged] == [("SOL", 150.0), ("BONK", 2e-5)]
+    assert len({timestamp for timestamp, *_ in logged}) == 1
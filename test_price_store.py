@@ -0,0 +1,108 @@
+import os
+from datetime import datetime, timedelta
+import numpy as np
+from price_store import PriceStore
+
+
+def test_append_is_incremental_and_memory_mapped(tmp_path):
+    store = PriceStore(str(tmp_path))
+    start = datetime(2024, 1, 1)
+    stamps = [start + timedelta(minutes=i) for i in range(10)]
+
+    assert store.append("sol", stamps[:6], np.arange(6.0), np.ones(6)) == 6
+    # Overlapping replay only adds the new rows
+    assert store.append("SOL", stamps[4:], np.arange(4.0, 10.0)) == 4
+    assert store.rows("SOL") == 10
+    assert store.symbols() == ["SOL"]
+
+    columns = store.open("SOL")
+    assert isinstance(columns["price"], np.memmap)
+    assert not columns["price"].flags.writeable
+    assert columns["price"].tolist() == list(np.arange(10.0))
+    assert columns["volume"].tolist() == [1.0] * 6 + [0.0] * 4
+
+    window = store.open("SOL", start=stamps[2], end=stamps[5])
+    assert window["price"].tolist() == [2.0, 3.0, 4.0]
+    assert store.frame("SOL")["timestamp"].iloc[-1].to_pydatetime() == stamps[-1]
+    assert [price for _, price, _ in store.tail("SOL", 3)] == [7.0, 8.0, 9.0]
+
+
+def test_torn_append_is_trimmed(tmp_path):
+    store = PriceStore(str(tmp_path))
+    start = datetime(2024, 1, 1)
+    store.append("SOL", [start, start + timedelta(seconds=1)], [1.0, 2.0])
+
+    # A crash after writing only part of one column
+    with open(os.path.join(str(tmp_path), "SOL", "timestamp.bin"), "ab") as f:
+        f.write(b"\x00" * 12)
+    assert store.rows("SOL") == 2
+
+    store.append("SOL", [start + timedelta(seconds=2)], [3.0])
+    assert store.rows("SOL") == 3
+    assert store.open("SOL")["price"].tolist() == [1.0, 2.0, 3.0]
+    assert os.path.getsize(os.path.join(str(tmp_path), "SOL", "timestamp.bin")) == 24
+
+
+class FakeHistoryCursor:
+    """
+    Answers PriceStore's two queries from an in-memory price_history.
+    """
+
+    def __init__(self, rows):
+        self.rows = sorted(rows)
+
+    def execute(self, query, args=()):
+        if "date_trunc" in query:
+            months = {}
+            for ts, price, _ in self.rows:
+                count, last, total = months.get(datetime(ts.year, ts.month, 1), (0, ts, 0.0))
+                months[datetime(ts.year, ts.month, 1)] = (count + 1, max(last, ts), total + price)
+            self.result = [(month, *summary) for month, summary in months.items()]
+        else:
+            _, since, limit = args
+            since = since.replace(tzinfo=None)
+            self.result = [row for row in self.rows if row[0] > since][:limit]
+
+    def fetchall(self):
+        return self.result
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_verify_reexports_backfilled_months(tmp_path, monkeypatch):
+    import price_store as module
+    start = datetime(2024, 1, 1)
+    history = [(start + timedelta(days=i), float(i), 0.0) for i in range(0, 90, 3)]
+    cursor = FakeHistoryCursor(history)
+    monkeypatch.setattr(module, "get_connection", lambda: FakeConnection(cursor))
+
+    store = PriceStore(str(tmp_path))
+    assert store.sync("SOL") == len(history)
+    assert store.stale_since("SOL", cursor) is None
+
+    # A backfill fills February's gaps and corrects one March price
+    cursor.rows = sorted(history + [(start + timedelta(days=i), float(i), 0.0) for i in range(31, 59, 3)])
+    cursor.rows = [(ts, 99.0 if ts == datetime(2024, 3, 4) else p, v) for ts, p, v in cursor.rows]
+    assert store.sync("SOL") == 0  # nothing newer than the last stored row
+
+    stale = store.stale_since("SOL", cursor)
+    assert stale == int(np.datetime64("2024-02-01", "ns").astype(np.int64))
+    store.sync("SOL", verify=True)
+    stored = store.open("SOL")
+    assert stored["price"].tolist() == [p for _, p, _ in cursor.rows]
+    assert store.stale_since("SOL", cursor) is None
+
+    assert store.sync("SOL", full=True) == len(cursor.rows)
+    assert store.rows("SOL") == len(cursor.rows)
@@ -0,0 +1,53 @@
+import asyncio
+import httpx
+from quote_service import SOL_MINT, QuoteService
+
+USDC = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+
+
+def make_service(seen, delay=0.05, **kwargs):
+    async def handler(request):
+        seen.append(int(request.url.params["amount"]))
+        await asyncio.sleep(delay)
+        amount = request.url.params["amount"]
+        return httpx.Response(200, json={"routePlan": [], "inAmount": amount, "outAmount": str(int(amount) * 2),
+                                         "priceImpactPct": str(int(amount) / 1e6)})
+
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return QuoteService(http=http, **kwargs)
+
+
+def test_sizes_are_quoted_concurrently_and_cached():
+    seen = []
+    service = make_service(seen, ttl=30)
+
+    async def run():
+        ladder = await service.quote_sizes(SOL_MINT, USDC, [1000, 2000, 4000])
+        # Exact repeat and a nearby size in the same bucket are both cache hits
+        again = await service.quote(SOL_MINT, USDC, 2000, exact=True)
+        nearby = await service.quote(SOL_MINT, USDC, 1995)
+        return ladder, again, nearby
+
+    ladder, again, nearby = asyncio.run(run())
+    assert [q["amount"] for q in ladder] == [1000, 2000, 4000]
+    assert [q["price_impact"] for q in ladder] == [0.001, 0.002, 0.004]
+    assert again["inAmount"] == "2000" and nearby is again
+    assert sorted(seen) == [1000, 2000, 4000]
+    assert service.bucket(1995) == service.bucket(2000)
+    assert service.stats["hits"] == 2
+
+
+def test_concurrent_identical_requests_share_one_call_and_expire():
+    seen = []
+    service = make_service(seen, ttl=0.05)
+
+    async def run():
+        first = await asyncio.gather(*(service.quote(SOL_MINT, USDC, 1000) for _ in range(5)))
+        await asyncio.sleep(0.06)
+        await service.quote(SOL_MINT, USDC, 1000)
+        return first
+
+    first = asyncio.run(run())
+    assert all(q is first[0] for q in first)
+    assert seen == [1000, 1000]
+    assert service.stats["coalesced"] == 4
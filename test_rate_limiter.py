@@ -0,0 +1,59 @@
+import pytest
+from rate_limiter import TokenBucket
+
+
+class FakeClock:
+    """
+    Manual monotonic clock; sleep() just moves it forward.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_refill_is_proportional_to_elapsed_time_and_capped():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=4, clock=clock, sleep=clock.sleep)
+
+    assert all(bucket.try_acquire() for _ in range(4))
+    assert not bucket.try_acquire()
+    assert bucket.time_until(1) == 0.5
+
+    clock.now += 0.75  # 1.5 tokens
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.time_until(1) == 0.25
+
+    clock.now += 60  # never more than capacity
+    assert bucket.try_acquire(4)
+    assert not bucket.try_acquire(0.5)
+
+
+def test_acquire_sleeps_exactly_until_tokens_are_due():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=4, capacity=1, clock=clock, sleep=clock.sleep)
+
+    assert bucket.acquire()
+    assert bucket.acquire()
+    assert bucket.acquire()
+    assert clock.sleeps == [0.25, 0.25]
+    assert clock.now == 1000.5
+
+
+def test_acquire_gives_up_at_the_timeout():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, capacity=1, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+
+    assert not bucket.acquire(timeout=0.4)
+    assert clock.sleeps == [pytest.approx(0.4)]
+    # The wait still counted towards the next token
+    assert bucket.time_until(1) == pytest.approx(0.6)
@@ -0,0 +1,91 @@
+import json
+import time
+from token_scanner import TokenListCache
+
+TOKENS = [
+    {"symbol": "SOL", "address": "So1", "volume24h": 300},
+    {"symbol": "jup", "address": "Jup", "volume24h": 200},
+]
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self._body
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+def test_fetches_once_within_ttl_and_indexes_symbols(tmp_path):
+    session = FakeSession(FakeResponse(200, TOKENS, {"ETag": '"v1"'}))
+    cache = TokenListCache(ttl=60, snapshot_path=str(tmp_path / "tokens.json"), session=session)
+
+    for _ in range(5):
+        assert cache.tokens() == TOKENS
+    assert cache.get("JUP")["address"] == "Jup"
+    assert cache.lookup("sol") == (0, TOKENS[0])
+    assert len(session.requests) == 1
+    assert json.loads((tmp_path / "tokens.json").read_text())["etag"] == '"v1"'
+
+
+def test_stale_list_is_served_while_revalidating(tmp_path):
+    session = FakeSession(
+        FakeResponse(200, TOKENS, {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+        FakeResponse(304),
+    )
+    cache = TokenListCache(ttl=60, snapshot_path=str(tmp_path / "tokens.json"), session=session)
+    cache.tokens()
+    cache.fetched_at -= 120
+
+    assert cache.tokens() == TOKENS
+    for _ in range(50):
+        if cache.stats["not_modified"]:
+            break
+        time.sleep(0.01)
+    assert session.requests[1] == {"If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    assert time.time() - cache.fetched_at < 5
+
+
+def test_cold_start_uses_disk_snapshot(tmp_path):
+    path = tmp_path / "tokens.json"
+    path.write_text(json.dumps({"etag": '"v1"', "fetched_at": time.time(), "tokens": TOKENS}))
+    session = FakeSession(FakeResponse(500))
+    cache = TokenListCache(ttl=60, snapshot_path=str(path), session=session)
+
+    assert cache.get("sol")["volume24h"] == 300
+    assert session.requests == []
+
+
+def test_social_score_uses_the_whole_cached_list_quietly(tmp_path, monkeypatch, capsys):
+    import token_scanner
+    from sentiment_fetcher import SentimentSignalFetcher
+
+    tokens = [{"symbol": f"T{i}", "address": f"A{i}", "volume24h": 1000 - i * 50} for i in range(15)]
+    session = FakeSession(FakeResponse(200, tokens))
+    cache = TokenListCache(ttl=60, snapshot_path=str(tmp_path / "tokens.json"), session=session)
+    monkeypatch.setattr(token_scanner, "token_list", cache)
+    capsys.readouterr()
+
+    fetcher = SentimentSignalFetcher()
+    assert fetcher.get_social_score("t0") == 1.0
+    # Ranked 13th: scored against the whole list, not dropped with the top 10
+    assert fetcher.get_social_score("T12") == 0.4
+    assert fetcher.get_social_score("NOPE") == 0.1
+    assert capsys.readouterr().out == ""
+    assert len(session.requests) == 1
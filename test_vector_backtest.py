@@ -0,0 +1,101 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from agents.agent_orchestrator import AgentOrchestrator
+from agents.rule_based_agent import RuleBasedAgent
+from agents.threshold_agent import ThresholdAgent
+from vector_backtest import ACTION_NAMES, agent_votes, combine_votes, simulate_positions
+
+
+def synthetic_prices(n=3000, seed=3):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    return 100 + 8 * np.sin(t / 35) + 3 * np.sin(t / 7) + np.cumsum(rng.normal(0, 0.3, n))
+
+
+def test_combined_votes_match_resolve_decision():
+    rng = np.random.default_rng(0)
+    n = 400
+    ind = {
+        "price": np.full(n, 100.0),
+        "rsi": rng.uniform(0, 100, n),
+        "macd": rng.normal(0, 1, n),
+        "macd_signal": rng.normal(0, 1, n),
+        "sma_20": rng.normal(100, 1, n),
+        "sma_50": rng.normal(100, 1, n),
+    }
+    ind["macd_hist"] = ind["macd"] - ind["macd_signal"]
+    ensemble = AgentOrchestrator([RuleBasedAgent(), ThresholdAgent()], offline=True)
+    action, amount, confidence = combine_votes(agent_votes(ensemble.agents, ind))
+
+    async def run():
+        return [await ensemble.resolve_decision({k: float(v[i]) for k, v in ind.items()}) for i in range(n)]
+
+    expected = asyncio.run(run())
+    assert [ACTION_NAMES[a] for a in action] == [d["action"] for d in expected]
+    assert list(amount) == [d["amount"] for d in expected]
+    assert list(confidence) == [d["confidence"] for d in expected]
+    assert {"BUY", "SELL", "HOLD"} <= {d["action"] for d in expected}
+
+
+def test_vectorized_backtest_matches_event_by_event_path():
+    pytest.importorskip("pandas_ta")
+    from backtester import Backtester
+
+    prices = synthetic_prices()
+    df = pd.DataFrame({"timestamp": pd.date_range("2025-01-01", periods=len(prices), freq="5min"), "close": prices})
+    tester = Backtester("trading.db", df=df.copy())
+    tester.compute_all_indicators()
+    asyncio.run(tester.simulate_trades())
+    events = pd.DataFrame(tester.trade_log)
+
+    result = tester.simulate_vectorized(min_confidence=0.75)
+    active = result["active"]
+    assert [ACTION_NAMES[a] for a in result["action"][active]] == list(events["action"])
+    assert list(result["amount"][active]) == list(events["amount"])
+    assert list(result["confidence"][active]) == list(events["confidence"])
+    assert (events["action"] == "BUY").any() and (events["action"] == "SELL").any()
+
+    # Same long-only position rule, one event at a time
+    position, positions = 0.0, []
+    for _, row in events.iterrows():
+        if row["action"] != "HOLD" and row["confidence"] >= 0.75:
+            position = position + row["amount"] if row["action"] == "BUY" else max(position - row["amount"], 0.0)
+        positions.append(position)
+    assert np.allclose(result["position"][active], positions)
+
+
+def test_sells_never_take_the_position_negative():
+    prices = np.array([10.0, 11.0, 12.0, 13.0, 14.0])
+    action = np.array([-1, 1, -1, -1, 1], dtype=np.int8)
+    amount = np.array([1.0, 2.0, 0.5, 5.0, 1.0])
+    sim = simulate_positions(prices, action, amount, np.ones(5))
+    assert list(sim["position"]) == [0.0, 2.0, 1.5, 0.0, 1.0]
+    assert list(sim["fills"]) == [0.0, 2.0, -0.5, -1.5, 1.0]
+    assert sim["equity"][-1] == pytest.approx(-2 * 11 + 0.5 * 12 + 1.5 * 13 - 14 + 14)
+
+
+def test_weights_scale_each_agents_confidence():
+    B, S = 1, -1
+    # Two agents, like the default ensemble: they disagree on the first
+    # bar and only the first one votes on the second
+    votes = [
+        (np.array([B, B]), np.array([0.05, 0.05]), np.array([0.6, 0.7])),
+        (np.array([S, 0]), np.array([0.02, 0.0]), np.array([0.8, 0.0])),
+    ]
+    action, amount, confidence = combine_votes(votes)
+    assert list(action) == [S, B]
+    assert list(confidence) == [0.8, 0.7]
+    assert all((a == b).all() for a, b in zip(combine_votes(votes, (1.0, 1.0)), combine_votes(votes)))
+
+    # Trusting the first agent more flips the split and lifts both bars'
+    # confidence over a 0.75 gate
+    action, amount, confidence = combine_votes(votes, (1.5, 0.5))
+    assert list(action) == [B, B]
+    assert list(confidence) == [0.9, 1.05]
+    assert list(amount) == [0.05, 0.05]
+
+    # A zero weight drops the agent entirely
+    action, _, confidence = combine_votes(votes, (0.0, 1.0))
+    assert list(action) == [S, 0] and list(confidence) == [0.8, 0.0]
@@ -6,6 +6,7 @@ from collections import defaultdict
 from token_scanner import fetch_top_tokens
 import sqlite3
 from db import get_connection
+from db_writer import flush_writes
 
 BOOTSTRAP_SYMBOLS = ["SOL", "USDT", "PYUSD", "WIF", "POPCAT", "BONK", "JUP"]
 
@@ -18,20 +19,20 @@ class TokenPerformanceTracker:
 
     def top_tokens_by_pnl(self, limit=5):
         try:
+            flush_writes()
             # conn = sqlite3.connect(self.db_path)
-            conn = get_connection()
-            c = conn.cursor()
+            with get_connection() as conn:
+                c = conn.cursor()
 
-            c.execute("""
-                SELECT symbol, SUM(pnl) AS total_pnl
-                FROM trades 
-                WHERE pnl is NOT NULL
-                GROUP BY symbol
-                ORDER BY total_pnl DESC
-                LIMIT %s
-            """, [limit])
-            rows = c.fetchall()
-            conn.close()
+                c.execute("""
+                    SELECT symbol, SUM(pnl) AS total_pnl
+                    FROM trades 
+                    WHERE pnl is NOT NULL
+                    GROUP BY symbol
+                    ORDER BY total_pnl DESC
+                    LIMIT %s
+                """, [limit])
+                rows = c.fetchall()
             if not rows:
                 return self.bootstrap_symbols
         except Exception as e:
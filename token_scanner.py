@@ -1,56 +1,172 @@
+import json
+import os
+import threading
+import time
 import requests
 
+TOKEN_LIST_URL = os.getenv(
+    "TOKEN_LIST_URL",
+    "https://raw.githubusercontent.com/charlie83xt/updating_tokens/refs/heads/main/filtered_tokens.json",
+)
 
-def fetch_top_tokens(limit=10):
+FALLBACK_TOKENS = [
+    {
+        "symbol": "SOL",
+        "address": "So11111111111111111111111111111111111111112",
+        "volume24h": 1000000
+    }
+]
+
+
+class TokenListCache:
     """
-    Efficiently fetch top Solana tokens by volume from Jupiter API
+    Keeps the filtered token list in memory for `ttl` seconds. After that the
+    cached list is still served while a background conditional GET
+    (ETag / If-Modified-Since) revalidates it. The last good copy is
+    snapshotted to disk so a restart doesn't wait on the network.
     """
 
-    try:
-        url = "https://raw.githubusercontent.com/charlie83xt/updating_tokens/refs/heads/main/filtered_tokens.json"
-        res = requests.get(url, timeout=5)
-        res.raise_for_status()
-        
-
-        # Trimming and parsing memory footprint
-        tokens = res.json()
-        # filtered = []
-        # count = 0
-
-        # # Filter for Solana-native tokens with USDC pairs
-        # # filtered = [t for t in tokens if t.get("extensions", {}).get("coingeckoId") and t.get("symbol") != "USDC"]
-        # for t in tokens:
-        #     if (
-        #         t.get("extensions", {}).get("coingeckoId") and 
-        #         t.get("symbol") != "USDC"
-        #         ):
-        #         filtered.append({
-        #             "symbol": t.get("symbol"),
-        #             "address": t.get("address"),
-        #             "volume24h": t.get("volume24h", 0),
-        #         })
-        #         count += 1
-
-        #     if count >= limit * 3:
-        #         break
-
-        # # Sort by market cap or volume if available
-        # sorted_tokens = sorted(filtered, key=lambda x: x["volume24h"], reverse=True)
-        # top_tokens = sorted_tokens[:limit]
-        print(f"[TokenScanner] Returning top {len(tokens[:limit])} tokens")
-        return tokens[:limit]
-
-    except Exception as e:
-        print(f"[TokenScanner] Error fetching top tokens: {e}")
-        return [
-            {
-                "symbol": "SOL",
-                "address": "So11111111111111111111111111111111111111112",
-                "volume24h": 1000000
-            }
-        ]
+    def __init__(self, url=TOKEN_LIST_URL, ttl=None, snapshot_path=None, timeout=5, session=None):
+        self.url = url
+        self.ttl = ttl if ttl is not None else float(os.getenv("TOKEN_LIST_TTL", 300))
+        self.snapshot_path = snapshot_path or os.getenv(
+            "TOKEN_LIST_SNAPSHOT", os.path.join(os.getenv("BASE_DIR", "./tmp"), "token_list.json"))
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+        self._tokens = None
+        self._by_symbol = {}
+        self.max_volume = 0
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = 0.0
+
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.stats = {"hits": 0, "stale_hits": 0, "fetches": 0, "not_modified": 0, "errors": 0}
+
+    def _set_tokens(self, tokens):
+        self._tokens = tokens
+        self._by_symbol = {}
+        # Largest 24h volume, for scoring a token relative to the list
+        self.max_volume = max((token.get("volume24h") or 0 for token in tokens), default=0)
+        for rank, token in enumerate(tokens):
+            symbol = (token.get("symbol") or "").upper()
+            # Keep the first (highest-ranked) token per symbol, like the old linear scan
+            self._by_symbol.setdefault(symbol, (rank, token))
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self._set_tokens(snapshot["tokens"])
+        self.etag = snapshot.get("etag")
+        self.last_modified = snapshot.get("last_modified")
+        self.fetched_at = snapshot.get("fetched_at", 0.0)
+        print(f"[TokenScanner] Loaded {len(self._tokens)} tokens from {self.snapshot_path}")
+        return True
+
+    def _save_snapshot(self):
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({
+                    "etag": self.etag,
+                    "last_modified": self.last_modified,
+                    "fetched_at": self.fetched_at,
+                    "tokens": self._tokens,
+                }, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            print(f"[TokenScanner] Could not write snapshot: {e}")
+
+    def refresh(self):
+        """
+        Revalidates against the server. A 304 only extends the cached copy's
+        lifetime; a 200 replaces it and rewrites the snapshot.
+        """
+        headers = {}
+        if self._tokens is not None:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+        try:
+            res = self.session.get(self.url, headers=headers, timeout=self.timeout)
+            if res.status_code == 304:
+                with self._lock:
+                    self.fetched_at = time.time()
+                    self.stats["not_modified"] += 1
+                return True
+            res.raise_for_status()
+            tokens = res.json()
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"[TokenScanner] Error fetching top tokens: {e}")
+            return False
 
+        with self._lock:
+            self._set_tokens(tokens)
+            self.etag = res.headers.get("ETag")
+            self.last_modified = res.headers.get("Last-Modified")
+            self.fetched_at = time.time()
+            self.stats["fetches"] += 1
+        self._save_snapshot()
+        return True
 
+    def _revalidate_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
 
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
 
+        threading.Thread(target=run, name="token-list-refresh", daemon=True).start()
 
+    def tokens(self) -> list:
+        if self._tokens is None and not self._load_snapshot():
+            self.refresh()
+        if self._tokens is None:
+            return []
+
+        if time.time() - self.fetched_at < self.ttl:
+            self.stats["hits"] += 1
+        else:
+            self.stats["stale_hits"] += 1
+            self._revalidate_in_background()
+        return self._tokens
+
+    def lookup(self, symbol):
+        """
+        (rank, token) for `symbol` in the volume-ordered list, or None.
+        """
+        self.tokens()
+        return self._by_symbol.get(symbol.upper())
+
+    def get(self, symbol):
+        entry = self.lookup(symbol)
+        return entry[1] if entry else None
+
+
+# Process-wide cache shared by the scanner and SentimentSignalFetcher
+token_list = TokenListCache()
+
+
+def fetch_top_tokens(limit=10):
+    """
+    Top Solana tokens by volume from the cached filtered token list
+    """
+    tokens = token_list.tokens()
+    if not tokens:
+        return list(FALLBACK_TOKENS)
+    print(f"[TokenScanner] Returning top {len(tokens[:limit])} tokens")
+    return tokens[:limit]
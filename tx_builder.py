@@ -0,0 +1,105 @@
+# tx_builder.py
+from dataclasses import dataclass
+from solders.instruction import AccountMeta, Instruction
+from solders.message import MessageV0
+from solders.pubkey import Pubkey
+from solders.system_program import ID as SYS_PROGRAM_ID
+from solders.transaction import VersionedTransaction
+from spl.token.constants import ASSOCIATED_TOKEN_PROGRAM_ID
+from account_cache import account_cache as default_account_cache
+from blockhash_service import blockhash_service as default_blockhash_service
+
+
+def derive_ata(owner: Pubkey, mint: Pubkey, token_program: Pubkey) -> Pubkey:
+    """
+    Associated token address for either SPL Token or Token-2022.
+    """
+    return Pubkey.find_program_address(
+        [bytes(owner), bytes(token_program), bytes(mint)], ASSOCIATED_TOKEN_PROGRAM_ID
+    )[0]
+
+
+def create_ata_instruction(payer: Pubkey, owner: Pubkey, mint: Pubkey, token_program: Pubkey) -> Instruction:
+    """
+    CreateIdempotent: succeeds if the ATA appeared in the meantime, so a
+    pre-signed copy is safe to send even when another path created it.
+    """
+    return Instruction(
+        ASSOCIATED_TOKEN_PROGRAM_ID,
+        bytes([1]),
+        [
+            AccountMeta(payer, is_signer=True, is_writable=True),
+            AccountMeta(derive_ata(owner, mint, token_program), is_signer=False, is_writable=True),
+            AccountMeta(owner, is_signer=False, is_writable=False),
+            AccountMeta(mint, is_signer=False, is_writable=False),
+            AccountMeta(SYS_PROGRAM_ID, is_signer=False, is_writable=False),
+            AccountMeta(token_program, is_signer=False, is_writable=False),
+        ],
+    )
+
+
+def build_signed_transaction(wallet, instructions, blockhash) -> VersionedTransaction:
+    message = MessageV0.try_compile(wallet.pubkey(), instructions, [], blockhash)
+    return VersionedTransaction(message, [wallet])
+
+
+@dataclass
+class PreparedTransaction:
+    tx: VersionedTransaction
+    ata: Pubkey
+    token_program: Pubkey
+    fetched_at: float  # monotonic time the blockhash was fetched
+
+
+class AtaTransactionBuilder:
+    """
+    Pre-builds and pre-signs create-ATA transactions for candidate tokens
+    (e.g. while the agents are still voting), so a BUY on a new token
+    only has to send. Prepared transactions are dropped once their
+    blockhash is too old to land.
+    """
+
+    def __init__(self, wallet, blockhash_service=None, account_cache=None):
+        self.wallet = wallet
+        self.blockhash_service = blockhash_service or default_blockhash_service
+        self.account_cache = account_cache or default_account_cache
+        self._prepared = {}
+        self.stats = {"prepared": 0, "used": 0, "expired": 0}
+
+    async def prepare(self, client, mints) -> int:
+        owner = self.wallet.pubkey()
+        # Batched lookups first: mints whose ATA already exists need nothing
+        await self.account_cache.prefetch(client, owner, mints, derive_ata)
+
+        blockhash, fetched_at = await self.blockhash_service.get()
+        prepared = 0
+        for mint in mints:
+            if self.account_cache.get_ata(owner, mint) is not None:
+                self._prepared.pop(str(mint), None)
+                continue
+            token_program = self.account_cache.get_program(mint)
+            if token_program is None:
+                continue  # mint not found on chain
+            ix = create_ata_instruction(owner, owner, mint, token_program)
+            self._prepared[str(mint)] = PreparedTransaction(
+                tx=build_signed_transaction(self.wallet, [ix], blockhash),
+                ata=derive_ata(owner, mint, token_program),
+                token_program=token_program,
+                fetched_at=fetched_at,
+            )
+            prepared += 1
+        self.stats["prepared"] += prepared
+        return prepared
+
+    def take(self, mint):
+        """
+        Pops the prepared transaction for `mint` if its blockhash is still usable.
+        """
+        prepared = self._prepared.pop(str(mint), None)
+        if prepared is None:
+            return None
+        if not self.blockhash_service.is_fresh(prepared.fetched_at):
+            self.stats["expired"] += 1
+            return None
+        self.stats["used"] += 1
+        return prepared
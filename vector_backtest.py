@@ -0,0 +1,171 @@
+# vector_backtest.py
+import os
+import numpy as np
+from indicator_batch import indicator_series
+
+HOLD, BUY, SELL = 0, 1, -1
+ACTION_NAMES = {HOLD: "HOLD", BUY: "BUY", SELL: "SELL"}
+
+
+def rule_based_votes(ind, max_position=0.05, rsi_buy=30.0, rsi_sell=70.0, confidence=0.85):
+    """
+    RuleBasedAgent.get_decision over whole indicator columns.
+    Returns (action, amount, confidence) arrays.
+    """
+    buy = (ind["rsi"] < rsi_buy) & (ind["macd"] > 0) & (ind["sma_20"] > ind["sma_50"])
+    sell = ~buy & (ind["rsi"] > rsi_sell) & (ind["macd"] < 0) & (ind["sma_20"] < ind["sma_50"])
+    action = np.where(buy, BUY, np.where(sell, SELL, HOLD)).astype(np.int8)
+    trade = action != HOLD
+    return action, np.where(trade, max_position, 0.0), np.where(trade, confidence, 0.5)
+
+
+def threshold_votes(ind, rsi_buy=30.0, rsi_sell=70.0, confidence=0.9, amount=0.05):
+    """
+    ThresholdAgent.get_decision over whole indicator columns.
+    """
+    buy = (ind["rsi"] < rsi_buy) & (ind["macd"] > ind["macd_signal"])
+    sell = ~buy & (ind["rsi"] > rsi_sell) & (ind["macd"] < ind["macd_signal"])
+    action = np.where(buy, BUY, np.where(sell, SELL, HOLD)).astype(np.int8)
+    return action, np.full(len(action), amount), np.where(action != HOLD, confidence, 0.7)
+
+
+# Agent class name -> vectorised get_decision(agent, indicator columns)
+VECTOR_RULES = {
+    "RuleBasedAgent": lambda agent, ind: rule_based_votes(ind, float(agent.max_position)),
+    "ThresholdAgent": lambda agent, ind: threshold_votes(ind),
+}
+
+
+def agent_votes(agents, ind):
+    votes = []
+    for agent in agents:
+        rule = VECTOR_RULES.get(agent.__class__.__name__)
+        if rule is None:
+            raise ValueError(f"No vectorised rule for {agent.__class__.__name__}")
+        votes.append(rule(agent, ind))
+    return votes
+
+
+def combine_votes(votes, weights=None):
+    """
+    AgentOrchestrator.resolve_decision over arrays of votes (one tuple per
+    agent, in agent order). Only BUY/SELL votes with confidence > 0 count;
+    each side scores the mean confidence of its votes, the amount is their
+    confidence-weighted mean, and on a tie the side voted first wins.
+    weights (one per agent, for sweeps) scale each agent's confidence
+    before that, so they move the score gated by min_confidence as well as
+    which side wins, even with one agent per side. None (all 1.0) matches
+    the live ensemble.
+    """
+    if weights is None:
+        weights = [1.0] * len(votes)
+    n = len(votes[0][0])
+    best = {}
+    for side in (BUY, SELL):
+        count = np.zeros(n)
+        score_sum = np.zeros(n)
+        amount_sum = np.zeros(n)
+        first = np.full(n, len(votes))
+        for index, ((action, amount, confidence), weight) in enumerate(zip(votes, weights)):
+            counted = (action == side) & (confidence > 0) & (weight > 0)
+            count += counted
+            score_sum += np.where(counted, weight * confidence, 0.0)
+            amount_sum += np.where(counted, amount * weight * confidence, 0.0)
+            first = np.where(counted & (first == len(votes)), index, first)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            best[side] = (count > 0, score_sum / count, amount_sum / score_sum, first)
+
+    has_buy, buy_score, buy_amount, buy_first = best[BUY]
+    has_sell, sell_score, sell_amount, sell_first = best[SELL]
+    pick_buy = has_buy & (~has_sell | (buy_score > sell_score) | ((buy_score == sell_score) & (buy_first < sell_first)))
+    pick_sell = has_sell & ~pick_buy
+
+    action = np.where(pick_buy, BUY, np.where(pick_sell, SELL, HOLD)).astype(np.int8)
+    amount = np.where(pick_buy, buy_amount, np.where(pick_sell, sell_amount, 0.0))
+    confidence = np.where(pick_buy, buy_score, np.where(pick_sell, sell_score, 0.0))
+    return action, np.round(amount, 4), np.round(confidence, 4)
+
+
+def simulate_positions(prices, action, amount, confidence, min_confidence=0.75, fee_bps=0.0):
+    """
+    Long-only fills: approved BUYs add `amount`, SELLs reduce the position
+    but never below zero. Fills execute at the bar's price plus fee_bps.
+    Returns fills, position, cash and equity arrays.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    approved = (action != HOLD) & (confidence >= min_confidence)
+    delta = np.where(approved, np.where(action == BUY, amount, -amount), 0.0)
+
+    # Running sum reflected at zero: a SELL larger than the position only closes it
+    running = np.cumsum(delta)
+    position = running - np.minimum(np.minimum.accumulate(running), 0.0)
+    fills = np.diff(position, prepend=0.0)
+
+    fee = fee_bps / 10_000
+    cash = -np.cumsum(fills * prices + np.abs(fills) * prices * fee)
+    equity = cash + position * prices
+    return {"fills": fills, "position": position, "cash": cash, "equity": equity}
+
+
+# Tunable knobs of the two rule agents, the ensemble and RiskManager; the
+# defaults are what the live classes use
+DEFAULT_PARAMS = {
+    "rule_rsi_buy": 30.0,
+    "rule_rsi_sell": 70.0,
+    "rule_confidence": 0.85,
+    "threshold_rsi_buy": 30.0,
+    "threshold_rsi_sell": 70.0,
+    "threshold_confidence": 0.9,
+    "rule_weight": 1.0,
+    "threshold_weight": 1.0,
+    "max_position": 0.05,
+    "min_confidence": 0.75,
+}
+
+
+def decisions_for_params(ind, params):
+    """
+    Ensemble decisions for one parameter set; missing keys take DEFAULT_PARAMS.
+    """
+    p = {**DEFAULT_PARAMS, **params}
+    votes = [
+        rule_based_votes(ind, p["max_position"], p["rule_rsi_buy"], p["rule_rsi_sell"], p["rule_confidence"]),
+        threshold_votes(ind, p["threshold_rsi_buy"], p["threshold_rsi_sell"], p["threshold_confidence"]),
+    ]
+    return combine_votes(votes, (p["rule_weight"], p["threshold_weight"]))
+
+
+def max_drawdown(equity):
+    if not len(equity):
+        return 0.0
+    return float(np.max(np.maximum.accumulate(equity) - equity))
+
+
+def run_vectorized(prices, agents, start=50, min_confidence=None, fee_bps=0.0, timestamps=None):
+    """
+    The Backtester's event-by-event path as array operations: indicators
+    per bar, every agent's vote, the ensemble decision, then fills and
+    equity. Bars before `start` (or without enough history) are HOLD.
+    """
+    if min_confidence is None:
+        min_confidence = float(os.getenv("MIN_CONFIDENCE_THRESHOLD", 0.75))
+    ind = indicator_series(prices)
+    action, amount, confidence = combine_votes(agent_votes(agents, ind))
+
+    active = ind["ready"] & (np.arange(len(action)) >= start)
+    action = np.where(active, action, HOLD).astype(np.int8)
+    amount = np.where(active, amount, 0.0)
+    confidence = np.where(active, confidence, 0.0)
+
+    result = {"action": action, "amount": amount, "confidence": confidence, "active": active}
+    result.update(simulate_positions(ind["price"], action, amount, confidence, min_confidence, fee_bps))
+    if timestamps is not None:
+        result["timestamp"] = np.asarray(timestamps)
+    result["stats"] = {
+        "bars": int(active.sum()),
+        "fills": int(np.count_nonzero(result["fills"])),
+        "final_position": float(result["position"][-1]) if len(prices) else 0.0,
+        "final_equity": float(result["equity"][-1]) if len(prices) else 0.0,
+        "max_drawdown": max_drawdown(result["equity"]),
+    }
+    return result